@@ -18,19 +18,27 @@
 
 import os
 import io
+import codecs
 import re
 import time
 import json
 import mmap
 import struct
 import logging
+import logging.handlers
+import sqlite3
+import bisect
+import atexit
+import functools
+import multiprocessing
 import zipfile
 import threading
 import unicodedata
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # 🚀 Tesseract OCR の OpenMP スレッド過剰（oversubscription）を抑止する。
 #   pytesseract は tesseract バイナリを呼び出すが、tesseract は 1 呼び出しあたり
@@ -73,17 +81,23 @@ try:
 except ImportError:
     olefile = None
 
+try:
+    from lxml import etree as lxml_etree  # Office XML の高速逐次解析（libxml2）
+except ImportError:
+    lxml_etree = None
+
 try:
     import chardet
 except ImportError:
     chardet = None
 
 try:
-    from PIL import Image
+    from PIL import Image, ImageSequence
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
     Image = None
+    ImageSequence = None
 
 try:
     import pytesseract
@@ -99,6 +113,11 @@ except ImportError:
     CV2_AVAILABLE = False
     cv2 = None
 
+try:
+    import numpy as np  # 画像前処理（OpenCV と併用）
+except ImportError:
+    np = None
+
 # ロガー。メインプロセスでは file_search_app 側が設定済みの debug_logger を
 # 注入して統一する（extraction.debug_logger = debug_logger）。ワーカープロセス
 # 等で未注入の場合でも動作するよう、独自の既定ロガーを用意しておく。
@@ -135,31 +154,459 @@ TARGET_EXTENSIONS = frozenset({
     '.zip',
 })
 
+# OCR結果の永続キャッシュ（SQLite）の保存先を指定する環境変数。
+#   spawn されたワーカープロセスにも確実に伝わるよう、モジュール変数ではなく
+#   環境変数で受け渡す（file_search_app 側が cache/ocr_cache.db を設定する）。
+#   未設定時はプロセス内メモリ(:memory:)のみで保持する。
+OCR_CACHE_ENV = 'FILESEARCH_OCR_CACHE'
+OCR_CACHE_MAX_ENTRIES = 20000  # これを超えたら最終参照が古い順に削除
+OCR_CACHE_TOUCH_BATCH = 256    # 参照時刻(ts)の更新をこの件数ごとにまとめて書き込む
+
+# OCR設定の識別子（キャッシュキーに含める）。認識方式を変えたら値を変えて旧結果を無効化する。
+#   画像: OEM 1（LSTM）＋縦横比によるPSM自動選択。PDF: OEM 1 + PSM 6 固定。
+OCR_IMAGE_CONFIG_SIG = 'oem1|psm-aspect|cjkjoin'
+OCR_PDF_CONFIG_SIG = 'oem1|psm6'
+
+# まとめOCR（複数の小さなTIFFを1枚のシートに貼り合わせてTesseract 1回で処理）の閾値
+OCR_STITCH_BATCH = 8                  # 1シートにまとめる最大ファイル数
+OCR_STITCH_MAX_FILE_BYTES = 512 * 1024  # これ以下の単ページTIFFのみまとめ対象
+OCR_STITCH_MAX_PIXELS = 1500000       # 前処理後の画素数上限（大きい画像は単発OCR）
+OCR_STITCH_GAP_PX = 40                # 画像間の白余白（行の誤結合を防ぐ）
+
+# 画像OCRの平均信頼度(0-100)がこれ未満なら jpn 単独で再認識する
+OCR_LOW_CONFIDENCE = 40
+
+
+class _OcrDiskCache:
+    """OCR結果の永続キャッシュ（SQLite・(path, mtime_ns, size, 言語/設定) キー）。
+
+    Tesseract は1枚数秒かかるため、未更新TIFFの再インデックスではOCRを丸ごと
+    省いて1回の索引付き SELECT で済ませる。再起動後も有効。
+    保存するのはOCRが正常に完了した結果のみ。Tesseract の一時的な失敗は
+    プロセス内メモリにだけ記録し（同一プロセスでの再試行の連鎖を防ぐ）、
+    再起動後は改めてOCRする。キーに言語と設定を含めるため、jpn データを後から
+    導入した場合などは eng で得た旧結果が使われず再OCRされる。
+    複数スレッド/ワーカープロセスから共有されるため、接続は1つをロックで保護し、
+    ファイル間の競合は WAL と busy timeout に任せる。キャッシュ障害は抽出を
+    止めない（取得失敗はミス扱い・保存失敗は無視）。
+    """
+
+    def __init__(self, db_path: str = ':memory:'):
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._failed: set = set()   # このプロセスでOCRに失敗したキー（永続化しない）
+        self._touched: set = set()  # 参照されたキー（ts 更新を書き込み時にまとめて反映）
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        if db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT NOT NULL, ts INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_ts ON ocr(ts)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(file_path: str, st: os.stat_result, variant: str) -> str:
+        """キャッシュキー。variant には OCR 言語と設定識別子（例 'jpn+eng|oem1|psm6'）を渡す。"""
+        return f"{file_path}|{st.st_mtime_ns}|{st.st_size}|{variant}"
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                if key in self._failed:
+                    return ""
+                row = self._conn.execute("SELECT text FROM ocr WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    # LRU: 参照時刻の更新は読み取りの度に書き込まず、まとめて反映する
+                    #   （ヒットの度に書き込みロックを取らない）
+                    self._touched.add(key)
+                    if len(self._touched) >= OCR_CACHE_TOUCH_BATCH:
+                        self._flush_touched()
+                        self._conn.commit()
+            return row[0] if row is not None else None
+        except sqlite3.Error as e:
+            debug_logger.debug(f"OCRキャッシュ取得失敗: {e}")
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        """OCRが正常に完了した結果を保存する（失敗は mark_failed を使う）。"""
+        try:
+            with self._lock:
+                self._failed.discard(key)
+                self._flush_touched()
+                self._conn.execute("INSERT OR REPLACE INTO ocr (key, text, ts) VALUES (?, ?, ?)",
+                                   (key, text, int(time.time())))
+                self._conn.commit()
+                self._puts += 1
+                if self._puts % 500 == 0:
+                    self._evict()
+        except sqlite3.Error as e:
+            debug_logger.debug(f"OCRキャッシュ保存失敗: {e}")
+
+    def mark_failed(self, key: str) -> None:
+        """OCR失敗をこのプロセス内でのみ記録する（ディスクには保存しない）。"""
+        with self._lock:
+            self._failed.add(key)
+
+    def _flush_touched(self) -> None:
+        """参照済みキーの ts をまとめて更新（ロック保持下で呼ぶ・commit は呼び出し側）"""
+        if self._touched:
+            now = int(time.time())
+            self._conn.executemany("UPDATE ocr SET ts = ? WHERE key = ?",
+                                   [(now, k) for k in self._touched])
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """上限超過分を最終参照の古い順に削除（ロック保持下で呼ぶ）"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM ocr").fetchone()
+        excess = count - OCR_CACHE_MAX_ENTRIES
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM ocr WHERE key IN (SELECT key FROM ocr ORDER BY ts LIMIT ?)", (excess,))
+            self._conn.commit()
+
+
+@functools.lru_cache(maxsize=4)
+def _tesseract_engine_available(tesseract_cmd: str) -> bool:
+    """Tesseractエンジンが起動可能かを返す（実行ファイルパス毎にメモ化）。
+
+    get_tesseract_version() は毎回 tesseract --version のサブプロセスを起動するため、
+    ファイル毎に呼ぶとOCR本体の前に起動コストが積み上がる。パス（tesseract_cmd）を
+    キーにすることで、後から同梱版へ切り替えられた場合も正しく再判定される。
+    """
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except pytesseract.TesseractNotFoundError:
+        return False
 
-def safe_truncate_utf8(text: str, max_length: int) -> str:
-    """UTF-8文字列を安全に切り取る（日本語・マルチバイト文字対応）"""
-    if not text or len(text) <= max_length:
-        return text
 
-    # 文字境界で安全に切り取り
-    truncated = text[:max_length]
+# テキスト復号の候補エンコーディング（日本語環境の主要エンコーディング。先頭ほど優先）
+_TEXT_FALLBACK_ENCODINGS = ('utf-8', 'cp932', 'shift_jis')
 
-    # UTF-8バイト列として正常かチェック
+
+def _text_encoding_candidates(encoding: Optional[str]) -> list:
+    """復号を試す順のエンコーディング一覧（推定値を先頭に、重複なし）"""
+    candidates = [encoding] if encoding else []
+    candidates.extend(enc for enc in _TEXT_FALLBACK_ENCODINGS if enc not in candidates)
+    return candidates
+
+
+def _bom_encoding(head: bytes) -> Optional[str]:
+    """BOM から確定するエンコーディング（BOM が無ければ None）"""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return None
+
+
+def _detect_text_encoding(head: bytes, preferred: Optional[str] = None) -> Optional[str]:
+    """先頭バイト列（数KB）からエンコーディングを推定する（BOM → UTF-8 → preferred → chardet の順）。
+
+    preferred は同じ拡張子で前回使ったエンコーディング。BOM と UTF-8 判定は常に
+    優先し、preferred は chardet の前のタイブレークにだけ使う。
+    推定できなければ None。推定結果は _decode_text_bytes の最優先候補として使う。
+    """
+    bom_encoding = _bom_encoding(head)
+    if bom_encoding:
+        return bom_encoding
     try:
-        truncated.encode('utf-8')
-        return truncated
-    except UnicodeEncodeError:
-        # 最後の文字が不完全な場合、1文字ずつ削っていく
-        for i in range(1, min(4, max_length) + 1):  # 最大4バイトまでチェック
-            try:
-                safe_text = text[:max_length - i]
-                safe_text.encode('utf-8')
-                return safe_text
-            except UnicodeEncodeError:
+        # 先頭サンプルの末尾で切れたマルチバイト文字は許容する（final=False）
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if preferred:
+        return preferred
+    if chardet is not None:
+        try:
+            detection = chardet.detect(head)
+        except Exception as e:
+            debug_logger.warning(f"エンコーディング検出エラー: {e}")
+            detection = None
+        if detection and detection.get('encoding') and (detection.get('confidence') or 0) > 0.7:
+            return detection['encoding']
+    return None
+
+
+def _decode_text_bytes(data: bytes, encoding: Optional[str] = None,
+                       final: bool = True) -> Tuple[str, str]:
+    """読み込み済みのバイト列を復号し (テキスト, 使用エンコーディング) を返す。
+
+    encoding を最優先に、UTF-8 → CP932 → Shift_JIS の順で strict に試す。
+    ファイルを読み直さずメモリ上で候補を切り替えるため、失敗時もI/Oは増えない。
+    final=False は途中で切り詰めたデータ用（末尾の欠けたマルチバイト文字を捨てる）。
+    すべて失敗した場合は UTF-8 (errors='ignore') で復号する。
+    """
+    for enc in _text_encoding_candidates(encoding):
+        try:
+            text = codecs.getincrementaldecoder(enc)(errors='strict').decode(data, final=final)
+        except (UnicodeDecodeError, LookupError):
+            continue
+        if text.strip():
+            return text, enc
+    return data.decode('utf-8', errors='ignore'), 'utf-8'
+
+
+def _decode_text_stream(opener, chunk_size: int = 64 * 1024) -> str:
+    """opener() が返すバイナリストリームを逐次復号する（ZIP内ファイル用）。
+
+    先頭4KBで推定したエンコーディングでそのまま残りを増分復号するため、
+    元のバイト列全体を保持せずに済む。strict 復号に失敗した場合のみ
+    opener() で開き直して次の候補を試し、最後は UTF-8 (errors='ignore')。
+    """
+    def _decode(stream, enc: str, errors: str, head: bytes = b'') -> str:
+        decoder = codecs.getincrementaldecoder(enc)(errors=errors)
+        parts = [decoder.decode(head)]
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
+
+    with opener() as stream:
+        head = stream.read(4096)
+        candidates = _text_encoding_candidates(_detect_text_encoding(head))
+        try:
+            text = _decode(stream, candidates[0], 'strict', head)
+            if text.strip():
+                return text
+        except (UnicodeDecodeError, LookupError):
+            pass
+    for enc in candidates[1:]:
+        try:
+            with opener() as stream:
+                text = _decode(stream, enc, 'strict')
+        except (UnicodeDecodeError, LookupError):
+            continue
+        if text.strip():
+            return text
+    with opener() as stream:
+        return _decode(stream, 'utf-8', 'ignore')
+
+
+# === .doc 生バイト解析（_readable_text_from_bytes）用の文字クラス ===
+# 半角カナ・半角形（誤デコードのゴミが落ちやすいので最優先で空白にする）
+_RE_HALFWIDTH_FORMS = re.compile('[\uff61-\uffef]')
+# 可読文字以外: 英数字(\w)・空白・句読点/かな(U+3000–30FF)・漢字(U+4E00–9FFF)・
+#   全角英数記号(U+FF01–FF60)・基本記号 のいずれでもない文字
+_RE_UNREADABLE_CHARS = re.compile(
+    '[^\\w \u3000-\u30ff\u4e00-\u9fff\uff01-\uff60'
+    '、。・「」『』（）【】〜ー－.,!?:;()\\[\\]{}/_\\-]+')
+_RE_HIRAGANA = re.compile('[\u3040-\u309f]')
+_RE_KATAKANA = re.compile('[\u30a0-\u30ff]')
+_RE_KANJI = re.compile('[\u4e00-\u9fff]')
+_RE_ASCII_ALPHA = re.compile('[A-Za-z]')
+
+# .doc 本文の制御コード（0x00–0x1F、改行・タブ以外）を空白へ置き換える translate 表
+_DOC_CONTROL_TO_SPACE = {i: ' ' for i in range(0x20) if chr(i) not in '\n\t'}
+
+# PDF基本抽出（PyMuPDF失敗時のフォールバック）: 文字列リテラル "(...)" の中身。
+#   3バイト未満は復号しても「意味のあるテキスト」(3文字以上)にならないため
+#   パターン側で除外し、短い断片ごとの decode/strip を省く。
+_RE_PDF_LITERAL_STRING = re.compile(rb'\(([^)]{3,})\)')
+
+
+# 1文書あたりの抽出テキスト上限（文字数）。上限に達したら以降のページ/段落は読まない。
+EXTRACT_TEXT_BUDGET = 500000
+# Word/Excel(.docx/.xlsx) の抽出テキスト上限（normalize_extracted_text の既定の切り詰め長）。
+#   読み込みの打ち切り判定は空白を除いた概算文字数（_normalized_len）で数え、
+#   正確な切り詰めは normalize_extracted_text に任せる。
+OFFICE_TEXT_BUDGET = 100000
+# Word の本文はこの文字数を残して打ち切り、ヘッダー/フッター/脚注の分を確保する
+OFFICE_AUX_TEXT_RESERVE = 10000
+
+
+def _normalized_len(text: str) -> int:
+    """打ち切り判定用の概算文字数（半角空白を数えない）。
+
+    段落・行ごとに呼ばれるため split/join で文字列を作らず、C実装の count だけで済ませる。
+    空白だらけの文書でも正規化後より多く数えないので、上限より手前で読み止めることはない。
+    """
+    return len(text) - text.count(' ')
+
+# Word(.docx) 本文XMLの段落・テキスト要素の完全修飾タグ名
+#   iter(tag) に渡すと、一致しない要素は C 実装の走査内で読み飛ばされる
+_DOCX_NS_MAIN = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_DOCX_W_P = _DOCX_NS_MAIN + 'p'
+_DOCX_W_T = _DOCX_NS_MAIN + 't'
+
+
+def _append_stripped_texts(docx, part_names: list, content: list) -> None:
+    """Word の付随パート（ヘッダー等）の <w:t> を前後空白除去して content へ追加する。
+
+    壊れたパートがあればそのグループの残りは読まない（本文の抽出は止めない）。
+    """
+    try:
+        for part_name in part_names:
+            part_root = ET.fromstring(docx.read(part_name))
+            for text_elem in part_root.iter(_DOCX_W_T):
+                # strip は1回だけ（結果を使い回す）
+                elem_text = text_elem.text
+                if elem_text:
+                    elem_text = elem_text.strip()
+                    if elem_text:
+                        content.append(elem_text)
+    except Exception:
+        pass
+
+# Excel(.xlsx) ワークシートXMLの名前空間
+_XLSX_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+# シートをプロセス並列で解析する条件（シートXMLの展開後合計サイズ）。
+#   下限未満はプロセス起動のほうが高くつき、上限超はシートXMLを全て
+#   メモリへ読み出すことになるため逐次解析に任せる。
+XLSX_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+XLSX_PARALLEL_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _xlsx_sheet_rows(source, shared_strings: tuple, row_limit: Optional[int] = None,
+                     char_budget: Optional[int] = None) -> list:
+    """ワークシートXML（ストリームまたはバイト列）を逐次解析し、行テキストの一覧を返す。
+
+    行内のセルは空白連結。ProcessPool からも呼べるようモジュール関数にしている。
+    row_limit: 大容量ファイル時の行数上限（None なら全行）。
+    char_budget: 行テキストの合計文字数がこれに達したら以降の行は読まない（None なら無制限）。
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    c_tag = _XLSX_NS_MAIN + 'c'
+    v_tag = _XLSX_NS_MAIN + 'v'
+    is_tag = _XLSX_NS_MAIN + 'is'
+    t_tag = _XLSX_NS_MAIN + 't'
+    shared_count = len(shared_strings)
+    rows = []
+    row_count = 0
+    char_total = 0
+    # 行単位で処理（行内のセルは空白連結、行は改行で連結）
+    # 🚀 逐次解析: 行(<row>)が閉じる度に処理して破棄する（シート全体のDOMを作らない）
+    for row in _iter_xml_elements(source, _XLSX_NS_MAIN + 'row'):
+        if row_limit is not None and row_count >= row_limit:
+            debug_logger.info(f"大容量Excel: {row_limit}行で処理終了")
+            break
+        if char_budget is not None and char_total >= char_budget:
+            break
+        row_count += 1
+        row_values = []
+        for cell in row.iter(c_tag):
+            cell_type = cell.get('t', 'n')  # セルタイプ: s=文字列, n=数値, b=ブール, str=数式文字列, inlineStr=直接埋込文字列
+
+            if cell_type == 'inlineStr':
+                # インライン文字列は <v> ではなく <is><t> に本文がある。
+                # 旧実装はこれを読まず、openpyxl 等が書く .xlsx の本文が
+                # 丸ごと欠落していた。<is> 配下の全 <t> を連結する。
+                is_elem = cell.find(is_tag)
+                if is_elem is not None:
+                    parts = [t.text for t in is_elem.iter(t_tag) if t.text]
+                    text = ''.join(parts).strip()
+                    if text:
+                        row_values.append(text)
                 continue
 
-        # それでもダメなら空文字列
-        return ""
+            # セル値を取得
+            v_elem = cell.find(v_tag)
+            if v_elem is not None and v_elem.text:
+                value = v_elem.text.strip()
+
+                if cell_type == 's':  # 共有文字列参照
+                    try:
+                        index = int(value)
+                        if 0 <= index < shared_count:
+                            text = shared_strings[index]
+                            if text and len(text) > 0:
+                                row_values.append(text)
+                    except (ValueError, IndexError):
+                        pass
+                elif cell_type == 'str':  # 数式の文字列結果
+                    if value and len(value) > 0:
+                        row_values.append(value)
+                elif value and not value.replace('.', '').replace('-', '').isdigit():
+                    # 数値以外の直接値
+                    if len(value) > 0:
+                        row_values.append(value)
+                elif value and len(value) > 2:  # 長い数値は保持（ID等）
+                    row_values.append(value)
+
+        if row_values:
+            row_text = ' '.join(row_values)
+            rows.append(row_text)
+            if char_budget is not None:
+                char_total += _normalized_len(row_text) + 1
+    return rows
+
+
+def _xlsx_sheet_rows_group(sheet_blobs: list, shared_strings: tuple) -> list:
+    """複数シートをまとめて解析する（ProcessPool の1タスク＝共有文字列の転送1回）"""
+    return [_xlsx_sheet_rows(blob, shared_strings) for blob in sheet_blobs]
+
+
+# シート並列解析用の常駐プロセスプール（メインプロセスで初回使用時に1度だけ生成）。
+#   ブック毎に生成すると、Windows(spawn) ではワーカーがアプリ全体を毎回 re-import する。
+_xlsx_pool: Optional[ProcessPoolExecutor] = None
+_xlsx_pool_lock = threading.Lock()
+
+
+def _get_xlsx_pool(workers: int) -> ProcessPoolExecutor:
+    """シート並列解析用の常駐プールを返す（未生成なら生成）"""
+    global _xlsx_pool
+    with _xlsx_pool_lock:
+        if _xlsx_pool is None:
+            _xlsx_pool = ProcessPoolExecutor(max_workers=workers)
+        return _xlsx_pool
+
+
+def _discard_xlsx_pool(wait: bool = False) -> None:
+    """常駐プールを破棄する（異常終了時・アプリ終了時）"""
+    global _xlsx_pool
+    with _xlsx_pool_lock:
+        pool, _xlsx_pool = _xlsx_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(_discard_xlsx_pool)
+
+
+def _iter_xml_elements(source, tag: str):
+    """XMLを逐次解析し、tag の要素が閉じるたびにその要素を返す（Office XML 用）。
+
+    ET.fromstring で文書全体のツリーを作らず、返した要素は呼び出し側の処理後に
+    clear して親からも外すため、保持するノードは「開いている祖先」程度に収まる。
+    lxml が導入されていれば libxml2 の iterparse を使い、無ければ標準の ElementTree。
+    """
+    if lxml_etree is not None:
+        # 🚀 lxml(libxml2) があれば tag 指定で対象要素の end だけを受け取る
+        #   （その他の要素ごとの Python 側イベント処理が不要）。外部実体は解決しない。
+        for _event, elem in lxml_etree.iterparse(
+                source, events=('end',), tag=tag, resolve_entities=False, huge_tree=True):
+            yield elem
+            elem.clear()
+            # 処理済みの前方兄弟を親から外してメモリを一定に保つ
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return
+
+    stack = []
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == tag:
+            yield elem
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def safe_truncate_utf8(text: str, max_length: int) -> str:
+    """UTF-8文字列を安全に切り取る（日本語・マルチバイト文字対応）
+
+    Python の str はコードポイント単位なので、スライスがマルチバイト文字の
+    途中で切れることはない（encode による検証・再試行は不要）。
+    """
+    if not text or len(text) <= max_length:
+        return text
+    return text[:max_length]
 
 
 def normalize_extracted_text(text: str, max_length: int = 100000) -> str:
@@ -177,7 +624,11 @@ def normalize_extracted_text(text: str, max_length: int = 100000) -> str:
         return ""
 
     # 制御文字を除去（タブ・改行・スペースは保持）
-    cleaned = ''.join(char for char in text if char.isprintable() or char in '\t\n\r ')
+    #   全文字を Python で1文字ずつ判定せず、出現する「異なり文字」の集合だけを判定し、
+    #   除去対象を translate（C実装）で一括削除する。
+    remove = {ord(char): None for char in set(text)
+              if not char.isprintable() and char not in '\t\n\r '}
+    cleaned = text.translate(remove) if remove else text
 
     # 連続する空白を1つに統一
     cleaned = re.sub(r'[ \t]+', ' ', cleaned)
@@ -205,7 +656,8 @@ class _FileContentExtractor:
     """ワーカープロセス用の軽量抽出クラス（DB・UI の依存なし）"""
     def __init__(self):
         self._encoding_cache: dict = {}
-        self._ocr_cache: dict = {}
+        # OCR結果キャッシュ（SQLite永続・初回OCR時に遅延オープン）
+        self._ocr_cache: Optional[_OcrDiskCache] = None
         # 一括インデックス中はファイル単位で多並列に走るため、ページ内並列を
         # 絞って Tesseract のオーバーサブスクリプション（CPUコア超過の奪い合い）
         # を防ぐ。bulk_index_worker 開始/終了時に切り替える。
@@ -217,6 +669,45 @@ class _FileContentExtractor:
         #   live 経路では複数スレッドが同一 extractor を共有するため、インスタンス
         #   属性に直書きすると別ファイルの計測値と競合する。スレッドローカルに置く。
         self._tls = threading.local()
+        # 拡張子 → 抽出メソッドの振り分け表
+        self._dispatch = self._build_dispatch()
+
+    def _get_ocr_cache(self) -> Optional[_OcrDiskCache]:
+        """OCRキャッシュを返す（保存先は環境変数 FILESEARCH_OCR_CACHE、未設定ならメモリ）"""
+        if self._ocr_cache is None:
+            try:
+                self._ocr_cache = _OcrDiskCache(os.environ.get(OCR_CACHE_ENV) or ':memory:')
+            except sqlite3.Error as e:
+                debug_logger.warning(f"OCRキャッシュを開けません（メモリで継続）: {e}")
+                self._ocr_cache = _OcrDiskCache(':memory:')
+        return self._ocr_cache
+
+    def _build_dispatch(self) -> dict:
+        """拡張子 → 抽出メソッドの対応表を作る（_extract_file_content の振り分け用）"""
+        dispatch = {'.txt': self._extract_txt_content, '.pdf': self._extract_pdf_content,
+                    '.zip': self._extract_zip_content}  # ZIPファイル内のテキストファイルを処理
+        for ext in ('.docx', '.dotx', '.dotm', '.docm'):  # Word新形式ファイル
+            dispatch[ext] = self._extract_docx_content
+        for ext in ('.doc', '.dot'):  # Word旧形式ファイル
+            dispatch[ext] = self._extract_doc_content
+        for ext in ('.xlsx', '.xltx', '.xltm', '.xlsm', '.xlsb'):  # Excel新形式ファイル
+            dispatch[ext] = self._extract_xlsx_content
+        for ext in ('.xls', '.xlt'):  # Excel旧形式ファイル
+            dispatch[ext] = self._extract_xls_content
+        for ext in IMAGE_OCR_EXTENSIONS:
+            dispatch[ext] = self._extract_image_or_defer
+        # CAD/図面ファイル（.jwc/.jww/.dxf/.sfc/.dwg/.dwt/.mpp/.mpz）は内容を抽出せず
+        # ファイル名のみインデックスするため、対応表に載せない（"" を返す）。
+        return dispatch
+
+    def _extract_image_or_defer(self, file_path: str) -> str:
+        """画像ファイル: OCRで本文抽出。一括インデックス中(defer_ocr)は本体を
+        高速に保つためOCRを後回しにし、needs_ocr で通知のみ行う。"""
+        self._tls.pdf_needs_ocr = False
+        if getattr(self, 'defer_ocr', False):
+            self._tls.pdf_needs_ocr = True
+            return ""
+        return self._extract_image_content(file_path)
 
     def _page_workers(self) -> int:
         """PDFページ処理（テキスト抽出/OCR）の並列スレッド数を返す。
@@ -237,39 +728,16 @@ class _FileContentExtractor:
     def _extract_file_content(self, file_path: str) -> str:
         """ファイル内容抽出 - 全形式対応（画像OCR含む）"""
         try:
-            file_path_obj = Path(file_path)
-            extension = file_path_obj.suffix.lower()
-
-            if extension == '.txt':
-                return self._extract_txt_content(file_path)
-            elif extension in ['.docx', '.dotx', '.dotm', '.docm']:  # Word新形式ファイル
-                return self._extract_docx_content(file_path)
-            elif extension in ['.doc', '.dot']:  # Word旧形式ファイル
-                return self._extract_doc_content(file_path)
-            elif extension in ['.xlsx', '.xltx', '.xltm', '.xlsm', '.xlsb']:  # Excel新形式ファイル
-                return self._extract_xlsx_content(file_path)
-            elif extension in ['.xls', '.xlt']:  # Excel旧形式ファイル
-                return self._extract_xls_content(file_path)
-            elif extension == '.pdf':
-                return self._extract_pdf_content(file_path)
-            elif extension == '.zip':  # ZIPファイル内のテキストファイルを処理
-                return self._extract_zip_content(file_path)
-            elif extension in IMAGE_OCR_EXTENSIONS:
-                # 画像ファイル: OCRで本文抽出。一括インデックス中(defer_ocr)は本体を
-                # 高速に保つためOCRを後回しにし、needs_ocr で通知のみ行う。
-                self._tls.pdf_needs_ocr = False
-                if getattr(self, 'defer_ocr', False):
-                    self._tls.pdf_needs_ocr = True
-                    return ""
-                return self._extract_image_content(file_path)
-            elif extension in ['.jwc', '.jww', '.dxf', '.sfc', '.dwg', '.dwt', '.mpp', '.mpz']:  # CAD/図面ファイル（ファイル名のみ検索対象）
-                return ""  # 内容は抽出せず、ファイル名のみインデックス
-            else:
-                # 対象外の拡張子はスキップ
-                return ""
+            # Path オブジェクトを生成せず拡張子だけを取る（ファイル毎の割り当てを削減）
+            extension = os.path.splitext(file_path)[1].lower()
+
+            # 拡張子→抽出関数の辞書で1回のハッシュ参照で振り分ける（if/elif 連鎖の線形比較を回避）。
+            #   CAD/図面ファイル等（ファイル名のみ検索対象）・対象外の拡張子は "" を返す。
+            handler = self._dispatch.get(extension)
+            return handler(file_path) if handler is not None else ""
 
         except Exception as e:
-            print(f"⚠️ ファイル内容抽出エラー {file_path}: {e}")
+            debug_logger.warning(f"⚠️ ファイル内容抽出エラー {file_path}: {e}")
             return ""
 
     def _extract_txt_content(self, file_path: str) -> str:
@@ -283,7 +751,7 @@ class _FileContentExtractor:
             # 🚀 エンコーディングキャッシュチェック（同じ拡張子は同じエンコーディングの可能性が高い）
             if not hasattr(self, '_encoding_cache'):
                 self._encoding_cache = {}
-            file_ext = Path(file_path).suffix.lower()
+            file_ext = os.path.splitext(file_path)[1].lower()
             cached_encoding = self._encoding_cache.get(file_ext)
             
             # 🚀 大容量ファイル対応: 10MB以上はmmapで効率的にアクセス
@@ -297,81 +765,39 @@ class _FileContentExtractor:
             else:
                 max_read_size = min(file_size, 20 * 1024 * 1024)  # 最大20MBまで
             
-            # バイナリで読み込んでエンコーディング検出（最適化: 4KBで検出）
+            # 🚀 1回の読み込みで済ませる: 先頭4KBでバイナリ判定・エンコーディング推定を行い、
+            #   残りは同じハンドルから続けて読む（エンコーディング試行毎の再読み込みを廃止）
             with open(file_path, 'rb') as f:
-                sample_data = f.read(min(4096, file_size))  # 4KBで十分（10KB→4KBで高速化）
-                
-                # バイナリファイル検出（NULL文字が多い場合）
-                null_count = sample_data.count(b'\x00')
-                if null_count > len(sample_data) * 0.1:  # 10%以上NULL文字ならバイナリ
+                head = f.read(min(4096, max_read_size))
+                bom_encoding = _bom_encoding(head)
+
+                # バイナリファイル検出（NULL文字が多い場合）。UTF-16 は BOM で判別済みなので除外
+                null_count = head.count(b'\x00')
+                if bom_encoding != 'utf-16' and null_count > len(head) * 0.1:  # 10%以上NULL文字ならバイナリ
                     return ""
-            
-            # 🚀 エンコーディング検出の最適化: キャッシュ優先、UTF-8を最初に試行
-            detected_encoding = None
-            if cached_encoding:
-                # キャッシュがあれば優先使用
-                detected_encoding = cached_encoding
+
+                if use_mmap and file_size > 50 * 1024 * 1024:
+                    # 🚀 50MB以上: mmapで効率的にアクセス（先頭 max_read_size のみ）
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped:
+                        data = mmapped[:max_read_size]
+                else:
+                    data = head + f.read(max_read_size - len(head))
+
+            # 🚀 エンコーディング: 毎ファイル先頭4KBで BOM/UTF-8 を判定し（BOM が常に優先）、
+            #   同じ拡張子のキャッシュは chardet 前のタイブレークにだけ使う
+            detected_encoding = bom_encoding or _detect_text_encoding(head, cached_encoding)
+            if cached_encoding and detected_encoding == cached_encoding:
                 debug_logger.debug(f"キャッシュエンコーディング使用: {detected_encoding}")
-            elif chardet:
-                try:
-                    detection = chardet.detect(sample_data)
-                    if detection and detection['confidence'] > 0.7:
-                        detected_encoding = detection['encoding']
-                        # キャッシュに保存
-                        self._encoding_cache[file_ext] = detected_encoding
-                        debug_logger.debug(f"検出エンコーディング: {detected_encoding} (信頼度: {detection['confidence']:.2f})")
-                except Exception as e:
-                    debug_logger.warning(f"エンコーディング検出エラー: {e}")
-            
-            # エンコーディング候補リスト（UTF-8優先で高速化）
-            encodings = ['utf-8']  # UTF-8を最優先
-            if detected_encoding and detected_encoding.lower() != 'utf-8':
-                encodings.insert(0, detected_encoding)
-            encodings.extend(['cp932', 'shift_jis'])  # 日本語環境の主要エンコーディング
-            
-            # 各エンコーディングで試行（高速版）
-            for encoding in encodings:
-                try:
-                    if use_mmap and file_size > 50 * 1024 * 1024:
-                        # 🚀 50MB以上: mmapで効率的にアクセス（メモリ節約）
-                        with open(file_path, 'rb') as f:
-                            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mmapped:
-                                # 先頭20MBのみ読み込み（全体は読まない）
-                                chunk_data = mmapped[:max_read_size]
-                                content = chunk_data.decode(encoding, errors='strict')
-                                if content and len(content.strip()) > 0:
-                                    # エンコーディングをキャッシュ
-                                    self._encoding_cache[file_ext] = encoding
-                                    debug_logger.debug(f"mmap抽出成功: {encoding}")
-                                    return normalize_extracted_text(content)
-                    else:
-                        # 通常ファイル: 標準読み込み
-                        with open(file_path, 'r', encoding=encoding, errors='strict') as f:
-                            content = f.read(max_read_size)
-                            if content and len(content.strip()) > 0:
-                                # エンコーディングをキャッシュ
-                                self._encoding_cache[file_ext] = encoding
-                                debug_logger.debug(f"テキスト抽出成功: {encoding}")
-                                return normalize_extracted_text(content)
-                except (UnicodeDecodeError, LookupError):
-                    continue
-                except Exception as e:
-                    debug_logger.warning(f"読み込みエラー ({encoding}): {e}")
-                    continue
-            
-            # すべて失敗した場合はエラーを無視して読み込み（フォールバック）
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read(max_read_size)
-                    return normalize_extracted_text(content)
-            except:
-                try:
-                    with open(file_path, 'r', encoding='cp932', errors='ignore') as f:
-                        content = f.read(max_read_size)
-                        return normalize_extracted_text(content)
-                except:
-                    return ""
-                    
+
+            # 読み込み済みバイト列を候補順に strict 復号（UTF-8 に見える CP932 本文も取りこぼさない）
+            content, encoding = _decode_text_bytes(
+                data, detected_encoding, final=len(data) >= file_size)
+            # エンコーディングをキャッシュ（BOM 由来はそのファイル固有なのでキャッシュしない）
+            if not bom_encoding:
+                self._encoding_cache[file_ext] = encoding
+            debug_logger.debug(f"テキスト抽出成功: {encoding}")
+            return normalize_extracted_text(content)
+
         except Exception as e:
             debug_logger.error(f"テキスト抽出エラー {file_path}: {e}")
             return ""
@@ -384,13 +810,13 @@ class _FileContentExtractor:
             
             # 古い形式のWordファイル（.doc）の場合は処理をスキップ
             if file_extension in ['.doc', '.dot']:
-                print(f"⚠️ 古い形式のWordファイルはサポートされていません: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ 古い形式のWordファイルはサポートされていません: {os.path.basename(file_path)}")
                 return ""
 
             # 🚀 ファイルサイズチェック（大容量対応）
             file_size = os.path.getsize(file_path)
             if file_size < 100:  # 100バイト未満は無効
-                print(f"⚠️ ファイルサイズが小さすぎます: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ ファイルサイズが小さすぎます: {os.path.basename(file_path)}")
                 return ""
             
             # 🚀 大容量ファイル（50MB以上）は部分的に処理
@@ -399,93 +825,64 @@ class _FileContentExtractor:
 
             content = []
 
-            # ZIPファイルかどうかを事前チェック
-            try:
-                with zipfile.ZipFile(file_path, 'r') as test_zip:
-                    # word/document.xmlが存在するかチェック
-                    if 'word/document.xml' not in test_zip.namelist():
-                        debug_logger.warning(f"word/document.xmlが見つかりません: {file_path}")
-                        print(f"⚠️ 有効なWordファイルではありません（破損または別形式）: {os.path.basename(file_path)}")
-                        return ""
-            except zipfile.BadZipFile:
-                debug_logger.warning(f"ZIPファイルとして開けません: {file_path}")
-                print(f"⚠️ 破損したWordファイル: {os.path.basename(file_path)}")
-                return ""  # ZIPファイルでない場合は静かに終了
-            except Exception as e:
-                debug_logger.warning(f"Word事前チェックエラー: {file_path} - {e}")
-                return ""
-
+            # ZIPの中央ディレクトリ解析は1回だけ（検証用に開き直さない）。
+            #   ZIPでなければ BadZipFile が下の except で捕捉される。
             with zipfile.ZipFile(file_path, 'r') as docx:
-                # メイン文書の抽出
-                xml_content = docx.read('word/document.xml')
-                root = ET.fromstring(xml_content)
-                
-                # 名前空間定義
-                namespaces = {
-                    'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-                }
+                # word/document.xmlが存在するかチェック（namelist() を作らず辞書参照）
+                if docx.NameToInfo.get('word/document.xml') is None:
+                    debug_logger.warning(f"word/document.xmlが見つかりません: {file_path}")
+                    debug_logger.warning(f"⚠️ 有効なWordファイルではありません（破損または別形式）: {os.path.basename(file_path)}")
+                    return ""
 
-                # 段落とテキスト要素を順序通りに抽出
+                # メイン文書の抽出: document.xml を逐次解析し、段落(<w:p>)が閉じる度に
+                #   本文(<w:t>)を連結して破棄する（文書全体のDOMを作らない）。
+                #   テキストボックス等の入れ子段落は内側が先に閉じて取り除かれるため、
+                #   外側の段落で二重に数えない。
                 paragraph_count = 0
-                for para in root.findall('.//w:p', namespaces):
-                    # 🚀 大容量ファイル: 段落数制限
-                    if is_large_file and paragraph_count >= max_paragraphs:
-                        debug_logger.info(f"大容量Word: {max_paragraphs}段落で処理終了")
-                        break
-                    
-                    para_text = []
-                    for text_elem in para.findall('.//w:t', namespaces):
-                        if text_elem.text:
-                            para_text.append(text_elem.text)
-                    if para_text:
-                        content.append(''.join(para_text))
-                        paragraph_count += 1
-                
-                # ヘッダーの抽出
-                try:
-                    for header_file in [f for f in docx.namelist() if 'header' in f.lower()]:
-                        header_xml = docx.read(header_file)
-                        header_root = ET.fromstring(header_xml)
-                        for text_elem in header_root.findall('.//w:t', namespaces):
-                            if text_elem.text and text_elem.text.strip():
-                                content.append(text_elem.text.strip())
-                except:
-                    pass
-                
-                # フッターの抽出
-                try:
-                    for footer_file in [f for f in docx.namelist() if 'footer' in f.lower()]:
-                        footer_xml = docx.read(footer_file)
-                        footer_root = ET.fromstring(footer_xml)
-                        for text_elem in footer_root.findall('.//w:t', namespaces):
-                            if text_elem.text and text_elem.text.strip():
-                                content.append(text_elem.text.strip())
-                except:
-                    pass
+                text_total = 0
+                body_budget = OFFICE_TEXT_BUDGET - OFFICE_AUX_TEXT_RESERVE
+                with docx.open('word/document.xml') as document_stream:
+                    for para in _iter_xml_elements(document_stream, _DOCX_W_P):
+                        # 🚀 大容量ファイル: 段落数制限
+                        if is_large_file and paragraph_count >= max_paragraphs:
+                            debug_logger.info(f"大容量Word: {max_paragraphs}段落で処理終了")
+                            break
+                        # 🚀 抽出文字数が上限に達したら残りの段落は読まない（切り詰められるだけ）。
+                        #   ヘッダー/フッター/脚注の分を残して本文を打ち切る。
+                        if text_total >= body_budget:
+                            debug_logger.info(f"Word: 本文抽出上限{body_budget}文字で処理終了")
+                            break
+
+                        para_text = [t.text for t in para.iter(_DOCX_W_T) if t.text]
+                        if para_text:
+                            content.append(''.join(para_text))
+                            text_total += _normalized_len(content[-1]) + 1
+                            paragraph_count += 1
                 
-                # 脚注・コメントの抽出
-                try:
-                    for notes_file in [f for f in docx.namelist() if 'footnotes' in f.lower() or 'comments' in f.lower()]:
-                        notes_xml = docx.read(notes_file)
-                        notes_root = ET.fromstring(notes_xml)
-                        for text_elem in notes_root.findall('.//w:t', namespaces):
-                            if text_elem.text and text_elem.text.strip():
-                                content.append(text_elem.text.strip())
-                except:
-                    pass
+                # ヘッダー/フッター/脚注の検索用に名前一覧は1回だけ作る
+                member_names = docx.namelist()
+
+                # ヘッダー・フッター・脚注/コメントの抽出（グループ毎に失敗を隔離）
+                _append_stripped_texts(docx, [f for f in member_names if 'header' in f.lower()], content)
+                _append_stripped_texts(docx, [f for f in member_names if 'footer' in f.lower()], content)
+                _append_stripped_texts(
+                    docx, [f for f in member_names
+                           if 'footnotes' in f.lower() or 'comments' in f.lower()], content)
 
             result = ' '.join(content)
-            return normalize_extracted_text(result)
+            # 🚀 断片は結合後不要。正規化（内部で数回コピーする）の前に解放してピークメモリを抑える
+            content.clear()
+            return normalize_extracted_text(result, max_length=OFFICE_TEXT_BUDGET)
 
         except zipfile.BadZipFile:
-            print(f"⚠️ Wordファイルが不正なZIP形式です: {os.path.basename(file_path)}")
+            debug_logger.warning(f"⚠️ Wordファイルが不正なZIP形式です: {os.path.basename(file_path)}")
             return ""
         except Exception as e:
             # より詳細なエラー情報を提供
             if "zip file" in str(e).lower():
-                print(f"⚠️ WordファイルのZIP形式エラー: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ WordファイルのZIP形式エラー: {os.path.basename(file_path)}")
             else:
-                print(f"⚠️ Word抽出エラー: {os.path.basename(file_path)} - {e}")
+                debug_logger.warning(f"⚠️ Word抽出エラー: {os.path.basename(file_path)} - {e}")
             return ""
 
     def _extract_xlsx_content(self, file_path: str) -> str:
@@ -496,7 +893,7 @@ class _FileContentExtractor:
             
             # 古い形式のExcelファイル（.xls）の場合は処理をスキップ
             if file_extension in ['.xls', '.xlt']:
-                print(f"⚠️ 古い形式のExcelファイルはサポートされていません: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ 古い形式のExcelファイルはサポートされていません: {os.path.basename(file_path)}")
                 return ""
             
             # 🚀 ファイルサイズチェック（大容量対応）
@@ -505,22 +902,15 @@ class _FileContentExtractor:
             max_rows = 5000 if is_large_file else 50000  # 大容量は5000行まで
             max_sheets = 3 if is_large_file else 10  # 大容量は3シートまで
             
-            # ZIPファイルかどうかを事前チェック
-            try:
-                with zipfile.ZipFile(file_path, 'r') as test_zip:
-                    # Excel形式の必須ファイルが存在するかチェック
-                    if 'xl/workbook.xml' not in test_zip.namelist():
-                        print(f"⚠️ 有効なExcelファイルではありません: {os.path.basename(file_path)}")
-                        return ""
-            except zipfile.BadZipFile:
-                print(f"⚠️ ZIPファイルでないため処理をスキップ: {os.path.basename(file_path)}")
-                return ""
-            except Exception as e:
-                print(f"⚠️ Excelファイル検証エラー: {os.path.basename(file_path)} - {e}")
-                return ""
-            
             content = []
+            # ZIPの中央ディレクトリ解析は1回だけ（検証用に開き直さない）。
+            #   ZIPでなければ BadZipFile が下の except で捕捉される。
             with zipfile.ZipFile(file_path, 'r') as xlsx:
+                # Excel形式の必須ファイルが存在するかチェック（namelist() を作らず辞書参照）
+                if xlsx.NameToInfo.get('xl/workbook.xml') is None:
+                    debug_logger.warning(f"⚠️ 有効なExcelファイルではありません: {os.path.basename(file_path)}")
+                    return ""
+
                 # 共有文字列取得
                 #   sharedStrings.xml は <si>（文字列1個）の並び。リッチテキストの
                 #   <si> は複数の <r><t> に分割されるため、<si> 単位で本文の <t> を
@@ -533,26 +923,28 @@ class _FileContentExtractor:
                 #   カタカナが連結される。本文は <si> 直下の <t>(単純文字列)と
                 #   <r>/<t>(リッチテキストのrun)のみで構成されるため、rPh を含む
                 #   その他の <t> は対象外にする。
+                _ns_main = _XLSX_NS_MAIN
                 try:
-                    _ns_main = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
-                    shared_strings_xml = xlsx.read('xl/sharedStrings.xml')
-                    shared_root = ET.fromstring(shared_strings_xml)
                     shared_strings = []
-                    for si in shared_root.iter(_ns_main + 'si'):
-                        parts = []
-                        # <si> 直下の <t>（ふりがなを持たない単純文字列）
-                        t_direct = si.find(_ns_main + 't')
-                        if t_direct is not None and t_direct.text:
-                            parts.append(t_direct.text)
-                        # <r>/<t>（リッチテキストの run 本文）。rPh は <r> 配下に
-                        # は無いためここに混入しない。
-                        for r in si.findall(_ns_main + 'r'):
-                            for t in r.findall(_ns_main + 't'):
-                                if t.text:
-                                    parts.append(t.text)
-                        shared_strings.append(''.join(parts))
+                    # 🚀 逐次解析: <si> が閉じる度に文字列化して破棄（全体のDOMを作らない）
+                    with xlsx.open('xl/sharedStrings.xml') as shared_stream:
+                        for si in _iter_xml_elements(shared_stream, _ns_main + 'si'):
+                            parts = []
+                            # <si> 直下の <t>（ふりがなを持たない単純文字列）
+                            t_direct = si.find(_ns_main + 't')
+                            if t_direct is not None and t_direct.text:
+                                parts.append(t_direct.text)
+                            # <r>/<t>（リッチテキストの run 本文）。rPh は <r> 配下に
+                            # は無いためここに混入しない。
+                            for r in si.findall(_ns_main + 'r'):
+                                for t in r.findall(_ns_main + 't'):
+                                    if t.text:
+                                        parts.append(t.text)
+                            shared_strings.append(''.join(parts))
                 except:
                     shared_strings = []
+                # 以降はセル毎の参照のみ（不変タプルにして件数も一度だけ求める）
+                shared_strings = tuple(shared_strings)
 
                 # ワークシート処理
                 try:
@@ -592,92 +984,106 @@ class _FileContentExtractor:
                     sheet_files.sort(key=_sheet_sort_key)
 
                     # 🚀 大容量ファイル: シート数制限
-                    processed_sheets = 0
-                    for sheet_file in sheet_files:
-                        if is_large_file and processed_sheets >= max_sheets:
-                            debug_logger.info(f"大容量Excel: {max_sheets}シートで処理終了")
+                    if is_large_file and len(sheet_files) > max_sheets:
+                        debug_logger.info(f"大容量Excel: {max_sheets}シートで処理終了")
+                        sheet_files = sheet_files[:max_sheets]
+                    row_limit = max_rows if is_large_file else None
+
+                    # 大きなシートが複数あればプロセス並列で解析（条件外は None → 逐次）
+                    parallel_rows = self._xlsx_sheets_parallel(xlsx, sheet_files, shared_strings, row_limit)
+
+                    # 🚀 抽出文字数が上限に達したら残りのシートは読まない
+                    text_total = 0
+                    for sheet_index, sheet_file in enumerate(sheet_files):
+                        if text_total >= OFFICE_TEXT_BUDGET:
+                            debug_logger.info(f"Excel: 抽出上限{OFFICE_TEXT_BUDGET}文字で処理終了")
                             break
-
-                        sheet_xml = xlsx.read(sheet_file)
-                        sheet_root = ET.fromstring(sheet_xml)
-
                         # シート見出し（.xls 抽出と同じ書式）。表示名が無ければファイル名から補う。
                         sheet_name = sheet_name_by_file.get(sheet_file)
                         if not sheet_name:
                             m = re.search(r'(sheet\d+)\.xml$', sheet_file)
                             sheet_name = m.group(1) if m else sheet_file
                         content.append(f"[シート: {sheet_name}]")
+                        text_total += _normalized_len(content[-1]) + 1
 
-                        # 🚀 大容量ファイル: 行数制限
-                        row_count = 0
-                        # 行単位で処理（行内のセルは空白連結、行は改行で連結）
-                        for row in sheet_root.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}row'):
-                            if is_large_file and row_count >= max_rows:
-                                debug_logger.info(f"大容量Excel: シート{processed_sheets+1}で{max_rows}行処理")
-                                break
-                            row_count += 1
-                            row_values = []
-                            for cell in row.iter('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}c'):
-                                cell_type = cell.get('t', 'n')  # セルタイプ: s=文字列, n=数値, b=ブール, str=数式文字列, inlineStr=直接埋込文字列
-
-                                if cell_type == 'inlineStr':
-                                    # インライン文字列は <v> ではなく <is><t> に本文がある。
-                                    # 旧実装はこれを読まず、openpyxl 等が書く .xlsx の本文が
-                                    # 丸ごと欠落していた。<is> 配下の全 <t> を連結する。
-                                    is_elem = cell.find(_ns_main + 'is')
-                                    if is_elem is not None:
-                                        parts = [t.text for t in is_elem.iter(_ns_main + 't') if t.text]
-                                        text = ''.join(parts).strip()
-                                        if text:
-                                            row_values.append(text)
-                                    continue
-
-                                # セル値を取得
-                                v_elem = cell.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v')
-                                if v_elem is not None and v_elem.text:
-                                    value = v_elem.text.strip()
-
-                                    if cell_type == 's':  # 共有文字列参照
-                                        try:
-                                            index = int(value)
-                                            if 0 <= index < len(shared_strings):
-                                                text = shared_strings[index]
-                                                if text and len(text) > 0:
-                                                    row_values.append(text)
-                                        except (ValueError, IndexError):
-                                            pass
-                                    elif cell_type == 'str':  # 数式の文字列結果
-                                        if value and len(value) > 0:
-                                            row_values.append(value)
-                                    elif value and not value.replace('.', '').replace('-', '').isdigit():
-                                        # 数値以外の直接値
-                                        if len(value) > 0:
-                                            row_values.append(value)
-                                    elif value and len(value) > 2:  # 長い数値は保持（ID等）
-                                        row_values.append(value)
-
-                            if row_values:
-                                content.append(' '.join(row_values))
-
-                        processed_sheets += 1
+                        if parallel_rows is not None:
+                            rows = parallel_rows[sheet_index]
+                        else:
+                            with xlsx.open(sheet_file) as sheet_stream:
+                                rows = _xlsx_sheet_rows(sheet_stream, shared_strings, row_limit,
+                                                        char_budget=OFFICE_TEXT_BUDGET - text_total)
+                        content.extend(rows)
+                        text_total += sum(_normalized_len(row) + 1 for row in rows)
 
                 except Exception as e:
-                    print(f"⚠️ Excelシート処理エラー: {e}")
+                    debug_logger.warning(f"⚠️ Excelシート処理エラー: {e}")
 
             result = '\n'.join(content)
-            return normalize_extracted_text(result)
+            # 🚀 断片は結合後不要。正規化の前に解放してピークメモリを抑える
+            content.clear()
+            return normalize_extracted_text(result, max_length=OFFICE_TEXT_BUDGET)
 
         except zipfile.BadZipFile:
-            print(f"⚠️ Excelファイルが不正なZIP形式です: {os.path.basename(file_path)}")
+            debug_logger.warning(f"⚠️ Excelファイルが不正なZIP形式です: {os.path.basename(file_path)}")
             return ""
         except Exception as e:
             # より詳細なエラー情報を提供
             if "zip file" in str(e).lower():
-                print(f"⚠️ ExcelファイルのZIP形式エラー: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ ExcelファイルのZIP形式エラー: {os.path.basename(file_path)}")
             else:
-                print(f"⚠️ Excel抽出エラー: {os.path.basename(file_path)} - {e}")
+                debug_logger.warning(f"⚠️ Excel抽出エラー: {os.path.basename(file_path)} - {e}")
             return ""
 
+    def _xlsx_sheets_parallel(self, xlsx, sheet_files: list, shared_strings: tuple,
+                              row_limit: Optional[int]):
+        """複数の大きなワークシートをプロセス並列で解析し、シート毎の行一覧を返す。
+
+        XML解析はCPU律速でGILを手放さないため、スレッドでは並列化できない。
+        メインプロセスのライブ（単一ファイル）処理で、展開後の合計サイズが閾値以上の
+        ブックに限る。抽出ワーカープロセス内（一括インデックス・背景OCR等）では
+        既にファイル単位でプロセス並列なので使わない（プールの入れ子を作らない）。
+        プールは常駐のものを使い回し、シートはワーカー数のタスクにまとめて
+        共有文字列の転送をタスク数分に抑える。
+        条件外・失敗時は None（呼び出し側が逐次解析する）。
+        """
+        if multiprocessing.parent_process() is not None:
+            return None
+        if self.bulk_mode or row_limit is not None or len(sheet_files) < 2:
+            return None
+        total_bytes = sum(xlsx.getinfo(f).file_size for f in sheet_files)
+        if not XLSX_PARALLEL_MIN_BYTES <= total_bytes <= XLSX_PARALLEL_MAX_BYTES:
+            return None
+        workers = self._page_workers()
+        n_tasks = min(workers, len(sheet_files))
+        if n_tasks < 2:
+            return None
+        try:
+            # 大きいシートから順に、合計サイズが最小のタスクへ割り当てる（負荷の偏りを抑える）
+            sizes = [xlsx.getinfo(f).file_size for f in sheet_files]
+            groups = [[] for _ in range(n_tasks)]
+            group_bytes = [0] * n_tasks
+            for index in sorted(range(len(sheet_files)), key=sizes.__getitem__, reverse=True):
+                k = group_bytes.index(min(group_bytes))
+                groups[k].append(index)
+                group_bytes[k] += sizes[index]
+            pool = _get_xlsx_pool(workers)
+            futures = [pool.submit(_xlsx_sheet_rows_group,
+                                   [xlsx.read(sheet_files[i]) for i in group], shared_strings)
+                       for group in groups]
+            rows_by_sheet = [None] * len(sheet_files)
+            for group, future in zip(groups, futures):
+                for index, rows in zip(group, future.result()):
+                    rows_by_sheet[index] = rows
+            return rows_by_sheet
+        except BrokenProcessPool as e:
+            # ワーカーが異常終了したプールは再利用できないので破棄（次回作り直す）
+            _discard_xlsx_pool()
+            debug_logger.warning(f"Excelシート並列解析エラー（逐次解析へ切替）: {e}")
+            return None
+        except Exception as e:
+            debug_logger.warning(f"Excelシート並列解析エラー（逐次解析へ切替）: {e}")
+            return None
+
     def _extract_zip_content(self, file_path: str) -> str:
         """ZIPファイル内のテキストファイル抽出"""
         try:
@@ -697,7 +1103,7 @@ class _FileContentExtractor:
                     
                     # ファイル数制限チェック
                     if processed_files >= max_files:
-                        print(f"📦 ZIPファイル内ファイル数制限到達: {max_files}件")
+                        debug_logger.info(f"📦 ZIPファイル内ファイル数制限到達: {max_files}件")
                         break
                     
                     # ファイル名とサイズチェック
@@ -710,138 +1116,126 @@ class _FileContentExtractor:
                     
                     # ファイルサイズチェック
                     if file_info.file_size > max_file_size:
-                        print(f"📦 ZIPファイル内の大きなファイルをスキップ: {file_name} ({file_info.file_size} bytes)")
+                        debug_logger.info(f"📦 ZIPファイル内の大きなファイルをスキップ: {file_name} ({file_info.file_size} bytes)")
                         continue
                     
                     try:
-                        # ファイル内容を抽出
-                        with zip_file.open(file_info) as inner_file:
-                            # エンコーディング自動検出
-                            raw_data = inner_file.read()
-                            
-                            # UTF-8で試行
-                            try:
-                                text_content = raw_data.decode('utf-8')
-                            except UnicodeDecodeError:
-                                # Shift_JISで試行
-                                try:
-                                    text_content = raw_data.decode('shift_jis')
-                                except UnicodeDecodeError:
-                                    # chardetライブラリで自動検出
-                                    try:
-                                        import chardet
-                                        detected = chardet.detect(raw_data)
-                                        if detected['encoding']:
-                                            text_content = raw_data.decode(detected['encoding'])
-                                        else:
-                                            text_content = raw_data.decode('utf-8', errors='ignore')
-                                    except (ImportError, UnicodeDecodeError):
-                                        text_content = raw_data.decode('utf-8', errors='ignore')
-                            
-                            # テキスト内容を追加（ファイル名も含める）
-                            if text_content.strip():
-                                content.append(f"[{file_name}]\n{text_content.strip()}")
-                                processed_files += 1
+                        # ファイル内容を抽出: 先頭4KBでエンコーディングを推定し、残りは
+                        #   64KBずつ増分復号する（内部ファイル全体のバイト列を保持しない）
+                        text_content = _decode_text_stream(
+                            lambda info=file_info: zip_file.open(info))
+
+                        # テキスト内容を追加（ファイル名も含める）
+                        if text_content.strip():
+                            content.append(f"[{file_name}]\n{text_content.strip()}")
+                            processed_files += 1
                     
                     except Exception as inner_error:
-                        print(f"📦 ZIPファイル内ファイル処理エラー {file_name}: {inner_error}")
+                        debug_logger.info(f"📦 ZIPファイル内ファイル処理エラー {file_name}: {inner_error}")
                         continue
             
             result = '\n\n'.join(content)
             if result:
-                print(f"📦 ZIPファイル処理完了: {processed_files}個のテキストファイルを抽出")
+                debug_logger.info(f"📦 ZIPファイル処理完了: {processed_files}個のテキストファイルを抽出")
             return result
             
         except zipfile.BadZipFile:
-            print(f"⚠️ 不正なZIPファイル: {file_path}")
+            debug_logger.warning(f"⚠️ 不正なZIPファイル: {file_path}")
             return ""
         except Exception as e:
-            print(f"⚠️ ZIP抽出エラー: {e}")
+            debug_logger.warning(f"⚠️ ZIP抽出エラー: {e}")
             return ""
 
     def _extract_xls_content(self, file_path: str) -> str:
         """古い形式のExcel(.xls)ファイル抽出"""
         try:
             if xlrd is None:
-                print(f"⚠️ xlrdライブラリが必要です（古い形式Excel用）: {os.path.basename(file_path)}")
+                debug_logger.warning(f"⚠️ xlrdライブラリが必要です（古い形式Excel用）: {os.path.basename(file_path)}")
                 return ""
             
             content = []
             
             # xlrdでExcelファイルを開く
             workbook = xlrd.open_workbook(file_path)
+            sheet_names = workbook.sheet_names()
+            datemode = workbook.datemode
+
+            # セルタイプ定数はループ外でローカルに束縛
+            cell_text = xlrd.XL_CELL_TEXT
+            cell_number = xlrd.XL_CELL_NUMBER
+            cell_boolean = xlrd.XL_CELL_BOOLEAN
+            cell_date = xlrd.XL_CELL_DATE
+            cell_blank_types = (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK)
             
             # 全シートを処理
             for sheet_index in range(workbook.nsheets):
                 sheet = workbook.sheet_by_index(sheet_index)
                 
                 # シート名を追加
-                sheet_name = workbook.sheet_names()[sheet_index]
-                content.append(f"[シート: {sheet_name}]")
+                content.append(f"[シート: {sheet_names[sheet_index]}]")
                 
-                # 各行・列を処理
+                # 🚀 各行を処理: sheet.cell() でセル毎に Cell を作らず、
+                #   行単位の値・型の一覧（row_values / row_types）をまとめて取得する
                 for row_idx in range(sheet.nrows):
                     row_values = []
-                    for col_idx in range(sheet.ncols):
-                        cell = sheet.cell(row_idx, col_idx)
-                        
+                    for value, ctype in zip(sheet.row_values(row_idx), sheet.row_types(row_idx)):
                         # セルタイプに応じて値を取得
-                        if cell.ctype == xlrd.XL_CELL_TEXT:
-                            value = cell.value.strip()
-                        elif cell.ctype == xlrd.XL_CELL_NUMBER:
+                        if ctype == cell_text:
+                            value = value.strip()
+                        elif ctype in cell_blank_types:
+                            continue
+                        elif ctype == cell_number:
                             # 数値の場合、整数なら整数として表示
-                            if cell.value == int(cell.value):
-                                value = str(int(cell.value))
+                            if value == int(value):
+                                value = str(int(value))
                             else:
-                                value = str(cell.value)
-                        elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
-                            value = str(bool(cell.value))
-                        elif cell.ctype == xlrd.XL_CELL_DATE:
+                                value = str(value)
+                        elif ctype == cell_boolean:
+                            value = str(bool(value))
+                        elif ctype == cell_date:
                             # 日付の場合
-                            date_tuple = xlrd.xldate_as_tuple(cell.value, workbook.datemode)
+                            date_tuple = xlrd.xldate_as_tuple(value, datemode)
                             value = f"{date_tuple[0]}/{date_tuple[1]}/{date_tuple[2]}"
                         else:
-                            value = str(cell.value) if cell.value else ""
+                            value = str(value).strip() if value else ""
                         
-                        if value and len(value.strip()) > 0:
-                            row_values.append(value.strip())
+                        if value:
+                            row_values.append(value)
                     
                     if row_values:
                         content.append(' '.join(row_values))
             
             result = '\n'.join(content)
             if result:
-                print(f"📊 古い形式Excel処理完了: {os.path.basename(file_path)}")
+                debug_logger.info(f"📊 古い形式Excel処理完了: {os.path.basename(file_path)}")
             return result
             
         except Exception as e:
-            print(f"⚠️ 古い形式Excel抽出エラー: {os.path.basename(file_path)} - {e}")
+            debug_logger.warning(f"⚠️ 古い形式Excel抽出エラー: {os.path.basename(file_path)} - {e}")
             return ""
 
     def _extract_doc_content(self, file_path: str) -> str:
         """古い形式のWord(.doc)ファイル抽出"""
         try:
-            # ファイルの存在確認
-            if not os.path.exists(file_path):
-                print(f"⚠️ DOCファイルが見つかりません: {file_path}")
-                return ""
-            
-            # ファイルサイズの確認
+            # ファイルの存在・サイズ確認（stat は1回だけ）
             try:
-                file_size = os.path.getsize(file_path)
-                if file_size == 0:
-                    print(f"⚠️ DOCファイルが空です: {os.path.basename(file_path)}")
-                    return ""
-                elif file_size > 100 * 1024 * 1024:  # 100MB制限
-                    print(f"⚠️ DOCファイルが大きすぎます ({file_size/1024/1024:.1f}MB): {os.path.basename(file_path)}")
-                    return ""
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                debug_logger.warning(f"⚠️ DOCファイルが見つかりません: {file_path}")
+                return ""
             except OSError as size_error:
-                print(f"⚠️ DOCファイルサイズ取得エラー: {os.path.basename(file_path)} - {size_error}")
+                debug_logger.warning(f"⚠️ DOCファイルサイズ取得エラー: {os.path.basename(file_path)} - {size_error}")
                 return ""
             
-            print(f"🔄 DOC処理開始: {os.path.basename(file_path)} ({file_size/1024:.1f}KB)")
-
             base_name = os.path.basename(file_path)
+            if file_size == 0:
+                debug_logger.warning(f"⚠️ DOCファイルが空です: {base_name}")
+                return ""
+            elif file_size > 100 * 1024 * 1024:  # 100MB制限
+                debug_logger.warning(f"⚠️ DOCファイルが大きすぎます ({file_size/1024/1024:.1f}MB): {base_name}")
+                return ""
+            
+            debug_logger.info(f"🔄 DOC処理開始: {base_name} ({file_size/1024:.1f}KB)")
 
             # 1. OLE2形式（本物の旧.doc）かどうかを先に判定する。
             #    OLE2なら docx2txt は必ず失敗する（.docはzipではない）ため呼ばない。
@@ -861,7 +1255,7 @@ class _FileContentExtractor:
                         text = self._extract_doc_text_ole(ole)
                     if text and len(text) >= 4:
                         text = normalize_extracted_text(text, max_length=500000)
-                        print(f"✅ DOC本文抽出成功(piece table): {base_name} - {len(text)} 文字")
+                        debug_logger.info(f"✅ DOC本文抽出成功(piece table): {base_name} - {len(text)} 文字")
                         return text
                 except Exception as pt_error:
                     debug_logger.warning(f"piece table抽出エラー: {base_name} - {pt_error}")
@@ -873,7 +1267,7 @@ class _FileContentExtractor:
                             text = self._readable_text_from_bytes(raw)
                             if text:
                                 text = normalize_extracted_text(text, max_length=500000)
-                                print(f"✅ OLE2 DOC本文抽出成功(raw): {base_name} - {len(text)} 文字")
+                                debug_logger.info(f"✅ OLE2 DOC本文抽出成功(raw): {base_name} - {len(text)} 文字")
                                 return text
                 except Exception as olefile_error:
                     debug_logger.warning(f"olefile処理エラー: {base_name} - {olefile_error}")
@@ -883,7 +1277,7 @@ class _FileContentExtractor:
                 try:
                     content = docx2txt.process(file_path)
                     if content and content.strip():
-                        print(f"✅ docx2txtでDOC処理成功: {base_name} - 長さ: {len(content)} 文字")
+                        debug_logger.info(f"✅ docx2txtでDOC処理成功: {base_name} - 長さ: {len(content)} 文字")
                         return content.strip()
                 except Exception as docx2txt_error:
                     debug_logger.debug(f"docx2txt処理スキップ: {base_name} - {docx2txt_error}")
@@ -895,7 +1289,7 @@ class _FileContentExtractor:
                 text = self._readable_text_from_bytes(data)
                 if text:
                     text = normalize_extracted_text(text, max_length=500000)
-                    print(f"✅ バイナリ解析成功: {base_name} - {len(text)} 文字")
+                    debug_logger.info(f"✅ バイナリ解析成功: {base_name} - {len(text)} 文字")
                     return text
             except Exception as binary_error:
                 debug_logger.warning(f"バイナリ解析エラー: {base_name} - {binary_error}")
@@ -905,7 +1299,7 @@ class _FileContentExtractor:
             return f"Microsoft Word文書 - {base_name}"
             
         except Exception as e:
-            print(f"⚠️ DOC抽出エラー: {os.path.basename(file_path)} - {e}")
+            debug_logger.warning(f"⚠️ DOC抽出エラー: {os.path.basename(file_path)} - {e}")
             return ""
 
     def _readable_text_from_bytes(self, data: bytes) -> str:
@@ -918,27 +1312,17 @@ class _FileContentExtractor:
         ASCIIのみを拾う旧実装と違い、日本語の.doc本文も検索対象にできる。
         """
         def filter_readable(text: str) -> str:
-            kept = []
-            for ch in text:
-                o = ord(ch)
-                # 半角カナ・半角形(0xFF61–0xFFEF)は最優先で除外する。
-                #   生バイナリを cp932 で誤デコードすると、ゴミバイトの多くがこの範囲
-                #   (ｦｧ…ﾝ)に落ち、ソースに無いカタカナがプレビューに出る「幻のカタカナ」
-                #   化けの主因だった。なお半角カナは ch.isalnum()==True のため、下の
-                #   isalnum 判定より先にここで弾かないと漏れる。本物の半角カナを失う
-                #   より化けを出さない方を優先する（本文は全角カナ範囲で取れる）。
-                if 0xff61 <= o <= 0xffef:
-                    kept.append(' ')
-                    continue
-                if (ch.isalnum() or ch == ' '
-                        or 0x3000 <= o <= 0x30ff      # 句読点・ひらがな・全角カタカナ
-                        or 0x4e00 <= o <= 0x9fff      # 漢字（CJK統合）
-                        or 0xff01 <= o <= 0xff60      # 全角英数・記号（半角カナは除外）
-                        or ch in '、。・「」『』（）【】〜ー－.,!?:;()[]{}/_-'):
-                    kept.append(ch)
-                else:
-                    kept.append(' ')
-            return ' '.join(''.join(kept).split())
+            # 文字単位の Python ループではなく、文字クラスの正規表現置換（C実装）で
+            #   可読文字以外を空白へ落とす。
+            # 半角カナ・半角形(0xFF61–0xFFEF)は最優先で除外する。
+            #   生バイナリを cp932 で誤デコードすると、ゴミバイトの多くがこの範囲
+            #   (ｦｧ…ﾝ)に落ち、ソースに無いカタカナがプレビューに出る「幻のカタカナ」
+            #   化けの主因だった。なお半角カナは \w（isalnum 相当）に含まれるため、
+            #   可読判定より先にここで弾かないと漏れる。本物の半角カナを失う
+            #   より化けを出さない方を優先する（本文は全角カナ範囲で取れる）。
+            text = _RE_HALFWIDTH_FORMS.sub(' ', text)
+            text = _RE_UNREADABLE_CHARS.sub(' ', text)
+            return ' '.join(text.split())
 
         def quality_score(text: str) -> int:
             # 長い連続トークン（4文字以上）の総文字数で評価する。
@@ -957,26 +1341,13 @@ class _FileContentExtractor:
             #   で判定する。これにより「幻のカタカナ」を含むゴミ scrape を破棄できる。
             if not text:
                 return False
-            hira = kana = cjk = ascii_alpha = ascii_digit = total = 0
-            for ch in text:
-                if ch == ' ':
-                    continue
-                total += 1
-                o = ord(ch)
-                if 0x3040 <= o <= 0x309f:
-                    hira += 1
-                    cjk += 1
-                elif 0x30a0 <= o <= 0x30ff:
-                    kana += 1
-                    cjk += 1
-                elif 0x4e00 <= o <= 0x9fff:
-                    cjk += 1
-                elif ch.isascii() and ch.isalpha():
-                    ascii_alpha += 1
-                elif ch.isascii() and ch.isdigit():
-                    ascii_digit += 1
+            # 文字種ごとの個数は正規表現の findall で数える（文字単位のループを避ける）
+            total = len(text) - text.count(' ')
             if total == 0:
                 return False
+            hira = len(_RE_HIRAGANA.findall(text))
+            cjk = hira + len(_RE_KATAKANA.findall(text)) + len(_RE_KANJI.findall(text))
+            ascii_alpha = len(_RE_ASCII_ALPHA.findall(text))
             # CJK文字が相当量あるなら、本物の日本語散文の指標であるひらがな比率を要求。
             #   ・ランダム漢字ノイズ → ひらがな≒0 で弾かれる。
             #   ・utf-16le本文を cp932 で誤読したゴミ(高位バイト0x30由来の '0' 多数)も、
@@ -1088,7 +1459,7 @@ class _FileContentExtractor:
         text = ''.join(parts)
         # Word制御コードを整形（段落=\r、セル/行末などを改行/空白へ）
         text = text.replace('\r', '\n').replace('\x07', '\n').replace('\x0b', '\n')
-        text = ''.join(ch if (ch in '\n\t' or ord(ch) >= 0x20) else ' ' for ch in text)
+        text = text.translate(_DOC_CONTROL_TO_SPACE)
         return text.strip()
 
     def _extract_pdf_content(self, file_path: str) -> str:
@@ -1101,30 +1472,32 @@ class _FileContentExtractor:
         # OCRを後回しにした場合に True。呼び出し側が保留キューへ積む判断に使う。
         self._tls.pdf_needs_ocr = False
         try:
-            # ファイル存在とアクセス権限チェック
-            if not os.path.exists(file_path):
+            # ファイル存在・サイズチェック（stat は1回だけ）。読み取り権限の無い
+            #   ファイルは下のアクセステスト(open)の PermissionError で弾かれる。
+            try:
+                file_size = os.stat(file_path).st_size
+            except FileNotFoundError:
                 debug_logger.warning(f"PDFファイルが存在しません: {file_path}")
                 return ""
 
-            if not os.access(file_path, os.R_OK):
-                debug_logger.warning(f"PDFファイル読み取り権限なし: {file_path}")
-                return ""
-
-            file_size = os.path.getsize(file_path)
             if file_size < 50:  # 50バイト未満は無効PDFとみなす
                 debug_logger.warning(f"PDFファイルサイズが小さすぎます: {file_path}")
                 return ""
 
             # 大容量PDF対応: 200MBまで処理可能
             if file_size > 200 * 1024 * 1024:  # 200MB以上は処理スキップ
-                print(
+                debug_logger.warning(
                     f"⚠️ PDFファイルが大きすぎます: {os.path.basename(file_path)} ({file_size / 1024 / 1024:.1f}MB)"
                 )
                 return ""
 
             # PyMuPDF使用を試行（ファイルパス正規化付き）
+            #   モジュールはファイル先頭で一度だけ import 済み。未導入なら下の
+            #   except ImportError で基本PDF抽出へフォールバックする。
+            doc = None
             try:
-                import fitz
+                if fitz is None:
+                    raise ImportError("PyMuPDF")
 
                 # ファイルパスの正規化（特殊文字・Unicode対応）
                 normalized_path = os.path.normpath(os.path.abspath(file_path))
@@ -1142,6 +1515,10 @@ class _FileContentExtractor:
                 #   のOCRが並列に走るようにする（_ocr_pdf_pages 側で同ロックを共有）。
                 doc_lock = threading.Lock()
 
+                # 🚀 TextPage 生成フラグ: 合字・空白の保持を外し MediaBox 外のみ除外する。
+                #   空白は後段で正規化し、合字は展開した方が検索に合うため保持は不要。
+                text_flags = fitz.TEXT_MEDIABOX_CLIP
+
                 # 🚀 ページ数に応じた処理戦略
                 total_pages = doc.page_count
                 max_pages = min(total_pages, 200)  # 最大200ページ（500→200で高速化）
@@ -1162,10 +1539,14 @@ class _FileContentExtractor:
                             #   FTS5 がトークン分割するため語順に依存せず、電子発行
                             #   （テキスト層あり）PDFの抽出が目に見えて速くなる。
                             #   🔒 doc へのアクセスは doc_lock で直列化する。
+                            #   TextPage は1回だけ生成し、フォールバックでも使い回す
+                            #   （ページの再解析を避ける）。
+                            textpage = None
                             try:
                                 with doc_lock:
                                     page = doc[page_num]
-                                    page_text = page.get_text("text", sort=False)
+                                    textpage = page.get_textpage(flags=text_flags)
+                                    page_text = page.get_text("text", textpage=textpage, sort=False)
                                 if page_text and len(page_text.strip()) > 10:
                                     return ' '.join(page_text.split())
                             except:
@@ -1173,7 +1554,9 @@ class _FileContentExtractor:
                             # フォールバック: ブロック単位抽出
                             with doc_lock:
                                 page = doc[page_num]
-                                blocks = page.get_text("blocks")
+                                if textpage is None:
+                                    textpage = page.get_textpage(flags=text_flags)
+                                blocks = page.get_text("blocks", textpage=textpage)
                             block_texts = [block[4].strip() for block in blocks if len(block) >= 5 and block[4].strip()]
                             return ' '.join(block_texts)
                         except Exception as e:
@@ -1193,17 +1576,24 @@ class _FileContentExtractor:
                                 continue
                 else:
                     # 少ないページは従来の同期処理
+                    #   抽出済み文字数が上限に達したら残りのページは読まない
+                    #   （max_pages も縮め、未読ページをOCR対象と誤認させない）
+                    text_total = 0
                     for page_num in range(max_pages):
+                        if text_total >= EXTRACT_TEXT_BUDGET:
+                            max_pages = page_num
+                            break
                         try:
                             # 🔒 doc アクセスを直列化（_ocr_pdf_pages と同ロックを共有）
                             with doc_lock:
-                                page = doc[page_num]
                                 # sort=False: 読み順整列を省いて高速化（検索品質は不変）
-                                page_text = page.get_text("text", sort=False)
+                                #   get_page_text でページ番号から直接取り出す（Page を保持しない）
+                                page_text = doc.get_page_text(page_num, flags=text_flags, sort=False)
                             if page_text and page_text.strip():
                                 normalized = ' '.join(page_text.split())
                                 if len(normalized) > 0:
                                     page_texts[page_num] = normalized
+                                    text_total += len(normalized) + 1
                         except Exception as page_error:
                             debug_logger.warning(f"PDFページ {page_num} 読み取りエラー: {page_error}")
                             continue
@@ -1252,14 +1642,27 @@ class _FileContentExtractor:
 
                 doc.close()
 
-                # ページ順に結合
-                content = [page_texts[p] for p in sorted(page_texts.keys())]
+                # ページ順に結合（上限文字数に達した時点で打ち切り、上限超の全文を作らない）
+                content = []
+                remaining = EXTRACT_TEXT_BUDGET
+                for p in sorted(page_texts.keys()):
+                    page_text = page_texts[p]
+                    if len(page_text) >= remaining:
+                        content.append(page_text[:remaining])
+                        break
+                    content.append(page_text)
+                    remaining -= len(page_text) + 1
                 extracted_text = ' '.join(content)
+                has_content = bool(content)
+                # 🚀 ページ断片は結合後不要。正規化（内部で数回コピーする）の前に
+                #   解放し、全文の複製が断片と同時に常駐しないようにする
+                content.clear()
+                page_texts.clear()
                 
                 # 正規化処理を適用
-                extracted_text = normalize_extracted_text(extracted_text, max_length=500000)
+                extracted_text = normalize_extracted_text(extracted_text, max_length=EXTRACT_TEXT_BUDGET)
                 
-                if content:
+                if has_content:
                     debug_logger.debug(f"PDF抽出成功: {file_path} ({len(extracted_text)} 文字)")
                     return extracted_text
                 else:
@@ -1276,41 +1679,43 @@ class _FileContentExtractor:
                 return ""
             except Exception as e:
                 debug_logger.error(f"PyMuPDF抽出エラー: {e}")
+            finally:
+                # 例外で抜けた場合も Document を閉じ、ファイルハンドルを漏らさない
+                if doc is not None and not doc.is_closed:
+                    doc.close()
 
             # フォールバック：基本PDF抽出（ファイルアクセス安全版）
             try:
                 with open(file_path, 'rb') as f:
                     raw_content = f.read(1024 * 1024)  # 最初の1MBのみ読み込み
 
-                # 基本的なPDFテキスト抽出
-                import re
-                text_pattern = re.compile(rb'\(([^)]*)\)')
-                matches = text_pattern.findall(raw_content)
-                extracted_text = []
-
-                for match in matches:
-                    try:
-                        decoded = match.decode('utf-8', errors='ignore')
-                        if len(decoded.strip()) > 2:  # 意味のあるテキストのみ
-                            extracted_text.append(decoded)
-                    except:
-                        continue
+                # 基本的なPDFテキスト抽出（パターンはモジュール読み込み時にコンパイル済み）
+                matches = _RE_PDF_LITERAL_STRING.findall(raw_content)
+                if not matches:
+                    return ""
 
-                return ' '.join(extracted_text)
+                # 🚀 一致毎に decode せず、一括で1回だけ decode する。
+                #   区切りの ')' は一致内に現れない（パターンが除外）ASCII なので、
+                #   不正バイト無視の decode でも一致の境界はそのまま保たれる。
+                decoded_matches = b')'.join(matches).decode('utf-8', errors='ignore').split(')')
+                # 意味のあるテキストのみ
+                return ' '.join(d for d in decoded_matches if len(d.strip()) > 2)
 
             except Exception as e:
-                print(f"⚠️ 基本PDF抽出エラー: {e}")
+                debug_logger.warning(f"⚠️ 基本PDF抽出エラー: {e}")
                 return ""
 
         except Exception as e:
-            print(f"⚠️ PDF抽出エラー: {e}")
+            debug_logger.warning(f"⚠️ PDF抽出エラー: {e}")
             return ""
 
     def _ocr_pdf_pages(self, doc, page_nums, file_path: str, doc_lock=None) -> dict:
         """テキスト層の無いPDFページを画像化してOCR抽出
 
         スキャン（画像ベース）PDF対応。各ページをPyMuPDFでレンダリングし、
-        pytesseractでテキスト抽出する。
+        pytesseractでテキスト抽出する。ページ毎の結果は OCR 永続キャッシュ
+        （(path, mtime_ns, size) + ページ番号キー）に保存し、未更新PDFの
+        再インデックスではレンダリングもOCRも行わない。
         戻り値: {ページ番号: 抽出テキスト}
 
         doc_lock: 呼び出し側が保持する threading.Lock。PyMuPDF は単一 Document の
@@ -1327,15 +1732,10 @@ class _FileContentExtractor:
                 debug_logger.debug("PDF OCRフォールバック: OCRライブラリ未導入のためスキップ")
                 return results
 
-            try:
-                pytesseract.get_tesseract_version()
-            except pytesseract.TesseractNotFoundError:
+            if not _tesseract_engine_available(pytesseract.pytesseract.tesseract_cmd):
                 debug_logger.debug("PDF OCRフォールバック: Tesseract未導入のためスキップ")
                 return results
 
-            import io
-            import fitz
-
             # 処理過多防止: OCR対象ページ数を制限（速度優先）
             max_ocr_pages = 30
             target_pages = list(page_nums)[:max_ocr_pages]
@@ -1343,12 +1743,6 @@ class _FileContentExtractor:
                 debug_logger.debug(
                     f"PDF OCR対象ページを{max_ocr_pages}ページに制限: {os.path.basename(file_path)}")
 
-            # 200dpi相当（72dpi * 約2.78）でレンダリング（OCR精度と速度のバランス）
-            zoom = 2.0
-            matrix = fitz.Matrix(zoom, zoom)
-
-            ocr_config = '--oem 1 --psm 6'
-
             # 🚀 OCRは常に jpn+eng の1パスで実行する。
             #   対象文書はほぼ日本語（一部英数字混在）。Tesseract は jpn+eng の
             #   1回で日英両方の文字を認識できるため、ファイル名から言語を推測して
@@ -1359,10 +1753,46 @@ class _FileContentExtractor:
             if getattr(self, '_ocr_lang', None) is None:
                 self._ocr_lang = 'jpn+eng'
 
+            # 💾 OCR永続キャッシュ: キャッシュ済みページは結果を流用し、残りだけOCRする。
+            #   キーには実際に使った言語を含める（eng 退避中の結果を jpn 導入後に使わない）。
+            ocr_cache = None
+            pdf_stat = None
+            try:
+                ocr_cache = self._get_ocr_cache()
+                pdf_stat = os.stat(file_path)
+            except OSError:
+                ocr_cache = None
+
+            def _page_key(lang: str, page_num: int) -> str:
+                return (_OcrDiskCache.make_key(file_path, pdf_stat, f"{lang}|{OCR_PDF_CONFIG_SIG}")
+                        + f"#p{page_num}")
+
+            if ocr_cache is not None:
+                uncached_pages = []
+                for page_num in target_pages:
+                    cached_text = ocr_cache.get(_page_key(self._ocr_lang, page_num))
+                    if cached_text is None:
+                        uncached_pages.append(page_num)
+                    elif len(cached_text) >= 2:
+                        results[page_num] = cached_text
+                if len(uncached_pages) < len(target_pages):
+                    debug_logger.debug(
+                        f"💾 PDF OCRキャッシュヒット {len(target_pages) - len(uncached_pages)}p: "
+                        f"{os.path.basename(file_path)}")
+                target_pages = uncached_pages
+                if not target_pages:
+                    return results
+
+            # 200dpi相当（72dpi * 約2.78）でレンダリング（OCR精度と速度のバランス）
+            zoom = 2.0
+            matrix = fitz.Matrix(zoom, zoom)
+
+            ocr_config = '--oem 1 --psm 6'
+
             def ocr_single_page(page_num: int) -> tuple:
                 """単一ページをレンダリングしてOCR（並列処理用・1パス）
 
-                戻り値: (テキスト, 所要秒) ※実時間はワーカー内で計測する。
+                戻り値: (テキスト, 所要秒, 使用言語) ※実時間はワーカー内で計測する。
                 as_completed 側で計測すると既に完了済みのため 0 になってしまう。
                 """
                 _ps = time.time()
@@ -1379,16 +1809,17 @@ class _FileContentExtractor:
                 if image.mode not in ('L', '1'):
                     image = image.convert('L')
 
+                lang = self._ocr_lang
                 try:
                     text = pytesseract.image_to_string(
-                        image, lang=self._ocr_lang, config=ocr_config).strip()
+                        image, lang=lang, config=ocr_config).strip()
                 except pytesseract.TesseractError:
                     # jpn 言語データが無い等の場合は eng のみへ恒久的に退避
-                    self._ocr_lang = 'eng'
+                    self._ocr_lang = lang = 'eng'
                     text = pytesseract.image_to_string(
-                        image, lang='eng', config=ocr_config).strip()
+                        image, lang=lang, config=ocr_config).strip()
 
-                return ' '.join(text.split()), time.time() - _ps
+                return ' '.join(text.split()), time.time() - _ps, lang
 
             # 🚀 並列OCR（バルク時は1=オーバーサブスクリプション解消、ライブ時は4）
             #   ＋ページ単位タイムアウトでハング防止
@@ -1400,10 +1831,13 @@ class _FileContentExtractor:
                 for future in as_completed(futures):
                     page_num = futures[future]
                     try:
-                        text, _page_secs = future.result(timeout=30.0)  # 1ページ最大30秒
+                        text, _page_secs, used_lang = future.result(timeout=30.0)  # 1ページ最大30秒
                         _ocr_page_times.append(_page_secs)
                         if len(text) >= 2:
                             results[page_num] = text
+                        # 空ページも保存し、次回の無駄なOCRを防ぐ（タイムアウト/エラーは保存しない）
+                        if ocr_cache is not None:
+                            ocr_cache.put(_page_key(used_lang, page_num), text)
                     except TimeoutError:
                         _timeout_count += 1
                         debug_logger.warning(
@@ -1433,34 +1867,182 @@ class _FileContentExtractor:
 
         return results
 
+    def _prepare_ocr_frame(self, frame_image, file_size: int, file_path: str):
+        """単一フレーム（1ページ）をOCR用に前処理する。小さすぎる場合は None。
+
+        単発OCR(_extract_image_content)とまとめOCR(_extract_image_content_batch)で共有する。
+        OpenCV が使える場合は NumPy 配列上でグレースケール化→縮小→二値化を一続きに行い、
+        PIL との往復（全画素コピー）を最後の1回だけにする。
+        """
+        # 元が白黒2値(mode "1")かどうかを記録（既に二値化済みなので
+        # 後段の適応的二値化を省ける）。FAX/スキャン文書の多くはこの形式。
+        was_bilevel = frame_image.mode == '1'
+
+        width, height = frame_image.size
+        total_pixels = width * height
+
+        # 動的解像度調整: 文書スキャン(例: A4 300dpi ≒ 8.7MP)は高解像度を
+        # 保たないと日本語OCRが破綻するため、上限を大きく取る。極端に巨大な
+        # 画像のみ縮小して速度を確保する。
+        if file_size < 2 * 1024 * 1024:
+            max_pixels = 4000000  # 精度優先
+        elif file_size < 5 * 1024 * 1024:
+            max_pixels = 3000000  # バランス
+        else:
+            max_pixels = 2000000  # 速度優先
+
+        new_size = None
+        if total_pixels > max_pixels:
+            scale_factor = (max_pixels / total_pixels) ** 0.5
+            new_size = (max(1, int(width * scale_factor)), max(1, int(height * scale_factor)))
+            total_pixels = new_size[0] * new_size[1]
+            debug_logger.debug(f"動的リサイズ ({os.path.basename(file_path)}): {width}x{height} -> {new_size[0]}x{new_size[1]}")
+
+        if total_pixels < 10000:  # 100x100未満はスキップ
+            return None
+
+        if CV2_AVAILABLE and np is not None:
+            try:
+                # グレースケール(uint8)へ1回で変換する。
+                #   mode "1" は np.asarray でブール配列になり cv2 が扱えないため 0/255 へ、
+                #   RGB/RGBA は輝度の内積1回で、その他（パレット等）は PIL で L へ変換する。
+                mode = frame_image.mode
+                if mode == '1':
+                    gray = np.asarray(frame_image, dtype=np.uint8) * np.uint8(255)
+                elif mode == 'L':
+                    gray = np.asarray(frame_image, dtype=np.uint8)
+                elif mode in ('RGB', 'RGBA'):
+                    rgb = np.asarray(frame_image)[..., :3]
+                    gray = (rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)).astype(np.uint8)
+                else:
+                    gray = np.asarray(frame_image.convert('L'), dtype=np.uint8)
+
+                # 縮小は INTER_AREA（縮小時の画質が良く、日本語の細い線を潰しにくい）
+                if new_size is not None:
+                    gray = cv2.resize(gray, new_size, interpolation=cv2.INTER_AREA)
+
+                # 適応的二値化でOCR精度を上げる。元が白黒2値(was_bilevel)の画像は
+                # 既にクリーンな二値画像なので、再二値化するとかえってノイズを増やす。
+                if not was_bilevel:
+                    gray = cv2.adaptiveThreshold(
+                        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                        cv2.THRESH_BINARY, 11, 2)
+                return Image.fromarray(np.ascontiguousarray(gray), 'L')
+            except Exception as e:
+                debug_logger.debug(f"NumPy前処理失敗（PIL処理へ切替） {os.path.basename(file_path)}: {e}")
+
+        # OpenCV が無い環境: PIL で処理する。
+        #   OCR前に必ずグレースケール(L)へ統一する。mode "1" のままだと
+        #   Image.resize の BILINEAR が効かず最近傍縮小になり、文書スキャンを
+        #   縮小すると日本語の細い線が潰れてOCR不能になるため。
+        if frame_image.mode != 'L':
+            frame_image = frame_image.convert('L')
+        if new_size is not None:
+            # thumbnail はその場で縮小し（新しい Image を作らない）、大きな縮小率では
+            #   先に整数倍の reduce() を掛けてから仕上げるため resize より速い。
+            #   仕上げは従来の resize と同じ BILINEAR（LANCZOS より軽く、reduce 後の
+            #   小さな縮小率では OCR 結果に差が出ない）。
+            #   new_size は縦横比を保った画素数上限なので、そのまま枠として渡せる。
+            frame_image.thumbnail(new_size, Image.Resampling.BILINEAR)
+        return frame_image
+
+    @staticmethod
+    def _ocr_data_lines(data: dict, indices) -> str:
+        """image_to_data の結果から指定単語群を行単位で連結したテキストを作る。
+
+        Tesseract の jpn は1文字ずつを単語として返すため、単純に空白で連結すると
+        「日 本 語」のように文字間へ空白が入る。image_to_string と同様に、
+        英数字同士の境界にだけ空白を入れ、日本語の文字はそのまま詰めて連結する。
+        """
+        lines = {}
+        for j in indices:
+            word = data['text'][j]
+            if not word or not word.strip():
+                continue
+            line_key = (data['block_num'][j], data['par_num'][j], data['line_num'][j])
+            lines.setdefault(line_key, []).append(word.strip())
+        joined_lines = []
+        for words in lines.values():
+            parts = [words[0]]
+            for prev, word in zip(words, words[1:]):
+                if prev[-1].isascii() and word[0].isascii():
+                    parts.append(' ')
+                parts.append(word)
+            joined_lines.append(''.join(parts))
+        return '\n'.join(joined_lines)
+
+    def _ocr_with_confidence(self, image, lang: str, config: str):
+        """Tesseract を1回呼び、(テキスト, 平均信頼度) を返す（image_to_data 使用）。
+
+        信頼度は認識できた単語(conf>0)の平均。単語が無ければ 0.0（テキストも空）。
+        TesseractError は呼び出し側へ送出する（言語退避の判断に使うため）。
+        """
+        data = pytesseract.image_to_data(
+            image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        confs = [float(c) for c in data['conf'] if float(c) > 0]
+        mean_conf = sum(confs) / len(confs) if confs else 0.0
+        text = self._ocr_data_lines(data, range(len(data['text']))).strip()
+        return text, mean_conf
+
+    @staticmethod
+    def _finalize_ocr_text(text: str) -> str:
+        """OCR生テキストの最終整形（無意味な結果は空文字にする）"""
+        text = text.strip()
+        if len(text) < 2 or len(set(text.replace(' ', '').replace('\n', ''))) < 3:
+            return ""
+        return normalize_extracted_text(text, max_length=50000)
+
+    @staticmethod
+    def _psm_for_aspect(width: int, height: int) -> int:
+        """画像の縦横比から Tesseract のページ分割モード(PSM)を選ぶ。
+
+        極端に横長/縦長（帯状の図面枠・ラベル等）は PSM 11（疎なテキスト）、
+        やや横長は PSM 4（可変サイズの1段組）、それ以外は従来どおり PSM 6（均一ブロック）。
+        """
+        if not width or not height:
+            return 6
+        ar = width / height
+        if ar > 2.5 or ar < 0.4:
+            return 11
+        if 1.2 < ar <= 2.5:
+            return 4
+        return 6
+
+    @staticmethod
+    def _image_ocr_cache_key(file_path: str, st: os.stat_result, lang: str) -> str:
+        """画像OCRのキャッシュキー（言語・OCR設定込み。単発/まとめOCRで共通）"""
+        return _OcrDiskCache.make_key(file_path, st, f"{lang}|{OCR_IMAGE_CONFIG_SIG}")
+
     def _extract_image_content(self, file_path: str) -> str:
         """.tif/.tiffファイルからOCRでテキスト抽出（jpn+eng 1パス版）"""
+        ocr_cache = None
+        cache_key = None
         try:
-            # キャッシュチェック（最優先）
-            if hasattr(self, '_ocr_cache'):
-                cache_key = f"{file_path}_{os.path.getmtime(file_path)}"
-                if cache_key in self._ocr_cache:
-                    cached_result = self._ocr_cache[cache_key]
-                    print(f"⚡ OCRキャッシュヒット: {os.path.basename(file_path)} ({len(cached_result)}文字)")
-                    return cached_result
-            else:
-                self._ocr_cache = {}
+            if getattr(self, '_ocr_lang', None) is None:
+                self._ocr_lang = 'jpn+eng'
+
+            # キャッシュチェック（最優先）: stat 1回で mtime/size を取得しキーにする
+            st = os.stat(file_path)
+            ocr_cache = self._get_ocr_cache()
+            cache_key = self._image_ocr_cache_key(file_path, st, self._ocr_lang)
+            cached_result = ocr_cache.get(cache_key)
+            if cached_result is not None:
+                debug_logger.info(f"⚡ OCRキャッシュヒット: {os.path.basename(file_path)} ({len(cached_result)}文字)")
+                return cached_result
 
             # OCRライブラリが利用可能かチェック
             if not PIL_AVAILABLE or not TESSERACT_AVAILABLE:
                 return ""
 
-            # Tesseractエンジンの利用可能性を確認
-            try:
-                pytesseract.get_tesseract_version()
-            except pytesseract.TesseractNotFoundError:
+            # Tesseractエンジンの利用可能性を確認（メモ化済み: ファイル毎の起動を避ける）
+            if not _tesseract_engine_available(pytesseract.pytesseract.tesseract_cmd):
                 return ""
 
-            file_size = os.path.getsize(file_path)
+            file_size = st.st_size
             if file_size < 1024:  # 1KB未満は処理しない
                 return ""
             if file_size > 30 * 1024 * 1024:  # 30MB以上は処理しない
-                print(f"⚠️ .tif画像ファイルが大きすぎます ({file_path}): {file_size/1024/1024:.1f}MB")
+                debug_logger.warning(f"⚠️ .tif画像ファイルが大きすぎます ({file_path}): {file_size/1024/1024:.1f}MB")
                 return ""
 
             # OCR言語: jpn+eng の1パスで日英両方を認識する（PDF OCRと同方式）。
@@ -1471,85 +2053,53 @@ class _FileContentExtractor:
             # ファイル名からの言語推測による段階的OCRは廃止: 英語OCR結果が
             # 3文字以上になると日本語OCRが実行されず、日本語文書のテキストが
             # 一切取れないバグの原因だった。
-            if getattr(self, '_ocr_lang', None) is None:
-                self._ocr_lang = 'jpn+eng'
-
-            ocr_config = '--oem 1 --psm 6'
 
             def _ocr_one_frame(frame_image) -> str:
                 """単一フレーム（1ページ）をOCRしてテキストを返す（マルチページTIFF対応）"""
-                # 元が白黒2値(mode "1")かどうかを記録（既に二値化済みなので
-                # 後段の適応的二値化を省ける）。FAX/スキャン文書の多くはこの形式。
-                was_bilevel = frame_image.mode == '1'
-
-                # OCR前に必ずグレースケール(L)へ統一する。
-                #   mode "1" のままだと
-                #     1) Image.resize の BILINEAR が効かず最近傍縮小になり、
-                #        2866x2026 のような文書スキャンを縮小すると日本語の
-                #        細い線が潰れてOCR不能になる
-                #     2) np.array(mode="1") がブール配列になり cv2.adaptiveThreshold
-                #        が uint8 を要求して失敗する
-                #   ため、L へ変換してから処理する。
-                if frame_image.mode != 'L':
-                    frame_image = frame_image.convert('L')
-
-                width, height = frame_image.size
-                total_pixels = width * height
-
-                # 動的解像度調整: 文書スキャン(例: A4 300dpi ≒ 8.7MP)は高解像度を
-                # 保たないと日本語OCRが破綻するため、上限を大きく取る。極端に巨大な
-                # 画像のみ縮小して速度を確保する。
-                if file_size < 2 * 1024 * 1024:
-                    max_pixels = 4000000  # 精度優先
-                elif file_size < 5 * 1024 * 1024:
-                    max_pixels = 3000000  # バランス
-                else:
-                    max_pixels = 2000000  # 速度優先
-
-                if total_pixels > max_pixels:
-                    scale_factor = (max_pixels / total_pixels) ** 0.5
-                    new_width = max(1, int(width * scale_factor))
-                    new_height = max(1, int(height * scale_factor))
-                    frame_image = frame_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    total_pixels = new_width * new_height
-                    debug_logger.debug(f"動的リサイズ ({os.path.basename(file_path)}): {width}x{height} -> {new_width}x{new_height}")
-
-                if total_pixels < 10000:  # 100x100未満はスキップ
+                frame_image = self._prepare_ocr_frame(frame_image, file_size, file_path)
+                if frame_image is None:
                     return ""
 
-                # cv2が利用可能なら適応的二値化でOCR精度を上げる。
-                # 元が白黒2値(was_bilevel)の画像は既にクリーンな二値画像なので、
-                # ここで再二値化するとかえってノイズを増やすため適用しない。
-                if CV2_AVAILABLE and not was_bilevel:
-                    try:
-                        import numpy as np
-                        arr = np.array(frame_image)
-                        if arr.dtype == np.uint8 and arr.ndim == 2:  # グレースケール(uint8)確認
-                            arr = cv2.adaptiveThreshold(
-                                arr, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                cv2.THRESH_BINARY, 11, 2)
-                            frame_image = Image.fromarray(arr)
-                    except Exception:
-                        pass
+                # 🚀 縦横比に応じてページ分割モードを選ぶ（極端に細長い画像は疎なテキスト扱い）
+                psm = self._psm_for_aspect(*frame_image.size)
+                ocr_config = f'--oem 1 --psm {psm}'
 
                 try:
-                    text = pytesseract.image_to_string(
-                        frame_image, lang=self._ocr_lang, config=ocr_config).strip()
+                    text, mean_conf = self._ocr_with_confidence(
+                        frame_image, self._ocr_lang, ocr_config)
                 except pytesseract.TesseractError:
                     # jpn言語データが無い等の場合は eng のみへ恒久的に退避
                     # （PDF OCRと共有する _ocr_lang を更新）。
                     self._ocr_lang = 'eng'
                     try:
-                        text = pytesseract.image_to_string(
-                            frame_image, lang='eng', config=ocr_config).strip()
+                        text, mean_conf = self._ocr_with_confidence(
+                            frame_image, 'eng', ocr_config)
                     except pytesseract.TesseractError as te:
-                        print(f"⚠️ OCR実行失敗 ({os.path.basename(file_path)}): {te}")
-                        return ""
+                        # 両言語とも失敗: 空結果として保存しないよう呼び出し側へ伝える
+                        debug_logger.warning(f"⚠️ OCR実行失敗 ({os.path.basename(file_path)}): {te}")
+                        raise
+
+                # 1回目で単語が1つも無い（白紙・図面のみ等）画像は再認識しない。
+                #   言語やページ分割モードを変えても文字は出ず、Tesseract 起動が増えるだけ。
+                if not text:
+                    return ""
+
+                # 信頼度が低い場合のみ jpn 単独で再認識（jpn+eng では日本語の
+                #   縦書き・小さな文字で英字に誤認されることがある）。大半の画像は
+                #   1回目で十分な信頼度が出るため、Tesseract 起動は通常1回で済む。
+                if (mean_conf < OCR_LOW_CONFIDENCE and file_size < 5 * 1024 * 1024
+                        and self._ocr_lang != 'eng'):
+                    try:
+                        retry_text, retry_conf = self._ocr_with_confidence(
+                            frame_image, 'jpn', ocr_config)
+                        if retry_text and retry_conf > mean_conf:
+                            text = retry_text
+                    except pytesseract.TesseractError:
+                        pass
 
                 return text
 
             # マルチページTIFF対応: 全フレームをOCRして連結
-            from PIL import ImageSequence
             try:
                 page_texts: list[str] = []
                 for frame in ImageSequence.Iterator(Image.open(file_path)):
@@ -1558,65 +2108,169 @@ class _FileContentExtractor:
                         page_texts.append(frame_text)
                 text = '\n'.join(page_texts)
             except Exception as e:
-                print(f"⚠️ 画像読み込みエラー ({file_path}): {e}")
+                debug_logger.warning(f"⚠️ 画像読み込み/OCRエラー ({file_path}): {e}")
+                # 失敗はこのセッション内だけ記憶する（永続化すると再起動後も空のままになる）
+                ocr_cache.mark_failed(cache_key)
                 return ""
 
-            text = text.strip()
-
-            # 無意味な結果をフィルタリング
-            if len(text) < 2 or len(set(text.replace(' ', '').replace('\n', ''))) < 3:
-                result = ""
-            else:
-                result = normalize_extracted_text(text, max_length=50000)
-
-            # キャッシュに保存
-            cache_key = f"{file_path}_{os.path.getmtime(file_path)}"
-            self._ocr_cache[cache_key] = result
+            result = self._finalize_ocr_text(text)
 
-            # キャッシュサイズ制限
-            if len(self._ocr_cache) > 1000:
-                oldest_keys = list(self._ocr_cache.keys())[:100]
-                for key in oldest_keys:
-                    del self._ocr_cache[key]
+            # 成功した結果のみ保存する。eng 退避が起きた場合は実際に使った言語のキーで保存。
+            # （上限超過時の削除はキャッシュ側が担当）
+            ocr_cache.put(self._image_ocr_cache_key(file_path, st, self._ocr_lang), result)
 
             if result and len(result) > 10:
-                print(f"✅ OCR成功 ({os.path.basename(file_path)}): {len(result)}文字")
+                debug_logger.info(f"✅ OCR成功 ({os.path.basename(file_path)}): {len(result)}文字")
 
             return result
 
         except Exception as e:
-            print(f"⚠️ OCR処理エラー {os.path.basename(file_path)}: {e}")
-            if hasattr(self, '_ocr_cache'):
-                cache_key = f"{file_path}_{os.path.getmtime(file_path)}"
-                self._ocr_cache[cache_key] = ""
+            debug_logger.warning(f"⚠️ OCR処理エラー {os.path.basename(file_path)}: {e}")
+            if ocr_cache is not None and cache_key is not None:
+                ocr_cache.mark_failed(cache_key)
             return ""
 
+    def _extract_image_content_batch(self, file_paths: list) -> list:
+        """複数の小さな単ページTIFFを1枚の縦長シートに貼り合わせ、Tesseract 1回でOCRする。
+
+        Tesseract はファイル毎にプロセス起動＋言語モデル読込（数十〜100ms）が掛かり、
+        小さな画像ではこれが支配的になる。前処理済み画像を縦に連結して
+        image_to_data を1回だけ呼び、各単語の top 座標で元ファイルへ振り分ける。
+        マルチページ・大きな画像・キャッシュ済みのものは従来の単発経路で処理する。
+        単発経路と結果を揃えるため、まとめるのは縦横比で PSM 6 が選ばれる画像のみとし、
+        信頼度が低かった画像は単発経路（jpn 単独の再認識を含む）でやり直す。
+
+        Returns:
+            file_paths と同順の抽出テキスト一覧
+        """
+        results = [None] * len(file_paths)
+        if not PIL_AVAILABLE or not TESSERACT_AVAILABLE:
+            return ["" for _ in file_paths]
+        if not _tesseract_engine_available(pytesseract.pytesseract.tesseract_cmd):
+            return ["" for _ in file_paths]
+
+        if getattr(self, '_ocr_lang', None) is None:
+            self._ocr_lang = 'jpn+eng'
+        ocr_cache = self._get_ocr_cache()
+        sheet_items = []  # (index, (パス, stat), 前処理済み画像)
+        for i, file_path in enumerate(file_paths):
+            try:
+                st = os.stat(file_path)
+                cache_key = self._image_ocr_cache_key(file_path, st, self._ocr_lang)
+                cached_result = ocr_cache.get(cache_key)
+                if cached_result is not None:
+                    results[i] = cached_result
+                    continue
+                if not (1024 <= st.st_size <= OCR_STITCH_MAX_FILE_BYTES):
+                    continue  # 範囲外は単発経路（サイズ判定・ログも含め従来通り）
+                with Image.open(file_path) as img:
+                    if getattr(img, 'n_frames', 1) != 1:
+                        continue  # マルチページは単発経路
+                    prepared = self._prepare_ocr_frame(img.copy(), st.st_size, file_path)
+                if prepared is None:
+                    results[i] = ""
+                    ocr_cache.put(cache_key, "")
+                    continue
+                if prepared.size[0] * prepared.size[1] > OCR_STITCH_MAX_PIXELS:
+                    continue
+                if self._psm_for_aspect(*prepared.size) != 6:
+                    continue  # 帯状・横長の画像は単発経路で専用の PSM を使う
+                sheet_items.append((i, (file_path, st), prepared))
+            except Exception as e:
+                debug_logger.debug(f"まとめOCR前処理スキップ {file_path}: {e}")
+
+        if len(sheet_items) >= 2:
+            try:
+                gap = OCR_STITCH_GAP_PX
+                sheet_w = max(img.size[0] for _, _, img in sheet_items)
+                sheet_h = sum(img.size[1] for _, _, img in sheet_items) + gap * (len(sheet_items) - 1)
+                sheet = Image.new('L', (sheet_w, sheet_h), 255)
+                offsets = []
+                y = 0
+                for _, _, img in sheet_items:
+                    sheet.paste(img, (0, y))
+                    offsets.append((y, y + img.size[1]))
+                    y += img.size[1] + gap
+
+                try:
+                    data = pytesseract.image_to_data(
+                        sheet, lang=self._ocr_lang, config='--oem 1 --psm 6',
+                        output_type=pytesseract.Output.DICT)
+                except pytesseract.TesseractError:
+                    self._ocr_lang = 'eng'
+                    data = pytesseract.image_to_data(
+                        sheet, lang='eng', config='--oem 1 --psm 6',
+                        output_type=pytesseract.Output.DICT)
+
+                # 単語を元画像ごとに振り分ける。単語の中心座標で所属画像を判定する。
+                starts = [top for top, _ in offsets]
+                words_per_item = [[] for _ in sheet_items]
+                for j, word in enumerate(data['text']):
+                    if not word or not word.strip():
+                        continue
+                    center = data['top'][j] + data['height'][j] // 2
+                    k = bisect.bisect_right(starts, center) - 1
+                    if k < 0 or center >= offsets[k][1]:
+                        continue  # 余白部分
+                    words_per_item[k].append(j)
+
+                for (i, (file_path, st), _), indices in zip(sheet_items, words_per_item):
+                    confs = [float(data['conf'][j]) for j in indices if float(data['conf'][j]) > 0]
+                    if (confs and sum(confs) / len(confs) < OCR_LOW_CONFIDENCE
+                            and self._ocr_lang != 'eng'):
+                        continue  # 低信頼度: 単発経路で jpn 単独の再認識まで行う
+                    result = self._finalize_ocr_text(self._ocr_data_lines(data, indices))
+                    ocr_cache.put(self._image_ocr_cache_key(file_path, st, self._ocr_lang), result)
+                    results[i] = result
+                debug_logger.info(f"✅ まとめOCR: {len(sheet_items)}ファイルを1回のTesseract呼び出しで処理")
+            except Exception as e:
+                debug_logger.warning(f"まとめOCR失敗（単発OCRへ切替）: {e}")
+
+        # 未処理分（まとめ対象外・まとめ失敗）は単発経路
+        for i, file_path in enumerate(file_paths):
+            if results[i] is None:
+                results[i] = self._extract_image_content(file_path)
+        return results
 
 
 # --- ProcessPool 抽出ワーカー（GIL 回避） ---
 _proc_extractor: Optional['_FileContentExtractor'] = None
 
 
-def _init_extraction_worker() -> None:
-    """各ワーカープロセスで一度だけ呼ばれる初期化関数"""
-    global _proc_extractor
-    import multiprocessing
-    multiprocessing.current_process().name  # 確認用
+def _init_extraction_worker(log_queue=None) -> None:
+    """各ワーカープロセスで一度だけ呼ばれる初期化関数
+
+    Args:
+        log_queue: 親プロセスのログリスナーが読み出す multiprocessing キュー。
+            渡された場合、ワーカーのログはキューへ積むだけにして、ファイル書き込みは
+            親プロセスのリスナースレッドに任せる（ワーカーは I/O で止まらない）。
+    """
+    global _proc_extractor, debug_logger
     _proc_extractor = _FileContentExtractor()
 
     # 🔬 診断ログ出力先の設定（重要）
     #   抽出は spawn された子プロセスで走るため、親プロセスでの
     #   debug_logger 注入（extraction.debug_logger = ...）は子に伝わらない。
-    #   子プロセスの debug_logger は NullHandler のままで、ここで追加した
-    #   [PDF診断]/[OCR診断]/[抽出診断] ログがすべて捨てられてしまう。
-    #   そこでワーカー起動時に専用ファイルへ追記する FileHandler を取り付け、
+    #   注入されないままだと [PDF診断]/[OCR診断]/[抽出診断] ログがすべて捨てられる。
+    # 既定は WARNING（診断ログの I/O を抑制）。FILESEARCH_DEBUG=1 のときだけ INFO 診断を出す。
+    diag_level = logging.INFO if os.environ.get('FILESEARCH_DEBUG') else logging.WARNING
+    if log_queue is not None:
+        # アプリ本体の re-import で注入されたロガーではなく、キュー専用のロガーに差し替える
+        worker_logger = logging.getLogger("file_search_extraction.worker")
+        worker_logger.handlers.clear()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('pid%(process)d - %(message)s'))
+        worker_logger.addHandler(queue_handler)
+        worker_logger.setLevel(diag_level)
+        worker_logger.propagate = False
+        debug_logger = worker_logger
+        return
+
+    # キューが無い場合（単体利用等）は専用ファイルへ追記する FileHandler を取り付け、
     #   全ワーカーの診断ログを一箇所に集約する（pid 付きで識別可能）。
     #   全プロセスが同一ファイルへ追記するが、診断用途では多少の行交錯は許容。
     if not any(isinstance(h, logging.FileHandler) for h in debug_logger.handlers):
         try:
-            # 既定は WARNING（診断ログの追記 I/O を抑制）。FILESEARCH_DEBUG=1 の
-            # ときだけ INFO 診断を extraction_diag.log へ出力する。
-            diag_level = logging.INFO if os.environ.get('FILESEARCH_DEBUG') else logging.WARNING
             fh = logging.FileHandler('extraction_diag.log', mode='a', encoding='utf-8')
             fh.setLevel(diag_level)
             fh.setFormatter(logging.Formatter(
@@ -1657,9 +2311,8 @@ def _worker_extract(file_path: str, file_size: int, modified_time: float,
     _proc_extractor.defer_ocr = bool(defer_ocr)
     _proc_extractor.bulk_mode = bool(bulk_mode)
     _t0 = time.time()
-    import os as _os
-    _ext = Path(file_path).suffix.lower()
-    _pid = _os.getpid()
+    _ext = os.path.splitext(file_path)[1].lower()
+    _pid = os.getpid()
     # PDFのテキスト/OCR内訳はスレッドローカルに残る（PDF以外なら0のまま）
     _proc_extractor._tls.pdf_text_secs = 0.0
     _proc_extractor._tls.pdf_ocr_secs = 0.0
@@ -1671,7 +2324,7 @@ def _worker_extract(file_path: str, file_size: int, modified_time: float,
         _pdf_ocr = getattr(_proc_extractor._tls, 'pdf_ocr_secs', 0.0)
         pdf_needs_ocr = bool(getattr(_proc_extractor._tls, 'pdf_needs_ocr', False))
         if _elapsed > 5.0:
-            print(
+            debug_logger.info(
                 f"[抽出診断] pid={_pid} ext={_ext} {_elapsed:.2f}s "
                 f"(text={_pdf_text:.2f}s ocr={_pdf_ocr:.2f}s) "
                 f"size={file_size//1024}KB chars={len(content) if content else 0} "
@@ -1681,5 +2334,37 @@ def _worker_extract(file_path: str, file_size: int, modified_time: float,
                 _pdf_text, _pdf_ocr, pdf_needs_ocr)
     except Exception as _e:
         _elapsed = time.time() - _t0
-        print(f"[抽出診断] pid={_pid} ext={_ext} ERROR {_elapsed:.2f}s {file_path}: {_e}")
+        debug_logger.warning(f"[抽出診断] pid={_pid} ext={_ext} ERROR {_elapsed:.2f}s {file_path}: {_e}")
         return (file_path, None, file_size, modified_time, _elapsed, 0.0, 0.0, False)
+
+
+def _worker_extract_image_batch(file_paths: list) -> list:
+    """ワーカープロセスで複数のTIFFをまとめてOCRする（_extract_image_content_batch）。
+
+    戻り値: [(file_path, content, file_size, modified_time), ...]（入力と同順）
+    stat できないファイルは content=None。
+    """
+    global _proc_extractor
+    if _proc_extractor is None:
+        _proc_extractor = _FileContentExtractor()
+    _proc_extractor.defer_ocr = False
+    _proc_extractor.bulk_mode = True
+    try:
+        contents = _proc_extractor._extract_image_content_batch(file_paths)
+    except Exception as _e:
+        # まとめOCRが失敗してもチャンク全体を失わないよう、1ファイルずつ単発OCRでやり直す
+        debug_logger.warning(f"[抽出診断] pid={os.getpid()} まとめOCR ERROR（単発OCRへ切替）: {_e}")
+        contents = []
+        for file_path in file_paths:
+            try:
+                contents.append(_proc_extractor._extract_image_content(file_path))
+            except Exception:
+                contents.append(None)
+    results = []
+    for file_path, content in zip(file_paths, contents):
+        try:
+            st = os.stat(file_path)
+            results.append((file_path, content, st.st_size, st.st_mtime))
+        except OSError:
+            results.append((file_path, None, 0, 0.0))
+    return results
@@ -12,14 +12,23 @@ import time
 import sys
 import os
 import threading
+import traceback
 import concurrent.futures
+import functools
+import heapq
+import operator
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import subprocess
 import sqlite3
 
 import hashlib
 import json
+import shutil
 import logging
+import logging.handlers
+import atexit
+import multiprocessing
 import pickle
 import platform
 from pathlib import Path
@@ -50,6 +59,11 @@ try:
 except ImportError:
     fitz = None
 
+try:
+    import ahocorasick  # pyahocorasick: 検索結果絞り込みの多パターン照合（任意）
+except ImportError:
+    ahocorasick = None
+
 class ProgressTracker:
     """リアルタイム進捗トラッキング"""
     def __init__(self):
@@ -217,6 +231,94 @@ def is_temp_or_lock_file(file_name: str) -> bool:
     return name.startswith('~$') or name.startswith('~WRL') or name.endswith('.tmp')
 
 
+def _count_target_files(root: str, names, ext_set):
+    """1ディレクトリ分のファイル名を集計する（フォルダー分析の内側ループ）。
+
+    Returns:
+        (対象ファイルのフルパス一覧, 処理ファイル数, 全ファイル合計サイズ, サイズ取得できた対象数)
+
+    数百万ファイル規模ではファイル毎の属性参照・関数呼び出しが支配的になるため、
+    参照をローカル変数に束縛し、拡張子判定は rpartition で行う（splitext より軽量）。
+    """
+    targets = []
+    append = targets.append
+    join = os.path.join
+    stat = os.stat
+    is_temp = is_temp_or_lock_file
+    processed = 0
+    total_size = 0
+    counted = 0
+    for name in names:
+        if is_temp(name):
+            continue  # Office等の一時/ロックファイル（~$～）は対象外
+        processed += 1
+        dot, _, ext = name.rpartition('.')
+        is_target = bool(dot) and ('.' + ext.lower()) in ext_set
+        full_path = join(root, name)
+        if is_target:
+            append(full_path)
+        try:
+            total_size += stat(full_path).st_size
+        except OSError:
+            continue
+        if is_target:
+            counted += 1
+    return targets, processed, total_size, counted
+
+
+UNC_WALK_WORKERS = 16  # UNC走査時に並行して scandir するディレクトリ数
+
+
+def walk_tree(top: str, unc_workers: int = UNC_WALK_WORKERS):
+    """os.walk 互換のディレクトリ走査（ドライブ種別で走査方式を切替）。
+
+    ローカルパスはPython処理がCPU律速のため、従来通り単一スレッドの os.walk を使う
+    （並列化してもGILを奪い合うだけで速くならない）。
+    UNCパス（\\\\server\\share）はSMBの往復遅延が律速のため、サブディレクトリ単位の
+    os.scandir をスレッドプールで並行実行し、往復遅延を重ね合わせて隠蔽する。
+
+    どちらも (root, dirs, files) を yield する。呼び出し側が dirs を変更（clear 等）
+    すると、そのディレクトリ配下は os.walk と同様に走査されない（子ディレクトリの
+    投入は yield から制御が戻った後に行うため）。走査順は幅優先かつ完了順で不定。
+    """
+    if not str(top).startswith('\\\\'):
+        yield from os.walk(top)
+        return
+
+    def _scan(dir_path):
+        dirs, files = [], []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        # シンボリックリンク/ジャンクションは辿らない（os.walk の既定と同じ。
+                        #   循環リンクによる無限走査や共有外への脱出を防ぐ）
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass  # アクセス不可のディレクトリは os.walk 同様に黙ってスキップ
+        return dir_path, dirs, files
+
+    executor = ThreadPoolExecutor(max_workers=max(1, unc_workers), thread_name_prefix='unc-walk')
+    try:
+        pending = {executor.submit(_scan, str(top))}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                root, dirs, files = future.result()
+                yield root, dirs, files
+                for name in dirs:
+                    pending.add(executor.submit(_scan, os.path.join(root, name)))
+    finally:
+        # 途中で break された場合も未着手の走査は破棄して即座に戻る
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 # normalize_extracted_text は extraction モジュールへ移設・再エクスポート
 
 
@@ -356,6 +458,8 @@ def try_reimport_library(lib_name):
             print(f"🔄 {lib_name} 動的読み込み成功 - システム監視機能が利用可能になりました")
         elif lib_name == 'PyMuPDF':
             import fitz
+            # 抽出モジュールは fitz をモジュール読み込み時に一度だけ import するため参照を差し替える
+            _extraction_mod.fitz = fitz
             print(f"🔄 {lib_name} 動的読み込み成功 - PDF処理機能が利用可能になりました")
         elif lib_name == 'openpyxl':
             import openpyxl
@@ -585,62 +689,61 @@ elif PIL_AVAILABLE and TESSERACT_AVAILABLE:
     ocr_setup_needed = True
 
 
+# スタンドアロン版でのTesseract検索
+@functools.lru_cache(maxsize=1)
+def _find_bundled_tesseract():
+    """同梱されたTesseractを検索（候補パスの存在確認は一度だけ行いメモ化）"""
+    # EXE化対応: 実行ファイルのディレクトリを基準にする
+    if getattr(sys, 'frozen', False):
+        base_path = Path(sys.executable).parent
+    else:
+        base_path = Path(__file__).parent
+    
+    possible_paths = [
+        # 同じディレクトリ内のtesseractフォルダ
+        base_path / "tesseract" / "tesseract.exe",
+        base_path.parent / "tesseract" / "tesseract.exe",
+        # ポータブル版用のパス
+        base_path / "bin" / "tesseract.exe",
+        base_path.parent / "bin" / "tesseract.exe",
+        # Windows標準インストールパス
+        Path(r"C:\Program Files\Tesseract-OCR\tesseract.exe"),
+        Path(r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe"),
+    ]
+    
+    for path in possible_paths:
+        if path.exists():
+            return str(path)
+    return None
+
+
 def check_ocr_availability():
     """OCR機能の利用可能性を確認（スタンドアロン対応）"""
     try:
         if not PIL_AVAILABLE or not TESSERACT_AVAILABLE:
             return False, "Pillow または pytesseract がインストールされていません"
         
-        # スタンドアロン版でのTesseract検索
-        def find_bundled_tesseract():
-            """同梱されたTesseractを検索"""
-            # EXE化対応: 実行ファイルのディレクトリを基準にする
-            if getattr(sys, 'frozen', False):
-                base_path = Path(sys.executable).parent
-            else:
-                base_path = Path(__file__).parent
-            
-            possible_paths = [
-                # 同じディレクトリ内のtesseractフォルダ
-                base_path / "tesseract" / "tesseract.exe",
-                base_path.parent / "tesseract" / "tesseract.exe",
-                # ポータブル版用のパス
-                base_path / "bin" / "tesseract.exe",
-                base_path.parent / "bin" / "tesseract.exe",
-                # Windows標準インストールパス
-                Path(r"C:\Program Files\Tesseract-OCR\tesseract.exe"),
-                Path(r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe"),
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    return str(path)
-            return None
-        
-        # Tesseractエンジンのパスを確認
-        try:
-            # まず標準の方法で確認
-            version = pytesseract.get_tesseract_version()
-            print(f"✅ Tesseract OCRエンジン利用可能: v{version}")
-            return True, f"Tesseract v{version}"
-        except pytesseract.TesseractNotFoundError:
-            # 同梱版を検索
-            bundled_path = find_bundled_tesseract()
-            if bundled_path:
-                # pytesseractにパスを設定
-                pytesseract.pytesseract.tesseract_cmd = bundled_path
-                try:
-                    version = pytesseract.get_tesseract_version()
-                    print(f"✅ 同梱Tesseract OCRエンジン利用可能: v{version}")
-                    print(f"   パス: {bundled_path}")
-                    return True, f"同梱Tesseract v{version}"
-                except Exception as e:
-                    return False, f"同梱Tesseractエラー: {e}"
-            else:
-                return False, "Tesseractエンジンが見つかりません。\n  スタンドアロン版: tesseractフォルダを同梱してください\n  通常版: https://github.com/UB-Mannheim/tesseract/wiki からダウンロード"
-        except Exception as e:
-            return False, f"Tesseractエンジンエラー: {e}"
-            
+        # Tesseractエンジンのパスを確認。
+        #   起動時に tesseract --version を実行すると UI 表示前にサブプロセス起動分
+        #   待たされるため、ここでは実行ファイルの所在だけを確認する。実際に起動できるかは
+        #   最初のOCR時に extraction 側で一度だけ確認する（結果はメモ化される）。
+        configured = pytesseract.pytesseract.tesseract_cmd
+        tesseract_path = shutil.which(configured)
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+            print(f"✅ Tesseract OCRエンジン利用可能: {tesseract_path}")
+            return True, f"Tesseract ({tesseract_path})"
+
+        # 同梱版を検索
+        bundled_path = _find_bundled_tesseract()
+        if bundled_path:
+            # pytesseractにパスを設定
+            pytesseract.pytesseract.tesseract_cmd = bundled_path
+            print("✅ 同梱Tesseract OCRエンジン利用可能")
+            print(f"   パス: {bundled_path}")
+            return True, f"同梱Tesseract ({bundled_path})"
+        return False, "Tesseractエンジンが見つかりません。\n  スタンドアロン版: tesseractフォルダを同梱してください\n  通常版: https://github.com/UB-Mannheim/tesseract/wiki からダウンロード"
+
     except Exception as e:
         return False, f"OCRチェックエラー: {e}"
 
@@ -654,6 +757,80 @@ else:
     print("   画像ファイル(.tif)の内容検索は利用できません")
 
 
+def _detect_storage_type() -> str:
+    """ストレージタイプの検出"""
+    try:
+        # Windowsの場合
+        if platform.system() == 'Windows':
+            try:
+                # PowerShellでストレージタイプを確認
+                result = subprocess.run([
+                    'powershell', '-Command',
+                    'Get-PhysicalDisk | Select-Object MediaType, Size | ConvertTo-Json'
+                ], capture_output=True, text=True, timeout=10)
+
+                if result.returncode == 0:
+                    disks = json.loads(result.stdout)
+                    if isinstance(disks, list) and disks:
+                        media_type = disks[0].get('MediaType', '').lower()
+                        if 'ssd' in media_type:
+                            return 'nvme' if 'nvme' in media_type else 'ssd'
+                        elif 'hdd' in media_type:
+                            return 'hdd'
+            except:
+                pass
+
+        # Linuxの場合
+        elif platform.system() == 'Linux':
+            try:
+                with open('/proc/mounts', 'r') as f:
+                    mounts = f.read()
+                    if 'nvme' in mounts:
+                        return 'nvme'
+                    elif 'ssd' in mounts:
+                        return 'ssd'
+            except:
+                pass
+
+        return 'hybrid'  # 不明な場合はハイブリッド扱い
+
+    except Exception:
+        return 'unknown'
+
+
+@functools.lru_cache(maxsize=1)
+def _get_comprehensive_hardware_info() -> Dict[str, Any]:
+    """包括的なハードウェア情報取得（PowerShell起動を含むため一度だけ計測しメモ化）"""
+    info = {
+        'cpu_cores': 4,
+        'logical_cores': 4,
+        'memory_gb': 8.0,
+        'storage_type': 'unknown'
+    }
+
+    try:
+        if psutil is not None:
+            # CPU情報
+            info['cpu_cores'] = psutil.cpu_count(logical=False) or 4
+            info['logical_cores'] = psutil.cpu_count(logical=True) or 4
+
+            # メモリ情報
+            memory = psutil.virtual_memory()
+            info['memory_gb'] = memory.total / (1024 ** 3)
+
+            # ストレージタイプの推定
+            info['storage_type'] = _detect_storage_type()
+        else:
+            # psutilがない場合の推定
+            info['cpu_cores'] = os.cpu_count() or 4
+            info['logical_cores'] = os.cpu_count() or 4
+
+    except Exception as e:
+        print(f"⚠️ ハードウェア情報取得エラー: {e}")
+
+    return info
+
+
 # CPUコア数を取得（最大パフォーマンス最適化版）
 def get_optimal_thread_count():
     """最適なスレッド数を取得（超高速版・psutil依存なし）"""
@@ -832,6 +1009,13 @@ def get_batch_size_for_images():
 
 
 # デバッグログ設定
+_log_listener = None  # ログ書き込み用のキューリスナー（setup_debug_logger が生成）
+_log_file_handler = None  # ログファイルのハンドラー（ワーカープロセスのログも書き込む）
+_worker_log_queue = None  # 抽出ワーカープロセスからのログを受け取る multiprocessing キュー
+_worker_log_listener = None
+_worker_log_lock = threading.Lock()
+
+
 def setup_debug_logger():
     """デバッグログ設定（重複防止版）"""
     logger = logging.getLogger('UltraFastApp')
@@ -846,15 +1030,26 @@ def setup_debug_logger():
     log_level = logging.DEBUG if os.environ.get('FILESEARCH_DEBUG') else logging.WARNING
     logger.setLevel(log_level)
 
-    # ファイルハンドラー（上書きモード）
-    file_handler = logging.FileHandler('file_search_app.log', mode='w', encoding='utf-8')
+    # ファイルハンドラー（上書きモード）。spawn されたワーカープロセスはこのモジュールを
+    #   re-import するため、そこでは追記にして親プロセスのログを消さない。
+    log_mode = 'w' if multiprocessing.parent_process() is None else 'a'
+    file_handler = logging.FileHandler('file_search_app.log', mode=log_mode, encoding='utf-8')
     file_handler.setLevel(log_level)
 
     # フォーマッター（シンプル版）
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
+    # 🚀 ログ出力はキュー経由で専用スレッドに任せる。抽出スレッドはキューへ積むだけで
+    #   戻り、ファイル書き込み（I/O＋ハンドラーのロック）はリスナースレッドが行う。
+    global _log_listener, _log_file_handler
+    _log_file_handler = file_handler
+    if _log_listener is not None:
+        _log_listener.stop()
+    _log_listener = logging.handlers.QueueListener(
+        queue.SimpleQueue(), file_handler, respect_handler_level=True)
+    logger.addHandler(logging.handlers.QueueHandler(_log_listener.queue))
+    _log_listener.start()
 
     # 親ロガーへの伝播を無効化（重複出力防止）
     logger.propagate = False
@@ -862,8 +1057,41 @@ def setup_debug_logger():
     return logger
 
 
+def _get_worker_log_queue():
+    """抽出ワーカープロセス用のログキューを返す（初回に親プロセス側のリスナーを起動）。
+
+    ワーカーは _init_extraction_worker でこのキューへ積むだけにし、ファイルへの
+    書き込みはメインプロセスのリスナースレッドが file_search_app.log へ行う。
+    """
+    global _worker_log_queue, _worker_log_listener
+    with _worker_log_lock:
+        if _worker_log_queue is None:
+            _worker_log_queue = multiprocessing.Queue()
+            _worker_log_listener = logging.handlers.QueueListener(
+                _worker_log_queue, _log_file_handler, respect_handler_level=True)
+            _worker_log_listener.start()
+        return _worker_log_queue
+
+
+def _stop_log_listener():
+    """終了時にキューに残ったログを書き出してリスナースレッドを止める"""
+    global _worker_log_listener
+    if _worker_log_listener is not None:
+        _worker_log_listener.stop()
+        _worker_log_listener = None
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
 # グローバルログ
 debug_logger = setup_debug_logger()
+atexit.register(_stop_log_listener)
+
+
+# 🚀 表記ゆれ変換テーブル（str.translate で C 実装の一括変換。1文字ずつの連結ループを避ける）
+_HIRAGANA_TO_KATAKANA = {c: c + 0x60 for c in range(ord('ぁ'), ord('ゖ') + 1)}
+_KATAKANA_TO_HIRAGANA = {c: c - 0x60 for c in range(ord('ァ'), ord('ヶ') + 1)}
+_ASCII_TO_FULLWIDTH = {c: c + 0xFEE0 for c in range(ord('!'), ord('~') + 1)}
 
 
 def normalize_search_text_ultra(text):
@@ -893,12 +1121,7 @@ def normalize_search_text_ultra(text):
         half_width = text
 
     # 全角版（半角英数を全角に変換）
-    full_width = ''
-    for char in text:
-        if '!' <= char <= '~':
-            full_width += chr(ord(char) + 0xFEE0)
-        else:
-            full_width += char
+    full_width = text.translate(_ASCII_TO_FULLWIDTH)
     if full_width != text:
         patterns.append(full_width)
 
@@ -922,24 +1145,12 @@ def normalize_search_text_ultra(text):
                 patterns.append(bigram)
 
     # ひらがな→カタカナ変換
-    hiragana_to_katakana = ''
-    for char in normalized:
-        if 'ぁ' <= char <= 'ゖ':  # ひらがな範囲
-            hiragana_to_katakana += chr(ord(char) + 0x60)
-        else:
-            hiragana_to_katakana += char
-
+    hiragana_to_katakana = normalized.translate(_HIRAGANA_TO_KATAKANA)
     if hiragana_to_katakana != normalized:
         patterns.append(hiragana_to_katakana)
 
     # カタカナ→ひらがな変換
-    katakana_to_hiragana = ''
-    for char in normalized:
-        if 'ァ' <= char <= 'ヶ':  # カタカナ範囲
-            katakana_to_hiragana += chr(ord(char) - 0x60)
-        else:
-            katakana_to_hiragana += char
-
+    katakana_to_hiragana = normalized.translate(_KATAKANA_TO_HIRAGANA)
     if katakana_to_hiragana != normalized:
         patterns.append(katakana_to_hiragana)
 
@@ -970,44 +1181,86 @@ def normalize_search_text_ultra(text):
 
     return half_width, full_width, hiragana_to_katakana, final_patterns
 
-    # ひらがな→カタカナ変換
-    hiragana_to_katakana = ''
-    for char in normalized:
-        if 'ぁ' <= char <= 'ゖ':  # ひらがな範囲
-            hiragana_to_katakana += chr(ord(char) + 0x60)
-        else:
-            hiragana_to_katakana += char
 
-    if hiragana_to_katakana != normalized:
-        patterns.append(hiragana_to_katakana)
+def _search_text_variants(text):
+    """照合用の表記ゆれバリエーション（原文・小文字・NFKC・ひら→カナ・カナ→ひら）を順に返す。
 
-    # カタカナ→ひらがな変換
-    katakana_to_hiragana = ''
-    for char in normalized:
-        if 'ァ' <= char <= 'ヶ':  # カタカナ範囲
-            katakana_to_hiragana += chr(ord(char) - 0x60)
-        else:
-            katakana_to_hiragana += char
+    ジェネレータなので、呼び出し側が途中で一致を見つければ残りの変換は行わない
+    （検索結果の大半は原文そのままで一致するため、変換文字列の生成を省ける）。
+    """
+    yield text
+    text_lower = text.lower()
+    yield text_lower
+    yield unicodedata.normalize('NFKC', text_lower)
+    # ひらがな→カタカナ / カタカナ→ひらがな変換
+    yield text_lower.translate(_HIRAGANA_TO_KATAKANA)
+    yield text_lower.translate(_KATAKANA_TO_HIRAGANA)
 
-    if katakana_to_hiragana != normalized:
-        patterns.append(katakana_to_hiragana)
 
-    # スペース区切りの各単語にも適用
-    words = text.split()
-    if len(words) > 1:
-        for word in words:
-            if word not in patterns:
-                patterns.append(word)
-            # 各単語の半角全角変換も追加
-            word_half = unicodedata.normalize('NFKC', word)
-            if word_half not in patterns:
-                patterns.append(word_half)
+def compile_search_matcher(query_patterns):
+    """
+    🚀 enhanced_search_match の判定をクエリ単位で前計算し、1テキストを判定する関数を返す
+
+    パターン側の表記ゆれ展開・長さ条件の判定は結果件数に依らず同じなので一度だけ行い、
+    部分一致は全パターンを1つの Aho-Corasick オートマトン（pyahocorasick 未導入時は
+    1つの正規表現）にまとめ、C実装の1回の走査で判定する。検索結果数千件を
+    絞り込む際に、結果毎・パターン毎の Python ループを回さない。
+
+    Args:
+        query_patterns (list): 検索パターンリスト（先頭が元のクエリ）
+
+    Returns:
+        callable: text -> bool（enhanced_search_match と同じ判定）
+    """
+    if not query_patterns:
+        return lambda text: False
 
-    # 重複除去とソート（長い順）
-    unique_patterns = list(set(patterns))
-    unique_patterns.sort(key=len, reverse=True)
+    query_len = len(query_patterns[0])
+    # 元のクエリ長に応じた、照合に使うパターンの最小長（3文字以上なら3、2文字なら2、1文字なら1）
+    min_len = min(query_len, 3)
 
-    return half_width, full_width, hiragana_to_katakana, unique_patterns
+    exact_patterns = set()
+    substring_patterns = set()
+    for pattern in query_patterns:
+        for pattern_variant in _search_text_variants(pattern):
+            if len(pattern_variant.strip()) < min_len:
+                continue
+            # 完全一致を優先
+            exact_patterns.add(pattern_variant)
+            # 部分一致 - 元のクエリ長に応じて厳密性を調整
+            if query_len >= 4:
+                # 4文字以上の場合は厳密マッチング（元のクエリそのものの部分一致のみ）
+                if pattern_variant == query_patterns[0]:
+                    substring_patterns.add(pattern_variant)
+            elif len(pattern_variant) >= 2:
+                substring_patterns.add(pattern_variant)
+
+    substring_search = None
+    if substring_patterns:
+        if ahocorasick is not None:
+            # Aho-Corasick オートマトン: パターン数に依らずテキスト1回の走査で判定
+            automaton = ahocorasick.Automaton()
+            for p in substring_patterns:
+                automaton.add_word(p, p)
+            automaton.make_automaton()
+
+            def substring_search(text_variant):
+                return next(automaton.iter(text_variant), None) is not None
+        else:
+            substring_search = re.compile('|'.join(
+                re.escape(p) for p in sorted(substring_patterns, key=len, reverse=True))).search
+
+    def match(text):
+        if not text:
+            return False
+        for text_variant in _search_text_variants(text):
+            if text_variant in exact_patterns:
+                return True
+            if substring_search is not None and substring_search(text_variant):
+                return True
+        return False
+
+    return match
 
 
 def enhanced_search_match(text, query_patterns):
@@ -1020,87 +1273,12 @@ def enhanced_search_match(text, query_patterns):
         
     Returns:
         bool: マッチするかどうか
+
+    多数のテキストを同じクエリで判定する場合は compile_search_matcher を使う。
     """
     if not text or not query_patterns:
         return False
-
-    # テキストも複数パターンで正規化
-    text_lower = text.lower()
-    text_normalized = unicodedata.normalize('NFKC', text_lower)
-
-    # テキストのひらがな→カタカナ変換
-    text_hiragana_to_katakana = ''
-    for char in text_lower:
-        if 'ぁ' <= char <= 'ゖ':
-            text_hiragana_to_katakana += chr(ord(char) + 0x60)
-        else:
-            text_hiragana_to_katakana += char
-
-    # テキストのカタカナ→ひらがな変換
-    text_katakana_to_hiragana = ''
-    for char in text_lower:
-        if 'ァ' <= char <= 'ヶ':
-            text_katakana_to_hiragana += chr(ord(char) - 0x60)
-        else:
-            text_katakana_to_hiragana += char
-
-    # テキストの正規化バリエーション
-    text_variants = [
-        text, text_lower, text_normalized, text_hiragana_to_katakana, text_katakana_to_hiragana
-    ]
-
-    # 各パターンでマッチングを試行
-    for pattern in query_patterns:
-        pattern_lower = pattern.lower()
-        pattern_normalized = unicodedata.normalize('NFKC', pattern_lower)
-
-        # パターンのひらがな→カタカナ変換
-        pattern_hiragana_to_katakana = ''
-        for char in pattern_lower:
-            if 'ぁ' <= char <= 'ゖ':
-                pattern_hiragana_to_katakana += chr(ord(char) + 0x60)
-            else:
-                pattern_hiragana_to_katakana += char
-
-        # パターンのカタカナ→ひらがな変換
-        pattern_katakana_to_hiragana = ''
-        for char in pattern_lower:
-            if 'ァ' <= char <= 'ヶ':
-                pattern_katakana_to_hiragana += chr(ord(char) - 0x60)
-            else:
-                pattern_katakana_to_hiragana += char
-
-        pattern_variants = [
-            pattern, pattern_lower, pattern_normalized, pattern_hiragana_to_katakana,
-            pattern_katakana_to_hiragana
-        ]
-
-        # 精密マッチング: 3文字以上のパターンで検索（より厳密に）
-        for text_variant in text_variants:
-            for pattern_variant in pattern_variants:
-                # 元のクエリが3文字以上の場合は3文字以上パターンを優先
-                if len(query_patterns[0]) >= 3 and len(pattern_variant.strip()) < 3:
-                    continue
-                # 元のクエリが2文字の場合は2文字以上パターンを対象
-                elif len(query_patterns[0]) == 2 and len(pattern_variant.strip()) < 2:
-                    continue
-                # 1文字のクエリは1文字以上パターンを対象
-                elif len(query_patterns[0]) == 1 and len(pattern_variant.strip()) < 1:
-                    continue
-                
-                # 完全一致を優先
-                if pattern_variant == text_variant:
-                    return True
-                
-                # 部分一致 - 元のクエリ長に応じて厳密性を調整
-                if len(query_patterns[0]) >= 4:
-                    # 4文字以上の場合は厳密マッチング（完全一致優先）
-                    if pattern_variant == query_patterns[0] and pattern_variant in text_variant:
-                        return True
-                elif len(pattern_variant) >= 2 and pattern_variant in text_variant:
-                    return True
-
-    return False
+    return compile_search_matcher(query_patterns)(text)
 
 
 # _FileContentExtractor / _init_extraction_worker / _worker_extract /
@@ -1111,12 +1289,16 @@ from extraction import (
     _FileContentExtractor,
     _init_extraction_worker,
     _worker_extract,
+    _worker_extract_image_batch,
     normalize_extracted_text,
     safe_truncate_utf8,
     IMAGE_OCR_EXTENSIONS,
+    OCR_STITCH_BATCH,
     TARGET_EXTENSIONS,
 )
 import extraction as _extraction_mod
+# OCR対象となり得る拡張子（スキャンPDF + 画像）。ファイル毎の集合生成を避けるため定数化
+_OCR_ELIGIBLE_EXTENSIONS = frozenset({'.pdf'} | IMAGE_OCR_EXTENSIONS)
 # メインプロセスのログを統一（設定済み debug_logger を抽出モジュールへ注入）
 _extraction_mod.debug_logger = debug_logger
 
@@ -1138,6 +1320,9 @@ class UltraFastFullCompliantSearchSystem:
         if not cache_dir.exists():
             print(f"📁 cacheディレクトリを作成: {cache_dir}")
             cache_dir.mkdir(parents=True, exist_ok=True)
+        # OCR結果の永続キャッシュ（再起動後も未更新TIFFのOCRを省略）。
+        #   抽出ワーカープロセスにも伝わるよう環境変数で保存先を渡す。
+        os.environ.setdefault(_extraction_mod.OCR_CACHE_ENV, str(cache_dir / "ocr_cache.db"))
         
         # まず既存のDBファイル数をチェック
         existing_db_count = 0
@@ -1167,14 +1352,22 @@ class UltraFastFullCompliantSearchSystem:
 
         # 🚀 検索用の永続スレッドプールとスレッドローカル接続（接続/PRAGMAの張り直しコスト削減）
         # 検索のたびにExecutorと8DB接続を作り直すと無駄なレイテンシが乗るため、
-        # ワーカースレッドと接続を使い回す。
-        self._search_executor = None
+        # ワーカースレッドと接続を使い回す。プールは起動時に一度だけ作る（スレッドは
+        # 最初の検索で必要分だけ起動される）。検索毎の遅延生成は同時検索で二重生成し得た。
+        self._search_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.db_count, thread_name_prefix='search-db')
         self._search_conn_local = threading.local()
         # 🚀 スレッドローカル検索接続の全レジストリ。スレッドローカルは生成元
         #   スレッドからしか辿れず shutdown() で閉じられないため（ハンドル/WALリーク、
         #   Windowsではファイルロック残留）、生成した接続を集中管理して終了時に閉じる。
         self._all_search_conns = []
         self._all_search_conns_lock = threading.Lock()
+        # 🚀 シャード毎の永続書き込み接続（フラッシュ毎の connect+PRAGMA を回避）。
+        #   シャード書き込みスレッドはフラッシュ毎に作り直されるためスレッドローカルに
+        #   できない。代わりにシャード単位のロックで同一接続の同時使用を防ぐ。
+        self._write_conns: Dict[int, sqlite3.Connection] = {}
+        self._fts_external: Dict[int, bool] = {}  # シャード毎: FTS5 が外部コンテンツ方式か
+        self._write_conn_locks = [threading.Lock() for _ in range(self.db_count)]
 
         # 3層レイヤー構造（重複削除・役割明確化版）
         # 即座層: 検索キャッシュ専用（短時間保持・プレビューのみ）
@@ -1344,9 +1537,17 @@ class UltraFastFullCompliantSearchSystem:
 
         # 🚀 クエリ結果キャッシュ（同一検索の再実行を回避）。
         #   即座層(file_path→メタデータ)とはスキーマが異なるため別dictで管理する。
-        self._query_result_cache: Dict[str, List[Dict[str, Any]]] = {}
+        #   OrderedDict で参照順を保持し、ヒット時 move_to_end・溢れ時 popitem(last=False)
+        #   により O(1) で真の LRU 退避を行う（挿入順だけの FIFO にしない）。
+        self._query_result_cache: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
         self._query_cache_lock = threading.Lock()
         self._query_cache_max = 200
+        # 🚀 クエリ頻度（TinyLFU 風の受け入れ判定用）。満杯時は LRU の退避候補より
+        #   参照頻度の低い新規クエリを入れない（インクリメンタル検索の途中入力など
+        #   一度きりのクエリが、繰り返し使われるクエリを追い出さないようにする）。
+        #   一定回数ごとに全カウンタを半減して古い頻度を忘れる（エージング）。
+        self._query_freq: Dict[str, int] = {}
+        self._query_freq_ops = 0
 
         # 🚀 完全層(DB)バッチ書き込み用バッファ。
         #   ファイル毎にTimerで単発INSERTする代わりに、まとめてバルクインサートする。
@@ -1356,7 +1557,7 @@ class UltraFastFullCompliantSearchSystem:
         self._complete_flush_timer = None
         # 一括インデックス中フラグ（True の間は即座層/高速層をスキップしスループット優先）
         self._bulk_indexing = False
-        # 完全層への書き込みを1スレッドに直列化する専用Executor（EXCLUSIVE競合を回避）
+        # 完全層への書き込みを1スレッドに直列化する専用Executor（書き込みロック競合を回避）
         self._flush_executor = None
         # 書き込みが抽出に追いつかない時のバックプレッシャ（保留バッチ数を上限4に制限しメモリ膨張を防ぐ）
         self._flush_semaphore = threading.BoundedSemaphore(4)
@@ -1519,81 +1720,13 @@ class UltraFastFullCompliantSearchSystem:
             return self._get_fallback_db_count()
 
     def _get_comprehensive_hardware_info(self) -> Dict[str, Any]:
-        """包括的なハードウェア情報取得"""
-        info = {
-            'cpu_cores': 4,
-            'logical_cores': 4,
-            'memory_gb': 8.0,
-            'storage_type': 'unknown'
-        }
-        
-        try:
-            if psutil is not None:
-                # CPU情報
-                info['cpu_cores'] = psutil.cpu_count(logical=False) or 4
-                info['logical_cores'] = psutil.cpu_count(logical=True) or 4
-                
-                # メモリ情報
-                memory = psutil.virtual_memory()
-                info['memory_gb'] = memory.total / (1024 ** 3)
-                
-                # ストレージタイプの推定
-                info['storage_type'] = self._detect_storage_type()
-            else:
-                # psutilがない場合の推定
-                import os
-                import multiprocessing
-                info['cpu_cores'] = multiprocessing.cpu_count()
-                info['logical_cores'] = multiprocessing.cpu_count()
-                
-        except Exception as e:
-            print(f"⚠️ ハードウェア情報取得エラー: {e}")
-            
-        return info
+        """包括的なハードウェア情報取得（プロセス内で一度だけ計測した値のコピー）"""
+        return dict(_get_comprehensive_hardware_info())
 
-    def _detect_storage_type(self) -> str:
-        """ストレージタイプの検出"""
-        try:
-            import platform
-            
-            # Windowsの場合
-            if platform.system() == 'Windows':
-                try:
-                    import subprocess
-                    # PowerShellでストレージタイプを確認
-                    result = subprocess.run([
-                        'powershell', '-Command',
-                        'Get-PhysicalDisk | Select-Object MediaType, Size | ConvertTo-Json'
-                    ], capture_output=True, text=True, timeout=10)
-                    
-                    if result.returncode == 0:
-                        import json
-                        disks = json.loads(result.stdout)
-                        if isinstance(disks, list) and disks:
-                            media_type = disks[0].get('MediaType', '').lower()
-                            if 'ssd' in media_type:
-                                return 'nvme' if 'nvme' in media_type else 'ssd'
-                            elif 'hdd' in media_type:
-                                return 'hdd'
-                except:
-                    pass
-            
-            # Linuxの場合
-            elif platform.system() == 'Linux':
-                try:
-                    with open('/proc/mounts', 'r') as f:
-                        mounts = f.read()
-                        if 'nvme' in mounts:
-                            return 'nvme'
-                        elif 'ssd' in mounts:
-                            return 'ssd'
-                except:
-                    pass
-            
-            return 'hybrid'  # 不明な場合はハイブリッド扱い
-            
-        except Exception:
-            return 'unknown'
+    def _io_parallelism(self) -> int:
+        """ストレージ種別に応じたDB I/Oの並列度（NVMe=16 / SSD=4 / HDD=1 / 不明=4）"""
+        storage_type = _get_comprehensive_hardware_info()['storage_type']
+        return {'nvme': 16, 'ssd': 4, 'hdd': 1}.get(storage_type, 4)
 
     def _calculate_data_size_multiplier(self) -> float:
         """データサイズに基づく乗数計算（既存DBファイル含む）"""
@@ -1681,9 +1814,10 @@ class UltraFastFullCompliantSearchSystem:
                     conn = sqlite3.connect(str(complete_db_path), timeout=15.0)
                     cursor = conn.cursor()
                     
-                    # 高速モード設定
+                    # 高速モード設定。ジャーナルは最初から WAL で作る
+                    #   （MEMORY で作って後から WAL へ切り替える往復を省く）
+                    cursor.execute("PRAGMA journal_mode=WAL")
                     cursor.execute("PRAGMA synchronous=OFF")
-                    cursor.execute("PRAGMA journal_mode=MEMORY")
                     cursor.execute("PRAGMA temp_store=MEMORY")
                     cursor.execute("PRAGMA cache_size=10000")
 
@@ -1701,12 +1835,16 @@ class UltraFastFullCompliantSearchSystem:
                             hash TEXT
                         );
                         
+                        -- 外部コンテンツ方式: 本文は documents にのみ保持し、FTS5 は索引だけを
+                        --   持つ（本文の二重保存をやめ、書き込み量とDB容量をほぼ半減）
                         CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
                             file_path,
                             file_name, 
                             content, 
                             file_type,
-                            tokenize='trigram'
+                            tokenize='trigram',
+                            content='documents',
+                            content_rowid='id'
                         );
                         
                         CREATE INDEX IF NOT EXISTS idx_file_path ON documents(file_path);
@@ -1727,13 +1865,12 @@ class UltraFastFullCompliantSearchSystem:
                             pass  # 設定済みの場合は無視
                     
                     # FTS5設定INSERTで開いた暗黙トランザクションを確定してから
-                    # PRAGMAを変更する（トランザクション内ではsynchronous/journal_modeを
+                    # PRAGMAを変更する（トランザクション内ではsynchronousを
                     # 変更できず "Safety level may not be changed inside a transaction" となるため）
                     conn.commit()
 
                     # 設定を本番モードに戻す
                     cursor.execute("PRAGMA synchronous=NORMAL")
-                    cursor.execute("PRAGMA journal_mode=WAL")
 
                     conn.commit()
                     conn.close()
@@ -1745,7 +1882,11 @@ class UltraFastFullCompliantSearchSystem:
             
             # 並列初期化実行
             success_count = 0
-            max_init_workers = min(8, self.db_count)  # 初期化は最大8並列（34個対応）
+            # 既存DBの確認だけなら軽いので従来通り最大8並列。新規作成が必要なシャードが
+            #   あるときはストレージの並列I/O性能に合わせる（HDDでの過剰並列はシークで逆効果）
+            needs_create = any(not p.exists() or p.stat().st_size <= 1024
+                               for p in self.complete_db_paths)
+            max_init_workers = min(self._io_parallelism() if needs_create else 8, self.db_count)
             with concurrent.futures.ThreadPoolExecutor(max_workers=max_init_workers) as executor:
                 futures = {executor.submit(initialize_single_db, i): i for i in range(self.db_count)}
                 
@@ -1773,7 +1914,6 @@ class UltraFastFullCompliantSearchSystem:
         except Exception as e:
             print(f"❌ データベース初期化エラー: {e}")
             debug_logger.error(f"データベース初期化エラー: {e}")
-            import traceback
             traceback.print_exc()
 
     def _calculate_tf_idf_score(self, query_terms: List[str], doc_path: str, content: str) -> float:
@@ -1932,9 +2072,31 @@ class UltraFastFullCompliantSearchSystem:
 
     def _get_db_index_for_file(self, file_path: str) -> int:
         """ファイルパスに基づいてデータベースインデックスを決定"""
-        # ファイルパスのハッシュ値を使用して分散
-        hash_value = hashlib.md5(file_path.encode('utf-8')).hexdigest()
-        return int(hash_value, 16) % self.db_count
+        # ファイルパスのハッシュ値を使用して分散。既存DBの振り分けと一致させるため
+        #   MD5 のまま、16進文字列を経由せず digest から直接整数化する（値は同一）
+        digest = hashlib.md5(file_path.encode('utf-8')).digest()
+        return int.from_bytes(digest, 'big') % self.db_count
+
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection, writer: bool):
+        """永続DB接続の PRAGMA を一括設定（検索用・書き込み用で共通化）。
+
+        mmap を有効にして読み取り時のページコピーを省く（上限はSQLiteのビルド設定で
+        さらに制限される）。検索用は誤書き込みを防ぐため query_only にする。
+        """
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=10737418240")
+        if writer:
+            conn.execute("PRAGMA cache_size=50000")
+            conn.execute("PRAGMA busy_timeout=300000")
+            conn.execute("PRAGMA wal_autocheckpoint=1000")
+            # チェックポイント後に WAL ファイルを 64MB まで切り詰め、肥大化による読み取り低下を防ぐ
+            conn.execute("PRAGMA journal_size_limit=67108864")
+        else:
+            conn.execute("PRAGMA cache_size=-65536")  # 64MB（負値はKB単位）
+            conn.execute("PRAGMA query_only=1")
 
     def _get_search_connection(self, db_index: int):
         """検索用のスレッドローカルDB接続を取得（再利用）。
@@ -1950,29 +2112,58 @@ class UltraFastFullCompliantSearchSystem:
             local.conns = conns
         conn = conns.get(db_index)
         if conn is None:
+            # 検索SQLは文面が固定（検索語はすべてバインド変数）なので、接続を使い回す限り
+            #   準備済みステートメントキャッシュが効き、MATCH クエリの再パースを省ける
             conn = sqlite3.connect(str(self.complete_db_paths[db_index]),
-                                   timeout=30.0, check_same_thread=False)
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA synchronous=NORMAL')
-            conn.execute('PRAGMA cache_size=20000')
-            conn.execute('PRAGMA temp_store=MEMORY')
+                                   timeout=30.0, check_same_thread=False,
+                                   isolation_level=None, cached_statements=256)
+            self._configure_connection(conn, writer=False)
             conns[db_index] = conn
             # 終了時に確実に閉じられるよう全接続レジストリへ登録
             with self._all_search_conns_lock:
                 self._all_search_conns.append(conn)
         return conn
 
+    def _get_write_connection(self, db_index: int) -> sqlite3.Connection:
+        """シャード書き込み用の永続DB接続を取得（呼び出し側が _write_conn_locks[db_index] を保持）。
+
+        初回のみ接続して PRAGMA を設定し、以降のフラッシュでは使い回す。
+        """
+        conn = self._write_conns.get(db_index)
+        if conn is None:
+            # isolation_level=None: ドライバの暗黙BEGIN/COMMITを無効化し、
+            #   トランザクションは BEGIN IMMEDIATE / COMMIT で明示的に管理する
+            conn = sqlite3.connect(str(self.complete_db_paths[db_index]),
+                                   timeout=120.0, check_same_thread=False,
+                                   isolation_level=None, cached_statements=256)
+            self._configure_connection(conn, writer=True)
+            # FTS5 が外部コンテンツ方式か（新規DB）、本文を自前で持つ旧方式か（既存DB）を判定。
+            #   書き込み手順が異なるため接続毎に一度だけ調べる。
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='documents_fts'").fetchone()
+            self._fts_external[db_index] = bool(row and row[0] and "content='documents'" in row[0])
+            self._write_conns[db_index] = conn
+        return conn
+
+    def _discard_write_connection(self, db_index: int):
+        """異常のあった書き込み接続を破棄し、次回のフラッシュで再作成させる。"""
+        conn = self._write_conns.pop(db_index, None)
+        if conn is not None:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            try:
+                conn.close()
+            except Exception:
+                pass
+
     def _update_average_search_time(self):
         """平均検索時間を更新"""
         if self.stats["search_count"] > 0:
             self.stats["avg_search_time"] = self.stats["total_search_time"] / self.stats["search_count"]
 
-    def _get_db_index_for_file(self, file_path: str) -> int:
-        """ファイルパスに基づいてデータベースインデックスを決定"""
-        # ファイルパスのハッシュ値を使用して分散
-        hash_value = hashlib.md5(file_path.encode('utf-8')).hexdigest()
-        return int(hash_value, 16) % self.db_count
-
     def unified_three_layer_search(self,
                                    query: str,
                                    max_results: int = 5500,
@@ -1989,7 +2180,10 @@ class UltraFastFullCompliantSearchSystem:
         cache_key = f"{query}\x00{file_type_filter}"
         if not self.indexing_in_progress:
             with self._query_cache_lock:
+                self._record_query_frequency(cache_key)
                 cached = self._query_result_cache.get(cache_key)
+                if cached is not None:
+                    self._query_result_cache.move_to_end(cache_key)
             if cached is not None:
                 print(f"⚡ クエリキャッシュヒット: '{query}' ({len(cached)}件)")
                 return [r.copy() for r in cached][:max_results]
@@ -2053,10 +2247,19 @@ class UltraFastFullCompliantSearchSystem:
             # 🚀 クエリ結果キャッシュへ保存（インデックス中以外）。新規インデックスで無効化される。
             if not self.indexing_in_progress:
                 with self._query_cache_lock:
-                    if len(self._query_result_cache) >= self._query_cache_max:
-                        # LRU風: 最古エントリを削除
-                        self._query_result_cache.pop(next(iter(self._query_result_cache)), None)
-                    self._query_result_cache[cache_key] = [r.copy() for r in unique_results]
+                    admit = True
+                    if (cache_key not in self._query_result_cache
+                            and len(self._query_result_cache) >= self._query_cache_max):
+                        # LRU の退避候補（最も長く参照されていないエントリ）と頻度を比べ、
+                        #   新規クエリの方が低頻度なら受け入れない
+                        victim_key = next(iter(self._query_result_cache))
+                        if self._query_freq.get(cache_key, 0) < self._query_freq.get(victim_key, 0):
+                            admit = False
+                        else:
+                            self._query_result_cache.popitem(last=False)
+                    if admit:
+                        self._query_result_cache[cache_key] = [r.copy() for r in unique_results]
+                        self._query_result_cache.move_to_end(cache_key)
 
             return unique_results[:max_results]
 
@@ -2064,6 +2267,15 @@ class UltraFastFullCompliantSearchSystem:
             print(f"❌ 統合検索エラー: {e}")
             return []
 
+    def _record_query_frequency(self, cache_key: str):
+        """クエリの参照頻度を数える（_query_cache_lock 保持下で呼ぶ）。"""
+        self._query_freq[cache_key] = self._query_freq.get(cache_key, 0) + 1
+        self._query_freq_ops += 1
+        if self._query_freq_ops >= self._query_cache_max * 10:
+            # エージング: 全カウンタを半減し、0 になったクエリは忘れる（辞書の肥大化も防ぐ）
+            self._query_freq = {k: v >> 1 for k, v in self._query_freq.items() if v > 1}
+            self._query_freq_ops = 0
+
     def _invalidate_query_cache(self):
         """クエリ結果キャッシュを破棄（完全層にデータが追加/更新されたとき呼ぶ）。"""
         with self._query_cache_lock:
@@ -2158,11 +2370,13 @@ class UltraFastFullCompliantSearchSystem:
                     search_attempts = 0
                     max_search_attempts = min(len(query_patterns), 3)  # 最大3パターンまで
 
+                    # 🎯 厳密検索モード: 元のクエリが4文字以上の場合は完全一致を優先
+                    #   （行・パターンに依らない値はループ外で一度だけ求める）
+                    original_query_length = len(query.strip())
+                    query_lower = query.strip().lower()
+
                     for idx, pattern in enumerate(query_patterns[:max_search_attempts]):
                         try:
-                            # 🎯 厳密検索モード: 元のクエリが4文字以上の場合は完全一致を優先
-                            original_query_length = len(query.strip())
-                            
                             # トライグラムトークナイザー対応: 2文字以下はLIKE検索を使用
                             if len(pattern) <= 2:
                                 # 元のクエリが4文字以上なのに2文字以下のパターンは除外（厳密性向上）
@@ -2170,7 +2384,11 @@ class UltraFastFullCompliantSearchSystem:
                                     continue
                                     
                                 # 2文字以下の場合はLIKE検索（trigramトークナイザー対応）
-                                # ファイルパスを除外してコンテンツとファイル名のみで検索
+                                # ファイルパスを除外してコンテンツとファイル名のみで検索。
+                                # 3文字未満はトライグラム索引が効かず全走査になるため ORDER BY を付けない:
+                                #   並べ替えがあると全一致行を読み切るまで LIMIT が効かないが、
+                                #   無ければ LIMIT 件見つかった時点で走査を打ち切れる
+                                #   （最終的な順位は後段の関連度スコアで決まる）。
                                 try:
                                     # 🚀 本文全文は転送しない: プレビュー用に先頭2000文字だけ取得し、
                                     #    サイズ表示用に length(content) を別途取得（全文コピーを回避）
@@ -2180,7 +2398,6 @@ class UltraFastFullCompliantSearchSystem:
                                                file_type, length(content) AS content_len
                                         FROM documents_fts
                                         WHERE (content LIKE ? OR file_name LIKE ?)
-                                        ORDER BY file_name
                                         LIMIT ?
                                     ''', (f'%{pattern}%', f'%{pattern}%', max_results // self.db_count + 20))
 
@@ -2196,7 +2413,7 @@ class UltraFastFullCompliantSearchSystem:
                                         # 🎯 厳密マッチボーナス: 元クエリと完全一致の場合（先頭2000文字内で判定）
                                         exact_match_bonus = 0.0
                                         content_text = content_head + ' ' + (row[1] or '')
-                                        if query.strip().lower() in content_text.lower():
+                                        if query_lower in content_text.lower():
                                             exact_match_bonus = 2.0
 
                                         # 従来のスコア計算
@@ -2253,57 +2470,58 @@ class UltraFastFullCompliantSearchSystem:
                                     prefix_q = f'content:"{pat_esc}"* OR file_name:"{pat_esc}"*'
                                     search_queries.append(prefix_q)  # 前方一致検索
 
+                            # 検索パターンによるスコア調整（精度重視）
+                            pattern_bonus = 0.1 * (len(query_patterns) - idx)
+                            # 🎯 関連性フィルタ: 元のクエリが4文字以上の場合、部分マッチのスコアを下げる
+                            relevance_penalty = -1.0 if (original_query_length >= 4 and idx > 0) else 0.0
+
                             for search_query in search_queries:
                                 try:
+                                    # 検索クエリタイプによるボーナス（クエリ毎に1回だけ判定）。
+                                    #   全クエリは 'content:' 始まりなので startswith('"') では
+                                    #   フレーズ検索を判定できない（旧コードは常にFalse=死にコード）。
+                                    #   前方一致は末尾の引用符を除いた直後が * で終わる形。
+                                    is_prefix = search_query.rstrip('"').endswith('*')
+                                    is_phrase = ('"' in search_query) and not is_prefix
+                                    if is_phrase:
+                                        # フレーズ検索は最高スコア
+                                        query_bonus = 2.0
+                                    elif is_prefix:
+                                        # 前方一致検索は中程度スコア
+                                        query_bonus = 1.0
+                                    else:
+                                        # 基本検索は標準スコア
+                                        query_bonus = 0.5
+
                                     # 🚀 本文全文は転送しない: プレビュー用に先頭2000文字、
-                                    #    サイズ表示用に length(content) を取得（全文コピーを回避）
+                                    #    サイズ表示用に length(content) を取得（全文コピーを回避）。
+                                    #    行に依らないスコア加算（rank欠損時0.5＋パターン/クエリ種別/
+                                    #    部分一致ペナルティ）は SQL 側で済ませる。
                                     cursor.execute(
                                         '''
                                         SELECT file_path, file_name, substr(content, 1, 2000) AS content_head,
-                                               file_type, rank AS relevance_score, length(content) AS content_len
+                                               file_type, COALESCE(NULLIF(rank, 0), 0.5) + ? AS base_score,
+                                               length(content) AS content_len
                                         FROM documents_fts
                                         WHERE documents_fts MATCH ?
                                         ORDER BY rank
                                         LIMIT ?
-                                    ''', (search_query, max_results // self.db_count + 20))  # 取得件数を大幅に削減
+                                    ''', (pattern_bonus + query_bonus + relevance_penalty,
+                                          search_query, max_results // self.db_count + 20))  # 取得件数を大幅に削減
 
                                     rows = cursor.fetchall()
 
                                     for row in rows:
                                         content_head = row[2] or ''
-                                        # 検索パターンによるスコア調整（精度重視）
-                                        base_score = row[4] if len(row) > 4 and row[4] else 0.5
-                                        pattern_bonus = 0.1 * (len(query_patterns) - idx)
-
-                                        # 検索クエリタイプによるボーナス。
-                                        #   全クエリは 'content:' 始まりなので startswith('"') では
-                                        #   フレーズ検索を判定できない（旧コードは常にFalse=死にコード）。
-                                        #   前方一致は末尾の引用符を除いた直後が * で終わる形。
-                                        is_prefix = search_query.rstrip('"').endswith('*')
-                                        is_phrase = ('"' in search_query) and not is_prefix
-                                        if is_phrase:
-                                            # フレーズ検索は最高スコア
-                                            query_bonus = 2.0
-                                        elif is_prefix:
-                                            # 前方一致検索は中程度スコア
-                                            query_bonus = 1.0
-                                        else:
-                                            # 基本検索は標準スコア
-                                            query_bonus = 0.5
 
                                         # 🎯 厳密マッチボーナス: 元クエリと完全一致の場合（先頭2000文字内で判定）
                                         exact_match_bonus = 0.0
                                         content_text = content_head + ' ' + (row[1] or '')
-                                        if query.strip().lower() in content_text.lower():
+                                        if query_lower in content_text.lower():
                                             exact_match_bonus = 3.0  # FTS検索での完全一致は最高評価
 
-                                        # 🎯 関連性フィルタ: 元のクエリが4文字以上の場合、部分マッチのスコアを下げる
-                                        relevance_penalty = 0.0
-                                        if original_query_length >= 4 and idx > 0:
-                                            relevance_penalty = -1.0  # 部分マッチのペナルティ
-
                                         # 従来のスコア計算
-                                        traditional_score = base_score + pattern_bonus + query_bonus + exact_match_bonus + relevance_penalty
+                                        traditional_score = row[4] + exact_match_bonus
 
                                         # 🚀 二段階スコアリング: BM25(rank)順の上位のみ高度スコア、残りは軽量スコア
                                         if scored_count < ADVANCED_SCORE_LIMIT:
@@ -2320,7 +2538,7 @@ class UltraFastFullCompliantSearchSystem:
                                             'content_preview': self._make_preview_snippet(content_head, query),
                                             'layer': f'complete_db_{db_index}',
                                             'file_type': row[3],
-                                            'size': row[5] if len(row) > 5 and row[5] else 0,
+                                            'size': row[5] or 0,
                                             'relevance_score': final_score
                                         }
                                         db_results.append(result)
@@ -2362,9 +2580,6 @@ class UltraFastFullCompliantSearchSystem:
                 return db_results
 
             # 8個のデータベースを並列で検索（永続スレッドプールを再利用）
-            if self._search_executor is None:
-                self._search_executor = concurrent.futures.ThreadPoolExecutor(
-                    max_workers=self.db_count, thread_name_prefix='search-db')
             executor = self._search_executor
             future_to_db = {executor.submit(search_single_db, i): i for i in range(self.db_count)}
 
@@ -2376,18 +2591,16 @@ class UltraFastFullCompliantSearchSystem:
                 except Exception as e:
                     print(f"⚠️ DB{db_index}並列検索エラー: {e}")
 
-            # 重複除去（file_pathベース）とスコア順ソート
-            seen_paths = set()
-            unique_results = []
-            for result in sorted(results, key=lambda x: x.get('relevance_score', 0) if isinstance(x, dict) else 0, reverse=True):
-                # result が dict 形式であることを確認
-                if isinstance(result, dict) and 'file_path' in result:
-                    if result['file_path'] not in seen_paths:
-                        unique_results.append(result)
-                        seen_paths.add(result['file_path'])
-                else:
-                    # デバッグ: 非dict形式の結果を出力
-                    debug_logger.warning(f"非dict形式の検索結果を検出: {type(result)} - {result}")
+            # 重複除去（file_pathベース、最高スコアを残す）と上位 max_results 件の抽出。
+            #   全件ソートせず heapq で上位k件だけ取り出す（O(N log k)）。
+            best_by_path: Dict[str, Dict[str, Any]] = {}
+            for result in results:
+                path = result['file_path']
+                kept = best_by_path.get(path)
+                if kept is None or result.get('relevance_score', 0) > kept.get('relevance_score', 0):
+                    best_by_path[path] = result
+            unique_results = heapq.nlargest(max_results, best_by_path.values(),
+                                            key=lambda x: x.get('relevance_score', 0))
 
             print(f"🔍 8並列DB検索完了: {len(results)}件(生)/重複除去後{len(unique_results)}件 | パターン数:{len(query_patterns)}")
             
@@ -2414,41 +2627,26 @@ class UltraFastFullCompliantSearchSystem:
         return unique_results[:max_results]
 
     def _deduplicate_and_rank_optimized(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """最適化版重複除去とランキング - 高速化重視"""
+        """最適化版重複除去とランキング - 高速化重視
+
+        結果は完全層(DB)のみから来るためレイヤー優先度は全件同一。行毎の Python
+        キー関数（レイヤー名の split・タプル生成）を使わず、relevance_score を
+        itemgetter（C実装）で取り出してソートする。
+        """
         if not results:
             return []
-            
+
+        # ソート（安定ソートなので同点の順序は維持される）
+        results.sort(key=operator.itemgetter('relevance_score'), reverse=True)
+
+        # 重複除去（同一パスは最高スコアの1件のみ残す）
         seen_paths = set()
         unique_results = []
-        
-        # レイヤー優先度を事前計算
-        priority_map = {
-            'complete': 1000,
-            'immediate': 100, 
-            'hot': 10
-        }
-        
-        # レイヤー名からの優先度取得（最適化）
-        def get_priority(result):
-            if not isinstance(result, dict):
-                return (0, 0)
-            layer = result.get('layer', 'unknown')
-            # complete_db_0等の場合はcompleteとして扱う
-            layer_base = layer.split('_')[0] if '_' in layer else layer
-            priority = priority_map.get(layer_base, 1)
-            score = result.get('relevance_score', 0)
-            return (priority, score)
-        
-        # ソート（最適化）
-        results.sort(key=get_priority, reverse=True)
-        
-        # 重複除去（最適化）
         for result in results:
-            if isinstance(result, dict) and 'file_path' in result:
-                path = result['file_path']
-                if path not in seen_paths:
-                    seen_paths.add(path)
-                    unique_results.append(result)
+            path = result['file_path']
+            if path not in seen_paths:
+                seen_paths.add(path)
+                unique_results.append(result)
 
         return unique_results
 
@@ -2797,8 +2995,12 @@ class UltraFastFullCompliantSearchSystem:
             self.stats["files_added_incrementally"] = self.stats.get("files_added_incrementally", 0) + indexed
             print(f"📡 増分監視: {indexed} ファイルを自動インデックスに追加しました")
 
-    def live_progressive_index_file(self, file_path: str) -> bool:
-        """ライブプログレッシブファイルインデックス（デバッグログ強化）"""
+    def live_progressive_index_file(self, file_path: str, st: Optional[os.stat_result] = None) -> bool:
+        """ライブプログレッシブファイルインデックス（デバッグログ強化）
+
+        st: 呼び出し側で取得済みの stat 結果（一括インデックスの分類時に取得したもの）。
+            渡された場合は再取得しない。
+        """
         debug_logger.debug(f"インデックス開始: {file_path}")
 
         # キャンセルチェック
@@ -2808,6 +3010,8 @@ class UltraFastFullCompliantSearchSystem:
 
         try:
             file_path_obj = Path(file_path)
+            # 拡張子は何度も参照するため一度だけ求める（Path.suffix の都度評価を避ける）
+            extension = os.path.splitext(file_path)[1].lower()
 
             # macOS隠しファイル（._で始まるファイル）をスキップ
             if file_path_obj.name.startswith('._'):
@@ -2824,12 +3028,13 @@ class UltraFastFullCompliantSearchSystem:
             # 画像はtiff(.tif/.tiff)のみをOCR/検索対象とする。
             image_extensions = IMAGE_OCR_EXTENSIONS
 
-            if not file_path_obj.exists():
+            # ファイル情報取得（存在確認と兼ねて stat は1回だけ。SMB等ではメタデータ
+            #   取得1回あたりの往復が重いため exists() + stat() の二重呼び出しを避ける）
+            try:
+                stat = st if st is not None else os.stat(file_path)
+            except FileNotFoundError:
                 debug_logger.warning(f"ファイルが存在しません: {file_path}")
                 return False
-
-            # ファイル情報取得
-            stat = file_path_obj.stat()
             file_size = stat.st_size
             modified_time = stat.st_mtime
 
@@ -2864,7 +3069,7 @@ class UltraFastFullCompliantSearchSystem:
             #   _extract_file_content を呼ぶとTLSを通じてフラグを立てて return "" するだけだが、
             #   その呼び出しコスト自体とスレッド間TLS競合を避けるため、ここで直接
             #   ファイル名のみ索引して _pending_ocr に積み、本文はバックグラウンドOCRで埋める。
-            if (file_path_obj.suffix.lower() in IMAGE_OCR_EXTENSIONS
+            if (extension in IMAGE_OCR_EXTENSIONS
                     and getattr(self, '_extractor', None)
                     and getattr(self._extractor, 'defer_ocr', False)):
                 with self._pending_ocr_lock:
@@ -2878,7 +3083,7 @@ class UltraFastFullCompliantSearchSystem:
             #   ただしOCR対象(スキャンPDF/TIFF)は多くが数MB超のため、ここで
             #   ファイル名のみに切り詰めると本文検索から永久に除外されてしまう。
             #   OCR対象は通常抽出（より大きな独自サイズ上限とOCR遅延を持つ）へ回す。
-            ocr_eligible = file_path_obj.suffix.lower() in ({'.pdf'} | IMAGE_OCR_EXTENSIONS)
+            ocr_eligible = extension in _OCR_ELIGIBLE_EXTENSIONS
             if file_size >= 3 * 1024 * 1024 and not ocr_eligible:
                 debug_logger.info(f"大容量ファイル - ファイル名のみインデックス: {file_path} ({file_size/(1024*1024):.1f}MB)")
                 # ファイル名とメタデータのみインデックス
@@ -2890,11 +3095,11 @@ class UltraFastFullCompliantSearchSystem:
                 content = self._extractor._extract_file_content(file_path)
                 _ext_dt = time.time() - _ext_t0
                 self._perf_add('extract', _ext_dt)
-                self._perf_add_ext(file_path_obj.suffix.lower() or '(なし)', _ext_dt)
+                self._perf_add_ext(extension or '(なし)', _ext_dt)
                 # 🔬 PDFのテキスト層抽出 vs OCR の内訳を集約（live 経路でも計測）
                 #   スレッドローカルから読む（複数スレッドが extractor を共有するため）。
                 #   PDF以外では TLS に前回PDFの値が残るので、拡張子で判定して加算する。
-                if file_path_obj.suffix.lower() == '.pdf':
+                if extension == '.pdf':
                     _pt = getattr(self._extractor._tls, 'pdf_text_secs', 0.0)
                     _po = getattr(self._extractor._tls, 'pdf_ocr_secs', 0.0)
                     self._perf_add('pdf_text', _pt)
@@ -2904,7 +3109,7 @@ class UltraFastFullCompliantSearchSystem:
                         f"🔬 抽出が遅いファイル({_ext_dt*1000:.0f}ms, {file_size/1024:.0f}KB): {file_path}")
                 # 🚀 遅延OCR: スキャンPDFや画像でOCRを後回しにした場合、保留キューへ積む。
                 #   本体完了後にバックグラウンドでOCRしてDB更新する。
-                if (file_path_obj.suffix.lower() in ({'.pdf'} | IMAGE_OCR_EXTENSIONS)
+                if (extension in _OCR_ELIGIBLE_EXTENSIONS
                         and getattr(self._extractor._tls, 'pdf_needs_ocr', False)):
                     with self._pending_ocr_lock:
                         self._pending_ocr.add(file_path)
@@ -2961,7 +3166,7 @@ class UltraFastFullCompliantSearchSystem:
         """完全層書き込み専用の単一ワーカーExecutorを取得。
 
         DB書き込みを1スレッドに直列化することで、多数のワーカースレッドが
-        同じDBに対して BEGIN EXCLUSIVE で奪い合うロック競合を防ぎ、かつ
+        同じDBの書き込みロックを奪い合う競合を防ぎ、かつ
         ワーカースレッドをDB書き込みでブロックさせない（抽出に専念させる）。
         """
         if self._flush_executor is None:
@@ -3059,6 +3264,9 @@ class UltraFastFullCompliantSearchSystem:
             timer = threading.Timer(2.0, self._timed_flush)
             self._complete_flush_timer = timer
             try:
+                # 終了済みのタイマーは捨ててから追跡に加える（長時間のインデックスで
+                #   フラッシュ毎の Timer が溜まり続けないようにする）
+                self._background_threads = [t for t in self._background_threads if t.is_alive()]
                 self._background_threads.append(timer)
             except Exception:
                 pass
@@ -3124,11 +3332,20 @@ class UltraFastFullCompliantSearchSystem:
         cpu = os.cpu_count() or 4
         workers = max(1, min(4, cpu // 2 or 1))
 
+        # 🚀 TIFF画像のOCRは前処理(Pillow/OpenCV)を含め全体がCPU律速で、スレッドでは
+        #   GILを奪い合い直列化する。画像はプロセスプール（物理コア数-1、UIに1コア残す）へ
+        #   回し、スキャンPDFは従来通りスレッドで処理する（ページ並列は抽出器側で実施）。
+        image_paths = [p for p in paths if os.path.splitext(p)[1].lower() in IMAGE_OCR_EXTENSIONS]
+        thread_paths = [p for p in paths if os.path.splitext(p)[1].lower() not in IMAGE_OCR_EXTENSIONS]
+        physical = (psutil.cpu_count(logical=False) if psutil is not None else None) or cpu
+        proc_workers = max(1, min(physical - 1, -(-len(image_paths) // OCR_STITCH_BATCH)))
+
+        def _cancelled() -> bool:
+            return self._ocr_bg_cancel.is_set() or bool(cancel_check and cancel_check())
+
         def _ocr_one(path: str):
             try:
-                if self._ocr_bg_cancel.is_set():
-                    return None
-                if cancel_check and cancel_check():
+                if _cancelled():
                     return None
                 if not os.path.exists(path):
                     return None
@@ -3141,22 +3358,60 @@ class UltraFastFullCompliantSearchSystem:
                 debug_logger.warning(f"遅延OCRエラー {path}: {e}")
                 return None
 
+        def _store_proc_results(future, chunk) -> None:
+            """プロセスプールでまとめOCRした画像の結果をDBへ書き込む（親プロセス側）。
+
+            ワーカー自体が失敗した場合（プロセス異常終了等）はチャンクを保留キューから
+            何も保存せずに外さないよう、このスレッドで1ファイルずつOCRし直す。
+            """
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                debug_logger.warning(f"遅延OCRエラー（まとめOCR・単発OCRへ切替）: {e}")
+                for path in chunk:
+                    _ocr_one(path)
+                return
+            for path, content, file_size, modified_time in batch_results:
+                try:
+                    if content:
+                        self._store_indexed_content(path, content, file_size, modified_time)
+                except Exception as e:
+                    debug_logger.warning(f"遅延OCRエラー {path}: {e}")
+
+        proc_pool = None
         try:
             with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
-                futures = {pool.submit(_ocr_one, p): p for p in paths}
+                # future → 担当パス一覧（スレッドは1件、画像は最大 OCR_STITCH_BATCH 件）
+                futures = {pool.submit(_ocr_one, p): [p] for p in thread_paths}
+                proc_futures = set()
+                if image_paths:
+                    proc_pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=proc_workers, initializer=_init_extraction_worker,
+                        initargs=(_get_worker_log_queue(),))
+                    # 小さなTIFFは1枚のシートに貼り合わせてTesseract起動を償却するため、
+                    #   OCR_STITCH_BATCH 件ずつワーカーへ渡す（大きい画像はワーカー内で単発OCR）
+                    for i in range(0, len(image_paths), OCR_STITCH_BATCH):
+                        chunk = image_paths[i:i + OCR_STITCH_BATCH]
+                        fut = proc_pool.submit(_worker_extract_image_batch, chunk)
+                        futures[fut] = chunk
+                        proc_futures.add(fut)
                 for fut in concurrent.futures.as_completed(futures):
-                    p = futures[fut]
-                    done += 1
+                    chunk = futures[fut]
+                    if fut in proc_futures and not fut.cancelled():
+                        _store_proc_results(fut, chunk)
+                    done += len(chunk)
                     with self._pending_ocr_lock:
-                        self._pending_ocr.discard(p)
+                        self._pending_ocr.difference_update(chunk)
                     if progress_cb:
                         try:
                             progress_cb(done, total)
                         except Exception:
                             pass
-                    if self._ocr_bg_cancel.is_set() or (cancel_check and cancel_check()):
+                    if _cancelled():
                         break
         finally:
+            if proc_pool is not None:
+                proc_pool.shutdown(wait=True, cancel_futures=True)
             ext.bulk_mode, ext.defer_ocr = prev_bulk, prev_defer
             try:
                 self.flush_complete_buffer()
@@ -3199,32 +3454,43 @@ class UltraFastFullCompliantSearchSystem:
 
     def _write_db_group(self, db_index: int, group_data: List[Dict[str, Any]]):
         """単一シャード(DB)へのバルクインサート。(成功件数, 失敗件数) を返す。"""
-        # 🚀 バッチ内重複の排除: 同一バッチに同じ file_path が複数含まれると、
-        #   ループ内の SELECT は未コミット行を見られないため両方が INSERT され、
-        #   file_path UNIQUE 制約に違反して executemany が失敗→バッチ全体が
-        #   ロールバックされてしまう。事前に file_path で重複排除し、最後の
-        #   （最新の）エントリのみを残す。挿入順は維持する。
+        # 🚀 バッチ内重複の排除: 同一バッチに同じ file_path が複数含まれると
+        #   同じ行を何度も UPSERT し FTS も書き直すことになる。事前に file_path で
+        #   重複排除し、最後の（最新の）エントリのみを残す。挿入順は維持する。
         if group_data:
             _dedup = {}
             for _fd in group_data:
                 _dedup[_fd['file_path']] = _fd  # 同一パスは後勝ち（最新を保持）
             group_data = list(_dedup.values())
-        conn = None
         _shard_t0 = time.time()
+        with self._write_conn_locks[db_index]:
+            return self._write_db_group_locked(db_index, group_data, _shard_t0)
+
+    @staticmethod
+    def _select_ids_by_path(cursor, paths: List[str], chunk: int = 500) -> Dict[str, int]:
+        """file_path → documents.id を IN 句でまとめて取得（SQLite の変数上限を考慮し分割）。"""
+        ids: Dict[str, int] = {}
+        for i in range(0, len(paths), chunk):
+            part = paths[i:i + chunk]
+            placeholders = ','.join('?' * len(part))
+            cursor.execute(f'SELECT file_path, id FROM documents WHERE file_path IN ({placeholders})',
+                           part)
+            ids.update(cursor.fetchall())
+        return ids
+
+    def _write_db_group_locked(self, db_index: int, group_data: List[Dict[str, Any]],
+                               _shard_t0: float):
+        """_write_db_group の本体（シャードの書き込みロック保持中に呼ぶ）。"""
         try:
-            complete_db_path = self.complete_db_paths[db_index]
-            conn = sqlite3.connect(str(complete_db_path), timeout=120.0, check_same_thread=False)
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA cache_size=50000")
-            conn.execute("PRAGMA temp_store=MEMORY")
-            conn.execute("PRAGMA busy_timeout=300000")
-            conn.execute("PRAGMA wal_autocheckpoint=1000")
+            conn = self._get_write_connection(db_index)
             cursor = conn.cursor()
-            conn.execute("BEGIN")
+            # 最初から書き込みロックを取る（読み取り→書き込みへの昇格時の SQLITE_BUSY を避ける）。
+            #   WAL では IMMEDIATE でも検索側の読み取りは妨げない。
+            conn.execute("BEGIN IMMEDIATE")
 
+            # 時刻はバッチ単位で1回だけ取得（行毎の time.time() 呼び出しを省く）
+            now = time.time()
             documents_data = []
-            fts_data = []
             for file_data in group_data:
                 file_path = file_data['file_path']
                 content = file_data['content']
@@ -3235,50 +3501,60 @@ class UltraFastFullCompliantSearchSystem:
                 safe_file_name = base_data.get('file_name', os.path.basename(file_path))[:500]
                 safe_file_type = base_data.get('file_type', Path(file_path).suffix.lower())[:50]
                 # 実ファイルの更新時刻を保存（差分インデックスが再起動後も効くようにする）
-                file_mtime = base_data.get('modified_time', time.time())
+                file_mtime = base_data.get('modified_time', now)
                 file_size_val = base_data.get('size', 0)
 
-                cursor.execute('SELECT id FROM documents WHERE file_path = ?', (file_path,))
-                existing = cursor.fetchone()
-                if existing:
+                documents_data.append((
+                    file_path, safe_file_name, safe_content, safe_file_type,
+                    file_size_val, file_mtime, now, file_hash
+                ))
+
+            fts_external = self._fts_external.get(db_index, False)
+            if fts_external:
+                # 外部コンテンツ方式の FTS5 は索引語を旧本文から再計算して消すため、
+                #   documents を書き換える前に旧値で 'delete' コマンドを発行する。
+                paths = [d[0] for d in documents_data]
+                for i in range(0, len(paths), 500):
+                    part = paths[i:i + 500]
+                    placeholders = ','.join('?' * len(part))
                     cursor.execute(
-                        '''UPDATE documents
-                           SET content = ?, file_name = ?, file_type = ?, size = ?,
-                               modified_time = ?, indexed_time = ?, hash = ?
-                           WHERE file_path = ?''',
-                        (safe_content, safe_file_name, safe_file_type, file_size_val,
-                         file_mtime, time.time(), file_hash, file_path)
-                    )
-                    cursor.execute('DELETE FROM documents_fts WHERE rowid = ?', (existing[0],))
-                    fts_data.append((existing[0], file_path, safe_file_name, safe_content, safe_file_type))
-                else:
-                    documents_data.append((
-                        file_path, safe_file_name, safe_content, safe_file_type,
-                        file_size_val, file_mtime, time.time(), file_hash
-                    ))
-
-            if documents_data:
-                cursor.executemany(
-                    '''INSERT INTO documents (file_path, file_name, content, file_type, size,
-                                             modified_time, indexed_time, hash)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                    documents_data
-                )
-                for doc_data in documents_data:
-                    cursor.execute('SELECT id FROM documents WHERE file_path = ?', (doc_data[0],))
-                    doc_id = cursor.fetchone()
-                    if doc_id:
-                        fts_data.append((doc_id[0], doc_data[0], doc_data[1], doc_data[2], doc_data[3]))
+                        f'''INSERT INTO documents_fts(documents_fts, rowid, file_path, file_name, content, file_type)
+                            SELECT 'delete', id, file_path, file_name, content, file_type
+                            FROM documents WHERE file_path IN ({placeholders})''',
+                        part)
+
+            # 🚀 UPSERT: 既存判定の SELECT と INSERT/UPDATE の振り分けを SQLite に任せる。
+            #   ON CONFLICT DO UPDATE は行を置換せず更新するため id（=FTSのrowid）は変わらない。
+            cursor.executemany(
+                '''INSERT INTO documents (file_path, file_name, content, file_type, size,
+                                         modified_time, indexed_time, hash)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(file_path) DO UPDATE SET
+                       file_name = excluded.file_name, content = excluded.content,
+                       file_type = excluded.file_type, size = excluded.size,
+                       modified_time = excluded.modified_time,
+                       indexed_time = excluded.indexed_time, hash = excluded.hash''',
+                documents_data
+            )
+            # id をまとめて引く（1件ずつの SELECT を IN 句の数回に削減）
+            doc_ids = self._select_ids_by_path(cursor, [d[0] for d in documents_data])
+            fts_data = []
+            for doc_data in documents_data:
+                doc_id = doc_ids.get(doc_data[0])
+                if doc_id is not None:
+                    fts_data.append((doc_id, doc_data[0], doc_data[1], doc_data[2], doc_data[3]))
 
             if fts_data:
+                # 旧方式では同じ rowid の旧エントリが OR REPLACE で置き換わる。外部コンテンツ方式は
+                #   上で旧索引を消してあるので通常の INSERT（OR REPLACE は新本文で削除を試み索引を壊す）。
+                verb = 'INSERT' if fts_external else 'INSERT OR REPLACE'
                 cursor.executemany(
-                    '''INSERT INTO documents_fts(rowid, file_path, file_name, content, file_type)
+                    f'''{verb} INTO documents_fts(rowid, file_path, file_name, content, file_type)
                        VALUES (?, ?, ?, ?, ?)''',
                     fts_data
                 )
 
-            conn.commit()
-            conn.close()
+            conn.execute("COMMIT")
             self._perf_add('shard', time.time() - _shard_t0)
             debug_logger.info(f"バルクインサート成功: DB{db_index}, {len(group_data)}件 "
                               f"({(time.time()-_shard_t0)*1000:.0f}ms)")
@@ -3287,12 +3563,7 @@ class UltraFastFullCompliantSearchSystem:
         except Exception as e:
             debug_logger.error(f"バルクインサートエラー: DB{db_index} - {e}")
             print(f"⚠️ DB{db_index}バルクエラー: {e}")
-            if conn is not None:
-                try:
-                    conn.rollback()
-                    conn.close()
-                except Exception:
-                    pass
+            self._discard_write_connection(db_index)
             return (0, len(group_data))
 
     def _process_text_files_batch(self, text_files: List[Path], start_time: float) -> int:
@@ -3542,7 +3813,8 @@ class UltraFastFullCompliantSearchSystem:
             pool_workers = min(cpu_count, 16)
             extract_pool = concurrent.futures.ProcessPoolExecutor(
                 max_workers=pool_workers,
-                initializer=_init_extraction_worker)
+                initializer=_init_extraction_worker,
+                initargs=(_get_worker_log_queue(),))
             print(f"🚀 抽出ProcessPool起動: {pool_workers}プロセス "
                   f"(論理コア数={total_cores} / 上限16) ※抽出はコア数律速")
 
@@ -3695,7 +3967,8 @@ class UltraFastFullCompliantSearchSystem:
             cpu_count = max(1, (_os.cpu_count() or 4) - 1)
             max_proc = min(cpu_count, len(extract_targets), 16)
             proc_pool = concurrent.futures.ProcessPoolExecutor(
-                max_workers=max_proc, initializer=_init_extraction_worker)
+                max_workers=max_proc, initializer=_init_extraction_worker,
+                initargs=(_get_worker_log_queue(),))
             own_pool = True
 
         debug_logger.info(f"バッチ処理開始: {len(extract_targets)}ファイル抽出 (ProcessPool)")
@@ -3951,8 +4224,9 @@ class UltraFastFullCompliantSearchSystem:
 
         # パフォーマンス監視開始（スレッド増加修正版）
         def start_performance_monitoring():
+            if psutil is None:
+                return  # psutil未導入時は監視しない
             try:
-                import psutil
                 monitoring_count = 0
                 last_adjustment_time = 0
                 
@@ -4043,7 +4317,6 @@ class UltraFastFullCompliantSearchSystem:
         print(f"📊 最適化されたバッチサイズ: {self.batch_size} (ファイル数: {total_files:,})")
         
         try:
-            import psutil
             max_possible_threads = min(psutil.cpu_count(logical=True) - 1, 16)
             print(f"🔄 動的スレッド調整: 有効 (初期: {self.optimal_threads}, 最大: {max_possible_threads})")
         except:
@@ -4514,6 +4787,12 @@ class UltraFastFullCompliantSearchSystem:
                 if thread.is_alive():
                     thread.join(timeout=3.0)
 
+            # 検索用スレッドプールを停止（実行中の検索の完了を待ち、接続を閉じる前に合流させる）
+            try:
+                self._search_executor.shutdown(wait=True, cancel_futures=True)
+            except Exception as e:
+                debug_logger.warning(f"検索Executor停止エラー: {e}")
+
             # 🚀 スレッドローカル検索接続をすべて閉じる（ハンドル/WALリーク防止、
             #   Windowsのファイルロック残留防止）。Executor停止・スレッド合流の後に行う。
             with self._all_search_conns_lock:
@@ -4524,6 +4803,21 @@ class UltraFastFullCompliantSearchSystem:
                         debug_logger.warning(f"検索接続クローズエラー: {e}")
                 self._all_search_conns.clear()
 
+            # 永続書き込み接続も閉じる（書き込み中のシャードはロックで完了を待つ）。
+            #   閉じる前に PRAGMA optimize で必要な統計だけを安価に更新する（SQLite推奨）。
+            for _idx, _wlock in enumerate(self._write_conn_locks):
+                with _wlock:
+                    _wconn = self._write_conns.pop(_idx, None)
+                    if _wconn is not None:
+                        try:
+                            _wconn.execute("PRAGMA optimize")
+                        except Exception as e:
+                            debug_logger.warning(f"PRAGMA optimize エラー: {e}")
+                        try:
+                            _wconn.close()
+                        except Exception as e:
+                            debug_logger.warning(f"書き込み接続クローズエラー: {e}")
+
             print("✅ アプリケーションシャットダウン完了")
             debug_logger.info("アプリケーションシャットダウン完了")
             
@@ -4800,7 +5094,8 @@ class UltraFastFullCompliantSearchSystem:
                 print("🔧 8並列データベース最適化開始...")
                 start_time = time.time()
                 
-                with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.db_count, 4)) as executor:
+                with concurrent.futures.ThreadPoolExecutor(
+                        max_workers=min(self.db_count, self._io_parallelism())) as executor:
                     future_to_db = {
                         executor.submit(self._optimize_single_database, i): i 
                         for i in range(self.db_count)
@@ -4840,8 +5135,13 @@ class UltraFastFullCompliantSearchSystem:
             debug_logger.error(f"バックグラウンド最適化エラー: {e}")
             print(f"❌ バックグラウンド最適化エラー: {e}")
 
-    def _optimize_single_database(self, db_index: int):
-        """単一データベースの最適化"""
+    def _optimize_single_database(self, db_index: int, full: bool = False):
+        """単一データベースの最適化
+
+        既定は軽量版（FTS5セグメント統合・統計更新・WAL切り詰め）。VACUUM は
+        DBファイル全体を書き直す重い処理で検索速度にはほぼ寄与しないため、
+        full=True の時のみ実行する。
+        """
         try:
             complete_db_path = self.complete_db_paths[db_index]
             conn = sqlite3.connect(complete_db_path, timeout=60.0)
@@ -4849,15 +5149,17 @@ class UltraFastFullCompliantSearchSystem:
 
             # FTS5最適化
             cursor.execute("INSERT INTO documents_fts(documents_fts) VALUES('optimize')")
-            
-            # SQLite最適化
-            cursor.execute("VACUUM")
+            conn.commit()
+
+            # SQLite最適化（VACUUM は容量回収が必要な時のみ）
+            if full:
+                cursor.execute("VACUUM")
             cursor.execute("ANALYZE")
-            
-            # ジャーナルモード最適化
             cursor.execute("PRAGMA optimize")
-            
             conn.commit()
+
+            # WAL を切り詰めて肥大化したWALによる読み取り低下を解消
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             conn.close()
 
         except Exception as e:
@@ -4868,6 +5170,9 @@ class UltraFastFullCompliantSearchSystem:
 class UltraFastCompliantUI:
     """100%仕様適合 超高速全文検索UI"""
 
+    FILE_LIST_CACHE_TTL = 60  # フォルダー分析の走査結果をインデクサが再利用できる秒数
+    UI_UPDATE_INTERVAL = 0.2  # インデックス進捗表示の最短更新間隔（秒）
+
     def __init__(self, search_system: UltraFastFullCompliantSearchSystem):
         self.search_system = search_system
         self.root = tk.Tk()
@@ -4894,6 +5199,13 @@ class UltraFastCompliantUI:
         self.drive_info = {}
         self.bulk_indexing_active = False
         self.selected_folder_path = None
+        self._selected_folder_basename = ""  # selected_folder_path の末尾名（設定時に1回だけ算出）
+        # フォルダー分析(update_folder_info)で収集した対象ファイル一覧（二重走査の排除用）
+        self._cached_file_list: Optional[List[str]] = None
+        self._cached_file_list_path: Optional[str] = None
+        self._cached_file_list_mtime: Optional[float] = None
+        self._cached_file_list_ts = 0.0
+        self._last_ui_ts = 0.0  # 進捗表示の最終更新時刻（time.monotonic）
         self.last_index_path = None  # 最後にインデックスしたパス（手動更新用）
 
         # 進捗トラッキング
@@ -5226,11 +5538,13 @@ class UltraFastCompliantUI:
             # 結果を半角全角パターンでフィルタリング
             if len(query_patterns) > 1:
                 enhanced_results = []
+                # パターン側の展開・正規表現化はクエリ毎に1回だけ
+                search_matcher = compile_search_matcher(query_patterns)
                 for result in results:
                     # コンテンツとファイル名で半角全角マッチングを確認
                     content_text = result.get('content_preview', '') + ' ' + result.get(
                         'file_name', '')
-                    if enhanced_search_match(content_text, query_patterns):
+                    if search_matcher(content_text):
                         # マッチした場合はスコアを向上
                         result['relevance_score'] = result.get('relevance_score', 0.5) + 0.1
                         enhanced_results.append(result)
@@ -5288,14 +5602,8 @@ class UltraFastCompliantUI:
             """UI表示用UTF-8文字列を安全に切り取る（日本語対応）"""
             if not text or len(text) <= max_length:
                 return text
-            # 文字境界で安全に切り取り
-            truncated = text[:max_length]
-            # 最後の文字が不完全な場合は1文字削る
-            try:
-                truncated.encode('utf-8')
-                return truncated + "..."
-            except UnicodeEncodeError:
-                return (text[:max_length-1] if max_length > 1 else "") + "..."
+            # str のスライスは常に文字境界で切れる
+            return text[:max_length] + "..."
         
         def highlight_keywords_in_text(text: str, query: str) -> str:
             """テキスト内のキーワードをシンプルハイライト表示用にマークアップ"""
@@ -6497,8 +6805,12 @@ class UltraFastCompliantUI:
             except Exception:
                 pass
 
-    def categorize_files_by_size_fast_ui_safe(self, files):
-        """UI応答性を重視したファイルサイズ分類（超高速並列版）"""
+    def categorize_files_by_size_fast_ui_safe(self, files, stat_cache: Optional[dict] = None):
+        """UI応答性を重視したファイルサイズ分類（超高速並列版）
+
+        stat_cache を渡すと分類時の stat 結果を {パス: os.stat_result} で格納し、
+        既に消えた/移動されたファイルは分類から除外する（インデックス時の再 stat を省く）。
+        """
         light_files = []    # <10MB
         medium_files = []   # 10MB-100MB  
         heavy_files = []    # >100MB
@@ -6510,13 +6822,19 @@ class UltraFastCompliantUI:
         if len(files) <= 5000:
             for file_path in files:
                 try:
-                    size_bytes = Path(file_path).stat().st_size
+                    st = os.stat(file_path)
+                    size_bytes = st.st_size
+                    if stat_cache is not None:
+                        stat_cache[file_path] = st
                     if size_bytes < 10 * 1024 * 1024:  # 10MB
                         light_files.append(file_path)
                     elif size_bytes < 100 * 1024 * 1024:  # 100MB
                         medium_files.append(file_path)
                     else:
                         heavy_files.append(file_path)
+                except FileNotFoundError:
+                    if stat_cache is None:
+                        light_files.append(file_path)
                 except:
                     light_files.append(file_path)  # エラー時は軽量扱い
         else:
@@ -6533,13 +6851,19 @@ class UltraFastCompliantUI:
                 
                 for file_path in batch_files:
                     try:
-                        size_bytes = Path(file_path).stat().st_size
+                        st = os.stat(file_path)
+                        size_bytes = st.st_size
+                        if stat_cache is not None:
+                            stat_cache[file_path] = st  # dict への代入はGIL下でアトミック
                         if size_bytes < 10 * 1024 * 1024:  # 10MB
                             batch_light.append(file_path)
                         elif size_bytes < 100 * 1024 * 1024:  # 100MB
                             batch_medium.append(file_path)
                         else:
                             batch_heavy.append(file_path)
+                    except FileNotFoundError:
+                        if stat_cache is None:
+                            batch_light.append(file_path)
                     except:
                         batch_light.append(file_path)  # エラー時は軽量扱い
                 
@@ -6576,14 +6900,14 @@ class UltraFastCompliantUI:
         
         return light_files, medium_files, heavy_files
 
-    def process_single_file_with_progress(self, file_path: str, category: str):
-        """単一ファイル処理（進捗トラッキング付き）"""
+    def process_single_file_with_progress(self, file_path: str, category: str, st=None):
+        """単一ファイル処理（進捗トラッキング付き）。st は事前取得済みの stat 結果（任意）"""
         try:
             # 進捗トラッカー更新
             self.progress_tracker.update_progress(current_file=file_path, category=category, success=True)
             
             # 実際のファイル処理
-            result = self.search_system.live_progressive_index_file(file_path)
+            result = self.search_system.live_progressive_index_file(file_path, st=st)
             
             return result
         except Exception as e:
@@ -6638,7 +6962,6 @@ class UltraFastCompliantUI:
 
                 except Exception as e:
                     print(f"❌ インデックススレッド例外: {e}")
-                    import traceback
                     traceback.print_exc()
                     
                     # 進捗ウィンドウを閉じる
@@ -7153,7 +7476,6 @@ class UltraFastCompliantUI:
             if save_path:
                 log_file = "file_search_app.log"
                 if os.path.exists(log_file):
-                    import shutil
                     shutil.copy2(log_file, save_path)
                     messagebox.showinfo("保存完了", f"デバッグログを保存しました:\n{save_path}")
                 else:
@@ -7260,10 +7582,10 @@ class UltraFastCompliantUI:
             # メモリキャッシュサンプル
             if self.search_system.immediate_cache:
                 status_text += "📋 即座層サンプル（最新5ファイル）:\n"
-                sorted_cache = sorted(self.search_system.immediate_cache.items(),
-                                      key=lambda x: x[1].get('indexed_time', 0),
-                                      reverse=True)
-                for i, (path, data) in enumerate(sorted_cache[:5]):
+                # 上位5件だけ必要なので全件ソートせず部分選択（O(n log 5)）
+                latest_entries = heapq.nlargest(5, self.search_system.immediate_cache.items(),
+                                                key=lambda x: x[1].get('indexed_time', 0))
+                for i, (path, data) in enumerate(latest_entries):
                     file_name = os.path.basename(path)
                     indexed_time = datetime.fromtimestamp(data.get('indexed_time', 0))
                     status_text += f"  {i+1}. {file_name} ({indexed_time.strftime('%H:%M:%S')})\n"
@@ -7278,12 +7600,13 @@ class UltraFastCompliantUI:
     def refresh_drives(self):
         """利用可能ドライブの検出・更新（ネットワークドライブ対応強化版）"""
         try:
+            if psutil is None:
+                raise ImportError("psutil が未導入のためドライブを検出できません")
             drives = []
             drive_info = []
             
             # Windowsの場合
             if platform.system() == "Windows":
-                import psutil
                 for partition in psutil.disk_partitions():
                     # CDROMを除外し、ネットワークドライブも含める
                     if 'cdrom' not in partition.opts.lower():
@@ -7293,18 +7616,27 @@ class UltraFastCompliantUI:
                             
                             # ネットワークドライブの場合はタイムアウト付きでアクセス
                             if is_network:
-                                # Windowsではsignalが制限されるため、ThreadPoolExecutorでタイムアウト
-                                from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+                                # Windowsではsignalが制限されるため、スレッドの join でタイムアウト。
+                                #   1タスクのためにExecutorは作らない（with を抜ける際の
+                                #   shutdown(wait=True) が応答しない共有の完了を待ってしまい、
+                                #   タイムアウトが効かなかった）。デーモンスレッドは放置してよい。
+                                outcome = []
+                                mountpoint = partition.mountpoint
                                 
                                 def get_disk_usage():
-                                    return psutil.disk_usage(partition.mountpoint)
-                                
-                                with ThreadPoolExecutor(max_workers=1) as executor:
-                                    future = executor.submit(get_disk_usage)
                                     try:
-                                        usage = future.result(timeout=5)  # 5秒タイムアウト
-                                    except FutureTimeoutError:
-                                        raise OSError("ネットワークアクセスタイムアウト")
+                                        outcome.append(psutil.disk_usage(mountpoint))
+                                    except OSError as usage_error:
+                                        outcome.append(usage_error)
+                                
+                                usage_thread = threading.Thread(target=get_disk_usage, daemon=True)
+                                usage_thread.start()
+                                usage_thread.join(timeout=5)  # 5秒タイムアウト
+                                if not outcome:
+                                    raise OSError("ネットワークアクセスタイムアウト")
+                                if isinstance(outcome[0], OSError):
+                                    raise outcome[0]
+                                usage = outcome[0]
                             else:
                                 usage = psutil.disk_usage(partition.mountpoint)
                                 total_gb = usage.total / (1024**3)
@@ -7342,7 +7674,6 @@ class UltraFastCompliantUI:
             
             # Linux/macOSの場合
             else:
-                import psutil
                 for partition in psutil.disk_partitions():
                     if partition.fstype and partition.fstype not in ['devtmpfs', 'tmpfs', 'proc', 'sysfs']:
                         try:
@@ -7451,7 +7782,6 @@ class UltraFastCompliantUI:
                     
         except Exception as e:
             print(f"⚠️ 対象タイプ変更エラー: {e}")
-            import traceback
             traceback.print_exc()
 
     def browse_folder(self):
@@ -7499,6 +7829,9 @@ class UltraFastCompliantUI:
                 # パスの存在確認（ネットワーク対応）
                 if self._validate_network_path(normalized_path):
                     self.selected_folder_path = normalized_path
+                    # 末尾フォルダ名は設定時に1回だけ算出（開始ボタン毎のパス解析を回避）
+                    self._selected_folder_basename = os.path.basename(
+                        normalized_path.rstrip('\\/')) or normalized_path
                     # パス表示を短縮
                     display_path = normalized_path
                     if len(display_path) > 60:
@@ -7526,7 +7859,6 @@ class UltraFastCompliantUI:
             error_msg = f"フォルダー選択エラー: {e}"
             print(f"❌ {error_msg}")
             messagebox.showerror("エラー", f"フォルダー選択に失敗しました:\n{e}")
-            import traceback
             traceback.print_exc()
 
     def _detect_network_drives(self) -> List[str]:
@@ -7617,53 +7949,72 @@ class UltraFastCompliantUI:
             
         def info_worker():
             try:
-                folder_path = Path(self.selected_folder_path)
+                target_path = self.selected_folder_path
+                folder_path = Path(target_path)
                 if not folder_path.exists():
                     self.root.after(0, lambda: self.target_info_var.set("⚠️ フォルダーが存在しません"))
                     return
+                try:
+                    folder_mtime = os.stat(target_path).st_mtime
+                except OSError:
+                    folder_mtime = None
                 
                 # UI応答性重視の軽量ファイル数計算
                 total_size = 0
                 file_count = 0
                 processed_files = 0
-                max_check_files = 5000  # 最大5000ファイルまでチェック（UI応答性重視）
+                max_check_files = 5000  # 最大5000ファイルまでサイズ集計（UI応答性重視）
+                estimate_posted = False
+                last_pause_at = 0
+                # 走査で得た対象ファイル一覧は bulk_index_worker へ引き渡す（二重走査の排除）。
+                #   全体を走査し切れた小〜中規模フォルダのみ引き渡す（上限超過時は推定表示で打ち切り）。
+                collected_files = []
                 
                 # 拡張子集合は extraction の正準定義を使用（重複/乖離を排除）
                 target_extensions = TARGET_EXTENSIONS
 
-                for root, dirs, files in os.walk(folder_path):
+                for root, dirs, files in walk_tree(str(folder_path)):
+                    # 別フォルダが選択されたら走査を打ち切る（結果は捨てる）
+                    if self.selected_folder_path != target_path:
+                        return
                     # システムフォルダーをスキップ（高速化）。
-                    #   実インデクサと同じ完全一致ベースの判定(path_has_skip_component)を
-                    #   使い、推定と実体の乖離・部分一致誤除外（例: 'cache_v2'）を防ぐ。
-                    dirs[:] = [d for d in dirs if not path_has_skip_component(d)]
+                    #   bulk_index_worker の走査と全く同じ判定（root の全構成要素を完全一致で照合）
+                    #   を使い、引き渡す一覧と再走査の結果が食い違わないようにする。
+                    if path_has_skip_component(root):
+                        dirs.clear()
+                        continue
                     
-                    for file in files:
-                        if is_temp_or_lock_file(file):
-                            continue  # Office等の一時/ロックファイル（~$～）は対象外
-                        processed_files += 1
-
-                        # 最大チェック数制限（UI応答性重視）
-                        if processed_files > max_check_files:
-                            # 推定で残りを計算
-                            estimated_total_files = processed_files * 2  # 概算
-                            estimated_target_files = int(file_count * (estimated_total_files / processed_files))
-                            info_text = f"約{total_size/(1024**3)*2:.1f}GB / 約{estimated_target_files:,}個のインデックス対象ファイル（推定）"
-                            self.root.after(0, lambda text=info_text: self.target_info_var.set(text))
-                            return
-                        
-                        file_path = Path(root) / file
-                        try:
-                            file_size = file_path.stat().st_size
-                            total_size += file_size
-                            if file_path.suffix.lower() in target_extensions:
-                                file_count += 1
-                        except (OSError, PermissionError):
-                            continue
-                        
-                        # UI応答性確保：定期的に短時間待機
-                        if processed_files % 1000 == 0:
-                            time.sleep(0.01)
+                    # ディレクトリ単位で集計（ファイル毎のループは _count_target_files に集約）
+                    targets, n_files, dir_size, n_counted = _count_target_files(
+                        root, files, target_extensions)
+                    collected_files.extend(targets)
+                    processed_files += n_files
+                    total_size += dir_size
+                    file_count += n_counted
+
+                    # 最大チェック数制限（UI応答性重視）: 推定で残りを計算し、走査を打ち切る
+                    if processed_files > max_check_files:
+                        estimated_total_files = processed_files * 2  # 概算
+                        estimated_target_files = int(file_count * (estimated_total_files / processed_files))
+                        info_text = f"約{total_size/(1024**3)*2:.1f}GB / 約{estimated_target_files:,}個のインデックス対象ファイル（推定）"
+                        self.root.after(0, lambda text=info_text: self.target_info_var.set(text))
+                        estimate_posted = True
+                        break
+
+                    # UI応答性確保：定期的に短時間待機
+                    if processed_files - last_pause_at >= 1000:
+                        last_pause_at = processed_files
+                        time.sleep(0.01)
+
+                # 走査し切れた場合のみインデクサ用にキャッシュ（60秒・同一フォルダ・mtime一致で再利用）
+                if not estimate_posted:
+                    self._cached_file_list = collected_files
+                    self._cached_file_list_path = target_path
+                    self._cached_file_list_mtime = folder_mtime
+                    self._cached_file_list_ts = time.time()
                 
+                if estimate_posted:
+                    return
                 # GB単位に変換
                 total_gb = total_size / (1024**3)
                 info_text = f"{total_gb:.1f}GB / {file_count:,}個のインデックス対象ファイル"
@@ -7675,26 +8026,138 @@ class UltraFastCompliantUI:
                 self.root.after(0, lambda: self.target_info_var.set(error_msg))
                 print(f"⚠️ {error_msg}")
         
+        # 前回の走査結果は破棄（フォルダ変更・再分析時）
+        self._invalidate_cached_file_list()
         # バックグラウンドで実行
         threading.Thread(target=info_worker, daemon=True).start()
         self.target_info_var.set("フォルダー分析中...")
 
+    def _invalidate_cached_file_list(self):
+        """update_folder_info が収集した対象ファイル一覧キャッシュを破棄"""
+        self._cached_file_list = None
+        self._cached_file_list_path = None
+        self._cached_file_list_mtime = None
+        self._cached_file_list_ts = 0.0
+
+    def _take_cached_file_list(self, target_path: str) -> Optional[List[str]]:
+        """フォルダー分析で収集済みの対象ファイル一覧を取り出す（1回限り）。
+
+        同一フォルダ・60秒以内・フォルダmtime不変の場合のみ返し、それ以外は None
+        （呼び出し側で通常の走査を行う）。取り出し後はキャッシュを破棄する。
+        """
+        cached = self._cached_file_list
+        cached_path = self._cached_file_list_path
+        cached_mtime = self._cached_file_list_mtime
+        cached_age = time.time() - self._cached_file_list_ts
+        self._invalidate_cached_file_list()
+        if cached is None or cached_path != target_path or cached_age > self.FILE_LIST_CACHE_TTL:
+            return None
+        try:
+            current_mtime = os.stat(target_path).st_mtime
+        except OSError:
+            return None
+        if cached_mtime is None or current_mtime != cached_mtime:
+            return None
+        return cached
+
     def estimate_and_display_files(self, drive_path: str):
         """ファイル数推定と表示（バックグラウンド実行）"""
         def estimate_worker():
             try:
-                estimated_files = self.estimate_file_count(drive_path)
-                if estimated_files > 0:
-                    info = self.drive_info[drive_path]
-                    info_text = f"{info['total_gb']:.1f}GB総容量 / {info['free_gb']:.1f}GB空き / {info['fstype']} / 推定{estimated_files:,}ファイル"
-                    self.root.after(0, lambda: self.target_info_var.set(info_text))
+                # NTFSならMFTレコード数を即座に表示（ディスク走査なし）。ディレクトリや
+                #   削除済み・システムのレコードも含むため「上限」として表示する。
+                mft_records = self._ntfs_mft_record_count(drive_path)
+                if mft_records > 0:
+                    count_text = f"最大{mft_records:,}ファイル（MFTレコード数）"
+                else:
+                    estimated_files = self.estimate_file_count(drive_path)
+                    if estimated_files <= 0:
+                        return
+                    count_text = f"推定{estimated_files:,}ファイル"
+                info = self.drive_info[drive_path]
+                info_text = f"{info['total_gb']:.1f}GB総容量 / {info['free_gb']:.1f}GB空き / {info['fstype']} / {count_text}"
+                self.root.after(0, lambda: self.target_info_var.set(info_text))
             except Exception as e:
                 print(f"⚠️ ファイル数推定エラー: {e}")
         
         threading.Thread(target=estimate_worker, daemon=True).start()
 
+    def _ntfs_mft_record_count(self, drive_path: str) -> int:
+        """NTFSボリュームのMFTレコード数（ファイル数の上限値）を O(1) で取得。
+
+        DeviceIoControl(FSCTL_GET_NTFS_VOLUME_DATA) で MftValidDataLength と
+        BytesPerFileRecordSegment を読み、その商をレコード数とする。ディレクトリや
+        システムファイルも含む上限値だが、ディスク走査なしで即座に得られる。
+        Windows以外・NTFS以外・権限不足等で取得できない場合は 0 を返す。
+        """
+        if os.name != 'nt':
+            return 0
+        try:
+            info = self.drive_info.get(drive_path, {})
+            if str(info.get('fstype', '')).upper() != 'NTFS':
+                return 0
+
+            import ctypes
+            from ctypes import wintypes
+
+            class NTFS_VOLUME_DATA_BUFFER(ctypes.Structure):
+                _fields_ = [
+                    ('VolumeSerialNumber', ctypes.c_longlong),
+                    ('NumberSectors', ctypes.c_longlong),
+                    ('TotalClusters', ctypes.c_longlong),
+                    ('FreeClusters', ctypes.c_longlong),
+                    ('TotalReserved', ctypes.c_longlong),
+                    ('BytesPerSector', wintypes.DWORD),
+                    ('BytesPerCluster', wintypes.DWORD),
+                    ('BytesPerFileRecordSegment', wintypes.DWORD),
+                    ('ClustersPerFileRecordSegment', wintypes.DWORD),
+                    ('MftValidDataLength', ctypes.c_longlong),
+                    ('MftStartLcn', ctypes.c_longlong),
+                    ('Mft2StartLcn', ctypes.c_longlong),
+                    ('MftZoneStart', ctypes.c_longlong),
+                    ('MftZoneEnd', ctypes.c_longlong),
+                ]
+
+            FSCTL_GET_NTFS_VOLUME_DATA = 0x00090064
+            FILE_SHARE_READ_WRITE = 0x00000001 | 0x00000002
+            OPEN_EXISTING = 3
+            INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            # 64bit では HANDLE/ポインタが int(32bit) 既定の変換で切り詰められるため、
+            #   使う API の引数・戻り値の型をすべて宣言する。
+            kernel32.CreateFileW.argtypes = [
+                wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+                wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+            kernel32.CreateFileW.restype = wintypes.HANDLE
+            kernel32.DeviceIoControl.argtypes = [
+                wintypes.HANDLE, wintypes.DWORD, wintypes.LPVOID, wintypes.DWORD,
+                wintypes.LPVOID, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD), wintypes.LPVOID]
+            kernel32.DeviceIoControl.restype = wintypes.BOOL
+            kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+            kernel32.CloseHandle.restype = wintypes.BOOL
+            volume = '\\\\.\\' + drive_path.rstrip('\\/')  # 例: \\.\C:
+            handle = kernel32.CreateFileW(volume, 0, FILE_SHARE_READ_WRITE, None,
+                                          OPEN_EXISTING, 0, None)
+            if not handle or handle == INVALID_HANDLE_VALUE:
+                return 0
+            try:
+                data = NTFS_VOLUME_DATA_BUFFER()
+                returned = wintypes.DWORD(0)
+                ok = kernel32.DeviceIoControl(
+                    handle, FSCTL_GET_NTFS_VOLUME_DATA, None, 0,
+                    ctypes.byref(data), ctypes.sizeof(data), ctypes.byref(returned), None)
+                if not ok or data.BytesPerFileRecordSegment == 0:
+                    return 0
+                return int(data.MftValidDataLength // data.BytesPerFileRecordSegment)
+            finally:
+                kernel32.CloseHandle(handle)
+        except Exception as e:
+            debug_logger.debug(f"MFTレコード数取得スキップ: {drive_path}: {e}")
+            return 0
+
     def estimate_file_count(self, drive_path: str) -> int:
-        """ドライブ内のファイル数を高速推定"""
+        """ドライブ内のファイル数を高速推定（サンプリング。NTFS は _ntfs_mft_record_count を先に使う）"""
         try:
             total_files = 0
             sample_count = 0
@@ -7757,13 +8220,13 @@ class UltraFastCompliantUI:
                 messagebox.showerror("エラー", "フォルダーを選択してください")
                 return
             target_path = self.selected_folder_path
-            target_name = f"フォルダー {Path(self.selected_folder_path).name}"
+            target_name = f"フォルダー {self._selected_folder_basename}"
         
         # 簡略化確認ダイアログ（即座開始版）
         if target_type == "drive":
             message = f"ドライブ {target_path} のインデックスを開始しますか？"
         else:
-            folder_name = Path(target_path).name
+            folder_name = self._selected_folder_basename
             message = f"フォルダー「{folder_name}」のインデックスを開始しますか？"
             
         # 高速確認ダイアログ
@@ -7863,6 +8326,9 @@ class UltraFastCompliantUI:
                                    default="yes"):
             return
 
+        # 手動更新は常に最新の走査を行う（フォルダー分析時の一覧は使わない）
+        self._invalidate_cached_file_list()
+
         self.bulk_indexing_active = True
         self.indexing_cancelled = False
         self.bulk_index_btn.config(state="disabled")
@@ -7904,7 +8370,10 @@ class UltraFastCompliantUI:
             if hasattr(self, '_load_cache') and current_time - self._load_cache['time'] < 10:
                 return self._load_cache['load']
             
-            import psutil
+            if psutil is None:
+                # psutil未導入時は中程度の負荷と仮定（キャッシュして再判定を抑止）
+                self._load_cache = {'load': 0.5, 'time': current_time}
+                return 0.5
             # 超軽量な負荷チェック（interval削減＋タイムアウト）
             try:
                 # CPU使用率を極短時間で取得
@@ -7949,6 +8418,39 @@ class UltraFastCompliantUI:
 
     def bulk_index_worker(self, target_path: str, target_name: str):
         """即座インデックスワーカー（準備時間ゼロ版）"""
+        # 🚀 インデックス実行全体で共有する単一のスレッドプール。
+        #   バッチ毎に ThreadPoolExecutor を生成/破棄するとスレッド起動・終了コストが
+        #   バッチ数（10万軽量ファイルで約330回）だけ発生するため、1回の実行で使い回す。
+        #   プールサイズはUIを固めないための絶対上限（ui_hard_cap）とし、カテゴリ毎の
+        #   並列度はバッチ処理側でセマフォにより制限する。スレッドは必要時に遅延生成される。
+        base_threads = max(2, getattr(self.search_system, 'base_threads', 4))
+        ui_hard_cap = min(max(8, base_threads * 2), 24)
+        index_executor = ThreadPoolExecutor(max_workers=ui_hard_cap, thread_name_prefix="idx")
+
+        # UI応答性を確保するための高頻度チェック。try より前に用意し、
+        #   途中で例外が出ても except 側から必ず呼べるようにする。
+        self._ui_update_counter = 0
+        self._last_ui_ts = 0.0
+        ui_update_lock = threading.Lock()  # 消費者スレッドから並行に呼ばれるため間引き状態を保護
+        
+        def safe_ui_update(message, force=False):
+            """即座UI更新（時間ベースの間引き版）
+
+            ファイル件数ではなく経過時間で間引く（最短 UI_UPDATE_INTERVAL 秒間隔）。
+            高速な軽量ファイル処理で Tk のイベントキューへ after(0, ...) が殺到して
+            メインスレッドが固まるのを防ぎ、低速バッチでも表示が止まらないようにする。
+            """
+            now = time.monotonic()
+            with ui_update_lock:
+                self._ui_update_counter += 1
+                post = force or (now - self._last_ui_ts) >= self.UI_UPDATE_INTERVAL
+                if post:
+                    self._last_ui_ts = now
+            if post:
+                self.root.after(0, lambda m=message: self.bulk_progress_var.set(m))
+                # UI応答性確保のため最小限待機
+                time.sleep(0.01)
+
         try:
             start_time = time.time()  # 処理時間計測開始
             print(f"⚡ 即座インデックス開始: {target_name}")
@@ -7994,22 +8496,6 @@ class UltraFastCompliantUI:
             # 🔬 性能診断カウンタをリセット
             self.search_system._perf_reset()
 
-            # UI応答性を確保するための高頻度チェック
-            self._ui_update_counter = 0
-            self._last_ui_update = time.time()
-            
-            def safe_ui_update(message, force=False):
-                """即座UI更新（高応答版）"""
-                current_time = time.time()
-                self._ui_update_counter += 1
-                
-                # UI更新頻度を高速化（0.5秒間隔）
-                if force or (current_time - self._last_ui_update) > 0.5:
-                    self.root.after(0, lambda m=message: self.bulk_progress_var.set(m))
-                    self._last_ui_update = current_time
-                    # UI応答性確保のため最小限待機
-                    time.sleep(0.01)
-            
             safe_ui_update("⚡ 即座開始中...", force=True)
             
             # ファイル収集（メモリ使用量制限版）
@@ -8022,9 +8508,22 @@ class UltraFastCompliantUI:
             
             print("⚡ 即座ファイル収集開始（高速処理モード）")
             
+            # フォルダー分析で収集済みの一覧が新しければ再利用して走査を省略
+            cached_files = self._take_cached_file_list(target_path)
+            if cached_files is not None:
+                all_files = cached_files[:max_files_in_memory]
+                print(f"⚡ フォルダー分析の走査結果を再利用: {len(all_files):,}ファイル（再走査なし）")
+                walk_source = ()
+                # 走査経路と同じく、100ファイル以上あれば先頭50ファイルを即座に処理開始
+                if len(all_files) >= 100:
+                    self._start_immediate_indexing(all_files[:50])
+                    safe_ui_update(f"⚡ 処理開始: {len(all_files)}ファイル")
+            else:
+                walk_source = walk_tree(target_path)
+
             # 高速ファイル収集（即座処理開始版）
             first_batch_processed = False
-            for root, dirs, files in os.walk(target_path):
+            for root, dirs, files in walk_source:
                 # システムディレクトリを事前除外（パス構成要素の完全一致で判定）
                 # 部分一致だと catalog→log, template→temp 等を誤除外し、ネットワーク
                 # 共有のフォルダが意図せず対象から外れるため、完全一致判定を使う。
@@ -8076,7 +8575,16 @@ class UltraFastCompliantUI:
             
             # 🔥 超高速ファイル分類（並列処理版）
             print("⚡ 超高速ファイル分類実行中...")
-            light_files, medium_files, heavy_files = self.categorize_files_by_size_fast_ui_safe(all_files)
+            #   分類で取得した stat は prestat に残し、インデックス時に再利用する
+            #   （ネットワークドライブでは stat 1回が数ms掛かるため二重取得を避ける）。
+            #   消えたファイルは分類時点で除外し、総数もそれに合わせる。
+            prestat: dict = {}
+            light_files, medium_files, heavy_files = self.categorize_files_by_size_fast_ui_safe(
+                all_files, stat_cache=prestat)
+            total_files = len(light_files) + len(medium_files) + len(heavy_files)
+            if not total_files:
+                safe_ui_update("対象ファイルが見つかりませんでした", force=True)
+                return
             
             # 進捗トラッカーに総ファイル数とカテゴリ別内訳を設定
             category_breakdown = {
@@ -8094,7 +8602,6 @@ class UltraFastCompliantUI:
             print("⚡ 先行処理開始...")
             quick_start_files = (light_files[:50] + medium_files[:30] + heavy_files[:20])[:100]
             if quick_start_files:
-                import threading
                 def quick_process():
                     for file_path in quick_start_files[:20]:  # 最初の20ファイル即座処理
                         try:
@@ -8107,28 +8614,28 @@ class UltraFastCompliantUI:
                 quick_thread.start()
                 print(f"✅ 先行処理開始: {len(quick_start_files)}ファイル")
             
+            physical_cores = (psutil.cpu_count(logical=False) if psutil is not None else None) or base_threads
+
             # UI応答性重視の超軽量並列処理ワーカー
-            def process_file_batch_ui_safe_with_progress(file_batch, file_category="light"):
-                """UI応答性重視の超軽量並列処理（進捗トラッキング付き・2000ファイル/秒対応）"""
-                results = []
-                
+            def category_max_workers(file_category="light"):
+                """カテゴリ別の同時処理数（システム負荷とUI上限を考慮）"""
                 # システム負荷チェック（UI応答性重視）
                 if not hasattr(self, '_cached_system_load') or time.time() - getattr(self, '_last_load_check', 0) > 10:
                     self._cached_system_load = self.get_current_system_load()
                     self._last_load_check = time.time()
                 
                 system_load = self._cached_system_load
-                current_db_count = getattr(self.search_system, 'db_count', 8)
 
                 # 並列度設定（重要）:
                 #   Pythonスレッドが多すぎるとGILを奪い合い、Tkinterのmainloop(UIスレッド)が
                 #   餓死して3層レイヤー状況・リアルタイム統計が更新されなくなる。さらに
                 #   抽出はPython処理も多くCPUコア数を超える並列化は逆効果。
                 #   そのため「CPU基準の現実的な上限」に抑える（UI応答と実効スループットの両立）。
-                base = max(2, getattr(self.search_system, 'base_threads', 4))
-                ui_hard_cap = min(max(8, base * 2), 24)  # UIを固めないための絶対上限
+                base = base_threads  # ui_hard_cap（UIを固めないための絶対上限）は共有プールのサイズ
                 if file_category == "heavy":
-                    optimal_workers = 2 if system_load > 0.8 else 3
+                    # 重量ファイル（大きなPDF等）はCPU律速: 物理コア数までに抑える
+                    #   （論理コア数まで広げるとSMT同士で奪い合い、かえって遅くなる）
+                    optimal_workers = 2 if system_load > 0.8 else max(3, physical_cores)
                 elif file_category == "medium":
                     if system_load > 0.85:
                         optimal_workers = max(2, base // 2)
@@ -8146,88 +8653,74 @@ class UltraFastCompliantUI:
                         optimal_workers = max(8, base * 2)
 
                 # UI応答性を守る絶対上限を適用
-                max_workers = min(len(file_batch), optimal_workers, ui_hard_cap)
+                return min(optimal_workers, ui_hard_cap)
 
-                # プロセスバッチサイズ
-                if file_category == "light":
-                    process_batch_size = min(1000, len(file_batch))
-                elif file_category == "medium":
-                    process_batch_size = min(500, len(file_batch))
-                else:
-                    process_batch_size = min(100, len(file_batch))
-                
-                # 超極限性能モードログ出力
-                if len(file_batch) > 0:
-                    print(f"🚀 超極限2000ファイル/秒モード {file_category}: {max_workers}並列 (バッチ:{process_batch_size}ファイル) - 目標: 2000ファイル/秒")
-                
-                for batch_start in range(0, len(file_batch), process_batch_size):
-                    batch_end = min(batch_start + process_batch_size, len(file_batch))
-                    current_batch = file_batch[batch_start:batch_end]
-                    
-                    try:
-                        # 個別ファイル処理（ThreadPoolExecutor使用）
-                        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                            # 各ファイルを個別に処理（メモリ使用量最小化）
-                            futures = []
-                            for file_path in current_batch:
-                                future = executor.submit(
-                                    self.process_single_file_with_progress, 
-                                    str(file_path), 
-                                    file_category
-                                )
-                                futures.append(future)
-                            
-                            # 結果収集（タイムアウト付き）
-                            timeout_seconds = {"light": 30, "medium": 60, "heavy": 180}.get(file_category, 45)
-                            for future in futures:
-                                try:
-                                    result = future.result(timeout=timeout_seconds)
-                                    if result:
-                                        results.append(result)
-                                except Exception as e:
-                                    continue  # エラーログを削減
-                    
-                    except Exception as e:
-                        continue  # エラーログを削減
-                
-                return results
-            
             # 🔥 メイン並列処理開始（遅延なしの即座実行）
             print("🚀 メイン並列処理開始...")
             safe_ui_update("並列処理実行中...", force=True)
             
-            # カテゴリ別の最適化された処理順序（軽量→中→重の順）
-            all_categories = [
-                ("light", light_files, 8),      # 軽量ファイル: 8並列
-                ("medium", medium_files, 4),    # 中程度ファイル: 4並列  
-                ("heavy", heavy_files, 2)       # 重量ファイル: 2並列
-            ]
-            
-            # 🔥 即座に並列処理実行（遅延なし）
+            # 🚀 キュー型の生産者/消費者パイプライン。
+            #   バッチ毎に「全ファイル完了待ち」で区切ると、最も遅いファイルを待つ間に
+            #   他のワーカーが遊ぶ（バッチ境界・カテゴリ境界の尻尾待ち）。有界キューへ
+            #   軽量→中→重の順で流し込み、常駐の消費者が途切れなく取り出して処理する。
+            #   カテゴリ別の同時処理数はセマフォで従来の上限に抑える（重量ファイルの
+            #   過剰並列によるCPU/メモリ圧迫を防ぐ）。
+            category_order = [("light", light_files), ("medium", medium_files), ("heavy", heavy_files)]
+            #   同時処理数はカテゴリ毎に決める（軽量=I/O律速でコア数の約2倍、
+            #   中=コア数、重量=物理コア数）。消費者数は最大のカテゴリ上限に合わせ、
+            #   キュー長はその2倍（消費者が取り出し待ちで遊ばない最小限の先読み）。
+            workers_by_cat = {name: category_max_workers(name) for name, _ in category_order}
+            category_limits = {name: threading.BoundedSemaphore(n) for name, n in workers_by_cat.items()}
+            thread_count = max(workers_by_cat.values())
+            work_queue: "queue.Queue" = queue.Queue(maxsize=thread_count * 2)
+            progress_lock = threading.Lock()
             total_processed = 0
-            for category_name, file_list, max_workers in all_categories:
-                if not file_list:
-                    continue
-                    
-                print(f"🔄 {category_name}ファイル処理開始: {len(file_list):,}ファイル ({max_workers}並列)")
-                
-                # バッチサイズを動的調整（2000ファイル/秒対応）
-                if category_name == "light":
-                    batch_size = min(1000, len(file_list))
-                elif category_name == "medium":
-                    batch_size = min(500, len(file_list))
-                else:
-                    batch_size = min(100, len(file_list))
-                
-                # 各カテゴリを即座に並列処理
-                for i in range(0, len(file_list), batch_size):
-                    batch = file_list[i:i+batch_size]
-                    batch_results = process_file_batch_ui_safe_with_progress(batch, category_name)
-                    total_processed += len(batch)
-                    
-                    # 進捗更新
-                    progress_pct = (total_processed / total_files) * 100
-                    safe_ui_update(f"処理中: {total_processed:,}/{total_files:,} ({progress_pct:.1f}%)")
+
+            def index_consumer():
+                nonlocal total_processed
+                while True:
+                    item = work_queue.get()
+                    try:
+                        if item is None:
+                            return
+                        category_name, file_path = item
+                        with category_limits[category_name]:
+                            self.process_single_file_with_progress(
+                                str(file_path), category_name, st=prestat.pop(file_path, None))
+                        with progress_lock:
+                            total_processed += 1
+                            done_now = total_processed
+                        # 進捗更新（safe_ui_update 側で時間ベースに間引く）
+                        safe_ui_update(f"処理中: {done_now:,}/{total_files:,} ({done_now / total_files * 100:.1f}%)")
+                    except Exception:
+                        pass  # エラーログを削減（個別ファイルのエラーは進捗トラッカーに記録済み）
+                    finally:
+                        work_queue.task_done()
+
+            consumers = [index_executor.submit(index_consumer) for _ in range(thread_count)]
+            try:
+                for category_name, file_list in category_order:
+                    if not file_list:
+                        continue
+                    print(f"🔄 {category_name}ファイル投入開始: {len(file_list):,}ファイル "
+                          f"(同時{workers_by_cat[category_name]}件)")
+                    for file_path in file_list:
+                        if self.indexing_cancelled:
+                            break
+                        work_queue.put((category_name, file_path))
+                    if self.indexing_cancelled:
+                        print("⏹️ インデックス処理がキャンセルされました（投入停止）")
+                        break
+            finally:
+                for _ in consumers:
+                    work_queue.put(None)
+                concurrent.futures.wait(consumers)
+
+            # 最終件数は間引きに関係なく必ず表示する（キャンセル時も実際の処理数を出す）
+            safe_ui_update(
+                f"{'キャンセル' if self.indexing_cancelled else '処理中'}: "
+                f"{total_processed:,}/{total_files:,} ({total_processed / total_files * 100:.1f}%)",
+                force=True)
             
             # 一括インデックスモード解除＋完全層バッファの最終フラッシュ（バルク書き込み）
             self.search_system._bulk_indexing = False
@@ -8291,151 +8784,19 @@ class UltraFastCompliantUI:
         except Exception as e:
             safe_ui_update(f"エラー: {str(e)}", force=True)
             print(f"❌ インデックス処理エラー: {e}")
-            
-            # UI応答性重視の超軽量並列処理ワーカー
-            def process_file_batch_ui_safe(file_batch, file_category="light"):
-                """UI応答性重視の超軽量並列処理"""
-                results = []
-                
-                # システム負荷チェック（UI応答性重視）
-                if not hasattr(self, '_cached_system_load') or time.time() - getattr(self, '_last_load_check', 0) > 10:
-                    self._cached_system_load = self.get_current_system_load()
-                    self._last_load_check = time.time()
-                
-                system_load = self._cached_system_load
-                current_db_count = getattr(self.search_system, 'db_count', 8)
-                
-                # UI応答性重視の並列度設定（無限ループ防止）
-                if file_category == "heavy":
-                    optimal_workers = 1  # 重いファイルは確実に1つずつ
-                elif file_category == "medium":
-                    # システム負荷に応じて動的調整
-                    if system_load > 0.9:
-                        optimal_workers = 1
-                    elif system_load > 0.7:
-                        optimal_workers = 2
-                    else:
-                        optimal_workers = max(1, current_db_count // 6)
-                else:
-                    # 軽量ファイルでもUI応答性重視
-                    if system_load > 0.8:
-                        optimal_workers = max(1, current_db_count // 8)
-                    elif system_load > 0.6:
-                        optimal_workers = max(2, current_db_count // 4)
-                    else:
-                        optimal_workers = max(4, current_db_count // 2)
-                
-                # 超極限並列数制限（1000ファイル/秒目標達成）
-                if system_load < 0.5:
-                    max_workers = min(len(file_batch), optimal_workers, 48)  # 低負荷時は48並列まで（100%増強）
-                elif system_load < 0.7:
-                    max_workers = min(len(file_batch), optimal_workers, 40)  # 中負荷時は40並列まで（100%増強）
-                else:
-                    max_workers = min(len(file_batch), optimal_workers, 32)  # 高負荷時は32並列まで（100%増強）
-                
-                # 超極限モード：プロセスバッチサイズを1000ファイル/秒対応に増強
-                if file_category == "light":
-                    process_batch_size = min(500, len(file_batch))  # 軽量ファイルは500ファイル/バッチ（100%増強）
-                elif file_category == "medium":
-                    process_batch_size = min(250, len(file_batch))  # 中程度ファイルは250ファイル/バッチ（100%増強）
-                else:
-                    process_batch_size = min(50, len(file_batch))   # 重いファイルは50ファイル/バッチ（100%増強）
-                
-                # 超極限性能モードログ出力
-                if len(file_batch) > 0:
-                    print(f"🚀 超極限1000ファイル/秒モード {file_category}: {max_workers}並列 (バッチ:{process_batch_size}ファイル) - 目標: 1000ファイル/秒")
-                
-                for batch_start in range(0, len(file_batch), process_batch_size):
-                    batch_end = min(batch_start + process_batch_size, len(file_batch))
-                    current_batch = file_batch[batch_start:batch_end]
-                    
-                    try:
-                        # 個別ファイル処理（ThreadPoolExecutor使用）
-                        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                            # 各ファイルを個別に処理（メモリ使用量最小化）
-                            futures = []
-                            for file_path in current_batch:
-                                future = executor.submit(
-                                    self.search_system.live_progressive_index_file, 
-                                    str(file_path)
-                                )
-                                futures.append(future)
-                            
-                            # 結果収集（タイムアウト付き）
-                            timeout_seconds = {"light": 30, "medium": 60, "heavy": 180}.get(file_category, 45)
-                            for future in futures:
-                                try:
-                                    result = future.result(timeout=timeout_seconds)
-                                    if result:
-                                        results.append(result)
-                                except Exception as e:
-                                    continue  # エラーログを削減
-                    
-                    except Exception as e:
-                        continue  # エラーログを削減
-                
-                return results
-
-            # 優先順位付き処理: 軽量 → 中程度 → 重量（進捗トラッキング付き）
-            all_categorized_files = [
-                (light_files, "light"),
-                (medium_files, "medium"), 
-                (heavy_files, "heavy")
-            ]
-            
-            indexed_count = 0
-            total_files = len(all_files)
-            
-            for file_list, category in all_categorized_files:
-                if not file_list:
-                    continue
-                    
-                safe_ui_update(f"{category}ファイル処理開始: {len(file_list)}個", force=True)
-                print(f"🚀 {category}ファイル処理開始: {len(file_list)}個（2000ファイル/秒対応モード）")
-                
-                # 超極限モード：バッチサイズを2000ファイル/秒対応に超強化
-                if category == "heavy":
-                    batch_size = 32   # 重いファイルは32個ずつに超強化（200%増）
-                elif category == "medium":
-                    batch_size = 100  # 中程度ファイルは100個ずつに超強化（200%増）
-                else:
-                    batch_size = 300  # 軽量ファイルは300個ずつに超極限強化（200%増）
-                
-                for i in range(0, len(file_list), batch_size):
-                    batch = file_list[i:i+batch_size]
-                    
-                    # UI応答性重視処理実行（進捗トラッキング付き）
-                    batch_results = process_file_batch_ui_safe_with_progress(batch, category)
-                    
-                    indexed_count += len(batch)
-                    progress = int(indexed_count / total_files * 100) if total_files > 0 else 100
-                    
-                    # 超極限モード更新頻度：UI負荷を2000ファイル/秒対応に最小化
-                    if indexed_count % 2000 == 0 or indexed_count == total_files:
-                        safe_ui_update(f"超極限2000ファイル/秒処理中: {indexed_count:,}/{total_files:,} ({progress}%) - {category}ファイル")
-                    
-                    # 超極限モード：処理間の待機時間を完全除去（1000ファイル/秒対応）
-                    # 待機時間はすべて削除済み            # 完了メッセージ（詳細情報付き）
-            end_time = time.time()
-            total_time = end_time - start_time
-            
-            completion_msg = f"✅ インデックス完了: {total_files:,}ファイル"
-            if total_time > 0:
-                completion_msg += f" ({total_time:.1f}秒)"
-            
-            safe_ui_update(completion_msg, force=True)
-            print(f"🎉 大容量インデックス完了: {total_files:,}ファイル ({target_name}) - 所要時間: {total_time:.1f}秒")
-            
-            # 処理統計表示
-            if light_files or medium_files or heavy_files:
-                print(f"📊 処理内訳: 軽量{len(light_files)}個, 中程度{len(medium_files)}個, 重量{len(heavy_files)}個")
-            
-        except Exception as e:
-            error_msg = f"❌ インデックスエラー: {e}"
-            safe_ui_update(error_msg, force=True)
-            print(f"❌ 大容量インデックスエラー: {e}")
-            
         finally:
+            # 共有スレッドプールは全カテゴリ処理後に1回だけ終了する
+            index_executor.shutdown(wait=False, cancel_futures=True)
+
+            # 一括インデックスモード・遅延OCRの解除（成功時は解除済み。途中の例外で
+            #   バルク状態のまま残り、以降の単発インデックスが即座層を飛ばさないように）
+            self.search_system._bulk_indexing = False
+            try:
+                self.search_system._extractor.bulk_mode = False
+                self.search_system._extractor.defer_ocr = False
+            except Exception:
+                pass
+
             # 進捗ウィンドウを閉じる
             self.root.after(0, lambda: self.progress_window.destroy() if self.progress_window and self.progress_window.winfo_exists() else None)
             
@@ -8493,7 +8854,6 @@ def main():
         
         # システム情報表示
         try:
-            import psutil
             physical_cores = psutil.cpu_count(logical=False)
             logical_cores = psutil.cpu_count(logical=True)
             memory_gb = psutil.virtual_memory().total / (1024**3)
@@ -8558,7 +8918,6 @@ def main():
     except Exception as e:
         print(f"❌ アプリケーション起動エラー: {e}")
         debug_logger.error(f"アプリケーション起動エラー: {e}")
-        import traceback
         traceback.print_exc()
 
 
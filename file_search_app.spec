@@ -28,6 +28,7 @@ a = Analysis(
         'lxml',
         'chardet',
         'psutil',
+        'ahocorasick',  # 任意（pyahocorasick 導入済みの環境でビルドした場合のみ同梱される）
         'concurrent.futures',
         'asyncio',
         'sqlite3',